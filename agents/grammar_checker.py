@@ -1,5 +1,7 @@
-import openai
 from config.config import OPENAI_API_KEY
+from utils.lazy_import import lazy_import
+
+openai = lazy_import("openai")
 
 class GrammarChecker:
     """
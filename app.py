@@ -9,11 +9,9 @@ st.set_page_config(
 )
 
 import os
-import tempfile
-import base64
-from PIL import Image
-from io import BytesIO
+import uuid
 import time
+import random
 
 from agents.word_interpreter import WordInterpreter
 from agents.grammar_checker import GrammarChecker
@@ -21,11 +19,23 @@ from agents.prompt_refiner import PromptRefiner
 from integrations.image_generator import ImageGenerator
 from integrations.audio_fetcher import AudioFetcher
 from integrations.anki_uploader import AnkiUploader
+from integrations.anki_health import AnkiHealthMonitor
+from integrations.upload_outbox import UploadOutbox
+from integrations.deck_index import DeckIndex
 from utils.card_compiler import CardCompiler
+from utils.task_runner import TaskRunner
+from utils.render_cache import RenderCache
+from utils.lazy_import import LazyRegistry
+from utils.media_lifecycle import MediaLifecycleManager
+from pipeline.stages import enrich_word
+from pipeline.card_pipeline import CardPipeline
+from pipeline.review_queue import ReviewQueue
 from config.config import (
     SUPPORTED_LANGUAGES, WORD_TYPES, GENDER_OPTIONS, 
     GENDER_ARTICLES, DEFAULT_LANGUAGE, DEFAULT_DECK_NAME,
-    VERB_CONJUGATIONS
+    VERB_CONJUGATIONS, IMAGE_GENERATION_PROFILES, DEFAULT_IMAGE_PROFILE,
+    DEFAULT_IMAGE_CANDIDATES, MAX_IMAGE_CANDIDATES, TASK_POLL_INTERVAL,
+    IMAGE_JOB_POLL_INTERVAL
 )
 
 # Initialize session state variables if they don't exist
@@ -43,8 +53,8 @@ if 'card_data' not in st.session_state:
     st.session_state.card_data = None
 if 'step' not in st.session_state:
     st.session_state.step = 1
-if 'temp_dir' not in st.session_state:
-    st.session_state.temp_dir = tempfile.mkdtemp()
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 if 'anki_connected' not in st.session_state:
     st.session_state.anki_connected = False
 if 'decks' not in st.session_state:
@@ -57,28 +67,80 @@ if 'plural_validation' not in st.session_state:
 # Add state for type/gender validation
 if 'type_gender_validation' not in st.session_state:
     st.session_state.type_gender_validation = None
+# Background image prediction for step 3
+if 'image_job_id' not in st.session_state:
+    st.session_state.image_job_id = None
+# Background task (agent/integration call) whose result is applied on a later rerun
+if 'task_job_id' not in st.session_state:
+    st.session_state.task_job_id = None
+
+# Agents and integrations are shared by all sessions and built on first access
+def create_anki_uploader(resources):
+    """Create the AnkiUploader together with its background health monitor."""
+    anki_uploader = AnkiUploader()
+    anki_uploader.health_monitor = AnkiHealthMonitor(anki_uploader)
+    return anki_uploader
 
-# Initialize agents and integrations
 @st.cache_resource
 def load_resources():
-    return {
-        'word_interpreter': WordInterpreter(),
-        'grammar_checker': GrammarChecker(),
-        'prompt_refiner': PromptRefiner(),
-        'image_generator': ImageGenerator(),
-        'audio_fetcher': AudioFetcher(),
-        'anki_uploader': AnkiUploader(),
-        'card_compiler': CardCompiler()
-    }
+    return LazyRegistry({
+        'word_interpreter': lambda resources: WordInterpreter(),
+        'grammar_checker': lambda resources: GrammarChecker(),
+        'prompt_refiner': lambda resources: PromptRefiner(),
+        'image_generator': lambda resources: ImageGenerator(),
+        'audio_fetcher': lambda resources: AudioFetcher(),
+        'card_compiler': lambda resources: CardCompiler(),
+        'card_pipeline': lambda resources: CardPipeline(
+            word_interpreter=resources['word_interpreter'],
+            grammar_checker=resources['grammar_checker'],
+            prompt_refiner=resources['prompt_refiner'],
+            image_generator=resources['image_generator'],
+            audio_fetcher=resources['audio_fetcher'],
+            card_compiler=resources['card_compiler']
+        ),
+        'anki_uploader': create_anki_uploader,
+        'anki_health': lambda resources: resources['anki_uploader'].health_monitor,
+        'upload_outbox': lambda resources: UploadOutbox(resources['anki_uploader']),
+        'deck_index': lambda resources: DeckIndex(resources['anki_uploader']),
+        'task_runner': lambda resources: TaskRunner(),
+        'render_cache': lambda resources: RenderCache(),
+        'media_lifecycle': lambda resources: MediaLifecycleManager()
+    })
 
 resources = load_resources()
 
+# The session's media directory (recreated if the sweeper removed it while the session was idle)
+st.session_state.temp_dir = resources['media_lifecycle'].session_dir(st.session_state.session_id)
+
+def session_media():
+    """Media files the session still shows or will put on a card."""
+    paths = [st.session_state.audio_path, st.session_state.image_path]
+    paths.extend(st.session_state.get('image_candidates') or [])
+    review_queue = st.session_state.get('review_queue')
+    if review_queue:
+        for item in review_queue.items():
+            if item["status"] != "queued" and item["prepared"]:
+                paths.append(item["prepared"]["audio_path"])
+    return paths
+
+def release_session_media():
+    """Delete the session's media files it no longer references."""
+    media_lifecycle = resources['media_lifecycle']
+    media_lifecycle.touch(st.session_state.session_id, session_media())
+    media_lifecycle.release_unreferenced(st.session_state.session_id)
+
 def reset_session():
     """Reset the session state to start over."""
+    cancel_task()
+    cancel_image_job()
     st.session_state.word_data = None
     st.session_state.definition = None
     st.session_state.grammar_check = None
     st.session_state.image_path = None
+    st.session_state.image_profile = None
+    st.session_state.image_candidates = None
+    st.session_state.image_prompt = None
+    st.session_state.image_prompt_sentence = None
     st.session_state.audio_path = None
     st.session_state.card_data = None
     st.session_state.step = 1
@@ -98,37 +160,316 @@ def reset_session():
     # Clear type/gender validation state
     if 'type_gender_validation' in st.session_state:
         del st.session_state.type_gender_validation
+    if 'image_error' in st.session_state:
+        del st.session_state.image_error
+    if 'task_error' in st.session_state:
+        del st.session_state.task_error
+    
+    release_session_media()
+
+def start_image_job(prompt, profile, num_outputs=1, seed=None):
+    """Start a background image prediction for the current word."""
+    image_generator = resources['image_generator']
+    timestamp = int(time.time())
+    safe_word = "".join(c for c in st.session_state.word_data['word'] if c.isalnum() or c in (' ', '_')).rstrip()
+    image_filename = f"ankiforge_{safe_word}_{timestamp}.png"
+    image_file = os.path.join(st.session_state.temp_dir, image_filename)
+    submit_result = image_generator.submit_image(
+        prompt, save_path=image_file, seed=seed, profile=profile, num_outputs=num_outputs
+    )
+    st.session_state.image_error = None
+    if submit_result["success"]:
+        st.session_state.image_job_id = submit_result["job_id"]
+        st.session_state.image_job_profile = profile
+    else:
+        st.session_state.image_error = submit_result["error"]
+
+def cancel_image_job():
+    """Cancel the session's running image prediction, if any."""
+    job_id = st.session_state.get('image_job_id')
+    if job_id:
+        resources['image_generator'].cancel_image_job(job_id)
+        st.session_state.image_job_id = None
+
+@st.fragment(run_every=IMAGE_JOB_POLL_INTERVAL)
+def image_job_status():
+    """Poll the session's image job and apply its result once it has finished."""
+    job_id = st.session_state.get('image_job_id')
+    if not job_id:
+        return
+    
+    image_generator = resources['image_generator']
+    job = image_generator.get_image_job(job_id)
+    
+    if job and job["status"] not in ("succeeded", "failed", "canceled"):
+        elapsed = int(time.time() - job["created_at"])
+        st.info(f"Generating image... ({job['status']}, {elapsed}s)")
+        if st.button("Cancel Image Generation", key="cancel_img_btn"):
+            cancel_image_job()
+            st.rerun()
+        return
+    
+    # The job has finished (or was forgotten); apply its result to the whole page
+    st.session_state.image_job_id = None
+    result = job["result"] if job else None
+    if result and result["success"]:
+        st.session_state.image_profile = st.session_state.get('image_job_profile')
+        image_paths = result.get("image_paths", [result.get("image_path")])
+        if len(image_paths) > 1:
+            # Let the user pick one of the candidates in step 3
+            st.session_state.image_candidates = image_paths
+            st.session_state.image_path = None
+        else:
+            st.session_state.image_candidates = None
+            st.session_state.image_path = image_paths[0]
+            # Quality images go straight to the card preview; fast previews stay on step 3
+            # so the user can keep them or regenerate in quality
+            if st.session_state.image_profile == "quality":
+                st.session_state.step = 4
+    else:
+        st.session_state.image_error = (result or {}).get("error", "Image generation did not finish")
+    st.rerun()
+
+def start_task(label, handler, fn, *args, context=None, **kwargs):
+    """
+    Run a long call on the shared task runner instead of the script thread.
+    
+    Args:
+        label (str): Message shown while the task runs
+        handler (str): Key of the TASK_HANDLERS function that applies the result
+        fn (callable): Function to run
+        context (dict, optional): Extra data for the handler
+    """
+    cancel_task()
+    st.session_state.task_job_id = resources['task_runner'].submit(fn, *args, label=label, **kwargs)
+    st.session_state.task_handler = handler
+    st.session_state.task_context = context or {}
+    st.session_state.task_error = None
+
+def cancel_task():
+    """Cancel the session's running task, if any."""
+    job_id = st.session_state.get('task_job_id')
+    if job_id:
+        resources['task_runner'].cancel(job_id)
+        st.session_state.task_job_id = None
+
+def start_enrichment(word_data):
+    """Store the word data and generate its definition and pronunciation in the background."""
+    st.session_state.word_data = word_data
+    start_task(
+        "Generating definition and pronunciation", 'enrich', enrich_word,
+        resources['word_interpreter'], resources['audio_fetcher'],
+        word_data, st.session_state.temp_dir
+    )
+
+def apply_enrichment(result, context):
+    """Store the definition and pronunciation and continue to the sentence (step 2)."""
+    st.session_state.definition = result["definition"]
+    st.session_state.audio_path = result["audio_path"]
+    st.session_state.step = 2
+
+def apply_type_gender_validation(result, context):
+    """Store the word type/gender validation."""
+    st.session_state.type_gender_validation = result
+
+def apply_plural_validation(result, context):
+    """Store the plural validation."""
+    st.session_state.plural_validation = result
+
+def apply_conjugation_verification(result, context):
+    """Store the conjugation verification."""
+    st.session_state.conjugation_verification = result
+
+def apply_grammar_check(result, context):
+    """Store the grammar check and continue to image generation."""
+    st.session_state.grammar_check = result
+    st.session_state.step = 3
+
+def apply_image_prompt(result, context):
+    """Store the refined image prompt and start the image prediction with it."""
+    st.session_state.image_prompt = result
+    st.session_state.image_prompt_sentence = context['sentence']
+    start_image_job(result, context['profile'], context['num_outputs'], context['seed'])
+
+# Functions applying a finished task's result to the session, by handler name
+TASK_HANDLERS = {
+    'type_gender': apply_type_gender_validation,
+    'plural': apply_plural_validation,
+    'conjugations': apply_conjugation_verification,
+    'grammar': apply_grammar_check,
+    'image_prompt': apply_image_prompt,
+    'enrich': apply_enrichment,
+}
+
+@st.fragment(run_every=TASK_POLL_INTERVAL)
+def task_status():
+    """Poll the session's background task and apply its result once it has finished."""
+    job_id = st.session_state.get('task_job_id')
+    if not job_id:
+        return
+    
+    job = resources['task_runner'].get(job_id)
+    if job and job["status"] in ("queued", "running"):
+        st.info(f"{job['label'] or 'Working'}... ({int(time.time() - job['created_at'])}s)")
+        if st.button("Cancel", key="cancel_task_btn"):
+            cancel_task()
+            st.rerun()
+        return
+    
+    # The task has finished (or expired); apply its result to the whole page
+    st.session_state.task_job_id = None
+    if job and job["status"] == "succeeded":
+        TASK_HANDLERS[st.session_state.task_handler](job["result"], st.session_state.task_context)
+    elif job and job["status"] == "canceled":
+        pass
+    else:
+        st.session_state.task_error = (job or {}).get("error") or "The task did not finish"
+    st.rerun()
+
+def refresh_queue(review_queue):
+    """Collect the review queue's finished tasks."""
+    if review_queue.refresh():
+        # Cards queued for upload no longer need the session's copies of their media
+        release_session_media()
+
+def queue_busy(review_queue):
+    """Whether any word in the review queue is still being prepared or finished."""
+    counts = review_queue.counts()
+    return bool(counts["preparing"] or counts["finishing"])
+
+@st.fragment(run_every=TASK_POLL_INTERVAL)
+def queue_status():
+    """
+    Poll the review queue while it is busy, rerunning the page when a word becomes
+    ready or the last task finishes (so the page stops polling).
+    """
+    review_queue = st.session_state.review_queue
+    was_waiting = review_queue.next_ready() is None
+    refresh_queue(review_queue)
+    if (was_waiting and review_queue.next_ready() is not None) or not queue_busy(review_queue):
+        st.rerun()
+    show_queue(review_queue)
+
+def show_queue(review_queue):
+    """Show the review queue's counts and words, with buttons to retry or remove them."""
+    counts = review_queue.counts()
+    st.caption(
+        f"Preparing: {counts['preparing']} · Ready: {counts['ready']} · "
+        f"Finishing: {counts['finishing']} · Queued for upload: {counts['queued']} · Failed: {counts['failed']}"
+    )
+    for item in review_queue.items():
+        icon = {"preparing": "⏳", "ready": "✍️", "finishing": "⚙️", "queued": "✅", "failed": "❌"}[item["status"]]
+        line = f"{icon} **{item['word']}** ({item['status']})"
+        if item["error"]:
+            line += f": {item['error']}"
+        elif item["warnings"]:
+            line += f" — {'; '.join(item['warnings'])}"
+        cols = st.columns([6, 1, 1])
+        cols[0].markdown(line)
+        if item["status"] == "failed" and cols[1].button("Retry", key=f"queue_retry_{item['id']}"):
+            review_queue.retry(item["id"])
+            st.rerun()
+        if item["status"] != "queued" and cols[2].button("✕", key=f"queue_remove_{item['id']}"):
+            review_queue.remove(item["id"])
+            st.rerun()
+    if counts["queued"] and st.button("Clear finished", key="queue_clear_btn"):
+        review_queue.clear_finished()
+        st.rerun()
+
+def queue_mode(selected_language):
+    """
+    Queue mode: words are entered up front and prepared in the background while the
+    user writes sentences; each card is finished and queued for upload in the background.
+    """
+    if 'review_queue' not in st.session_state:
+        st.session_state.review_queue = ReviewQueue(
+            resources['task_runner'], resources['card_pipeline'],
+            resources['upload_outbox'], st.session_state.temp_dir,
+            deck_index=resources['deck_index']
+        )
+    review_queue = st.session_state.review_queue
+    refresh_queue(review_queue)
+    
+    with st.form("queue_words_form", clear_on_submit=True):
+        words = st.text_area("Words (one per line):")
+        word_type = st.selectbox("Word type:", WORD_TYPES.get(selected_language, ["noun"]))
+        if st.form_submit_button("Add to Queue") and words:
+            review_queue.add_words(words.splitlines(), selected_language, word_type)
+    
+    generate_image = st.checkbox("Generate images", value=True, key="queue_generate_image")
+    profiles = list(IMAGE_GENERATION_PROFILES)
+    image_profile = st.radio(
+        "Image profile:", profiles, index=profiles.index(DEFAULT_IMAGE_PROFILE),
+        format_func=lambda p: IMAGE_GENERATION_PROFILES[p]["label"], horizontal=True, key="queue_image_profile"
+    )
+    
+    item = review_queue.next_ready()
+    if item is None:
+        st.info("Add words above; each one shows up here once its definition and pronunciation are ready.")
+    else:
+        prepared = item["prepared"]
+        word_data = prepared["word_data"]
+        st.subheader(f"{word_data.get('article', '')} {word_data['word']}".strip())
+        st.write(prepared["definition"])
+        if prepared["audio_path"]:
+            show_audio(prepared["audio_path"])
+        
+        with st.form(f"queue_sentence_form_{item['id']}", clear_on_submit=True):
+            sentence = st.text_input("Write a sentence using this word:", value=item["sentence"])
+            submitted = st.form_submit_button("Submit and Next")
+        if submitted and sentence:
+            review_queue.submit_sentence(
+                item["id"], sentence, deck_name=st.session_state.get('target_deck') or DEFAULT_DECK_NAME,
+                generate_image=generate_image, image_profile=image_profile
+            )
+            st.rerun()
+    
+    # Only poll while something is running; otherwise the list only changes on user input
+    if queue_busy(review_queue):
+        queue_status()
+    else:
+        show_queue(review_queue)
 
-def check_anki_connection():
-    """Check if Anki MCP server is running and update connection status."""
-    uploader = resources['anki_uploader']
-    result = uploader.check_connection()
+def check_anki_connection(probe=True):
+    """
+    Update the connection status from the shared health monitor.
+    
+    Args:
+        probe (bool): Probe Anki now instead of using the latest heartbeat result
+    """
+    health = resources['anki_health']
+    state = health.check_now() if probe else health.state()
     
-    if result['success']:
+    if state['connected']:
+        # Load the deck list when the connection is (re-)established; it is cached by the uploader
+        if not st.session_state.anki_connected or probe:
+            decks = resources['anki_uploader'].get_deck_names()
+            if decks:
+                st.session_state.decks = decks
         st.session_state.anki_connected = True
-        # Get available decks
-        decks = uploader.get_deck_names()
-        if decks:
-            st.session_state.decks = decks
         return True
     else:
         st.session_state.anki_connected = False
         return False
 
-def get_audio_html(audio_path):
-    """Generate HTML for audio playback."""
-    audio_format = audio_path.split('.')[-1]
-    with open(audio_path, "rb") as f:
-        audio_bytes = f.read()
+def show_audio(audio_path):
+    """Show an audio player; the bytes are cached per file version and served by Streamlit, not inlined."""
+    audio = resources['render_cache'].audio(audio_path)
+    if audio:
+        st.audio(audio[0], format=audio[1])
+
+def show_image(image_path):
+    """
+    Show a preview thumbnail of an image, cached per file version.
     
-    audio_b64 = base64.b64encode(audio_bytes).decode()
-    audio_html = f"""
-        <audio controls>
-            <source src="data:audio/{audio_format};base64,{audio_b64}" type="audio/{audio_format}">
-            Your browser does not support the audio element.
-        </audio>
+    Returns:
+        bool: Whether the image file exists
     """
-    return audio_html
+    thumbnail = resources['render_cache'].thumbnail(image_path)
+    if thumbnail is None:
+        return False
+    st.image(thumbnail, use_column_width=True)
+    return True
 
 # Add CSS for colored feedback boxes
 def add_custom_css():
@@ -176,7 +517,723 @@ def add_custom_css():
     </style>
     """, unsafe_allow_html=True)
 
+def final_sentence():
+    """The checked sentence, corrected if the grammar check found mistakes."""
+    grammar_check = st.session_state.grammar_check
+    if grammar_check.get("is_correct"):
+        return grammar_check.get("sentence", "")
+    return grammar_check.get("corrected_sentence", "")
+
+@st.fragment
+def word_input_step(selected_language):
+    """Step 1: word input, validation of type/gender and plural or conjugations."""
+    word = st.text_input("Enter a word in the target language:")
+
+    if word:
+        # Flag words the target deck already has before paying for any generation
+        if st.session_state.anki_connected and st.session_state.get('target_deck'):
+            # Answered from the cached index (synced in the background), never a full sync on this thread
+            duplicate_check = resources['deck_index'].find_duplicate(st.session_state.target_deck, word, wait=False)
+            if duplicate_check.get("is_duplicate"):
+                st.warning(f"'{word}' already exists in deck '{st.session_state.target_deck}'. "
+                           "Anki will reject a duplicate card.")
+
+        # --- Word Type and Initial Gender Selection --- 
+        # Use callbacks to reset dependent states when type/gender changes
+        def reset_dependent_states():
+            st.session_state.type_gender_validation = None
+            st.session_state.plural_validation = None
+            st.session_state.user_plural_input = ""
+
+        word_type = st.selectbox(
+            "Select word type:", 
+            WORD_TYPES[selected_language],
+            key="word_type_select",
+            on_change=reset_dependent_states
+        )
+
+        gender = None
+        gender_selection_needed = selected_language in GENDER_OPTIONS and word_type == "noun"
+        if gender_selection_needed:
+             gender = st.selectbox(
+                 "Select gender:", 
+                 GENDER_OPTIONS[selected_language], 
+                 index=None, 
+                 placeholder="Select gender...",
+                 key="gender_select",
+                 on_change=reset_dependent_states # Reset if gender changes too
+             )
+
+        # --- Type/Gender Validation --- 
+        type_gender_validated = False
+        type_gender_correct = False
+        # Check if ready for type/gender validation (word, type selected, gender selected if needed)
+        ready_for_type_gender_validation = bool(word and word_type and (gender is not None if gender_selection_needed else True))
+
+        if ready_for_type_gender_validation:
+            if st.button("Validate Word Info", key="validate_type_gender_btn"):
+                 start_task(
+                     f"Validating type/gender for '{word}'", 'type_gender',
+                     resources['word_interpreter'].validate_word_type_gender,
+                     word, selected_language, word_type, gender
+                 )
+                 st.rerun()
+
+            # Display Type/Gender Validation Feedback
+            tg_validation = st.session_state.get('type_gender_validation')
+            if tg_validation:
+                type_gender_validated = True
+                st.markdown("--- T Y P E / G E N D E R   V A L I D A T I O N ---")
+                if not tg_validation.get("success", False):
+                     st.error(f"Validation failed: {tg_validation.get('reason', 'Unknown API error')}")
+                     # Allow proceeding even if validation fails, but maybe flag it?
+                     type_gender_correct = False # Treat failure as incorrect for blocking
+                else:
+                    is_type_ok = tg_validation.get("is_type_correct")
+                    is_gender_ok = tg_validation.get("is_gender_correct")
+                    ai_type = tg_validation.get("ai_word_type")
+                    ai_gender = tg_validation.get("ai_gender")
+                    ai_reason = tg_validation.get("reason")
+
+                    # Determine overall correctness for blocking
+                    if gender_selection_needed:
+                        type_gender_correct = is_type_ok and is_gender_ok
+                    else:
+                        type_gender_correct = is_type_ok # Only type matters
+
+                    # Display feedback
+                    if type_gender_correct:
+                        st.success("✓ Word Type & Gender seem correct!")
+                    else:
+                        st.warning("Potential issue with Word Type or Gender:")
+                        if not is_type_ok:
+                             st.error(f"Word Type: Incorrect. AI suggests: **{ai_type}**")
+                        else:
+                             st.success("Word Type: Correct")
+
+                        if gender_selection_needed:
+                            if not is_gender_ok:
+                                 st.error(f"Gender: Incorrect. AI suggests: **{ai_gender or 'N/A'}**")
+                            else:
+                                st.success("Gender: Correct")
+
+                    # Display AI reason
+                    if ai_reason:
+                        st.markdown(
+                            f'<div class="explanation-box"><strong>Reason:</strong> {ai_reason}</div>',
+                            unsafe_allow_html=True
+                        )
+                st.markdown("--- E N D   T Y P E / G E N D E R   V A L I D A T I O N ---")
+        else:
+            # If not ready for validation, ensure validation state is clear
+            st.session_state.type_gender_validation = None
+
+        # Determine if we can proceed to the next input stage (plural/conjugations/definition)
+        # Requires word input AND successful type/gender validation
+        can_proceed = bool(word and type_gender_validated and type_gender_correct)
+
+        if not word:
+             st.info("Please enter a word to begin.")
+        elif not ready_for_type_gender_validation:
+             st.info("Please select word type (and gender if applicable) to proceed.")
+        elif not type_gender_validated:
+             st.info("Please validate the Word Type/Gender information before proceeding.")
+        elif not type_gender_correct:
+             st.error("Please correct the Word Type/Gender based on the validation feedback before proceeding.")
+
+        # --- NOUN Specific Handling (Plural) --- 
+        if word_type == "noun":
+            # --- User Plural Input & Validation --- 
+            plural_input_ready = False
+            plural_validated = False
+
+            # Only show plural input if type/gender validation passed
+            if can_proceed:
+                st.subheader("Plural Information") # Add subheader
+                st.session_state.user_plural_input = st.text_input(
+                    "Enter your guess for the plural form (leave blank if none):",
+                    value=st.session_state.user_plural_input,
+                    key="user_plural_input_field",
+                    on_change=lambda: st.session_state.update(plural_validation=None) 
+                )
+
+                user_plural_attempt = st.session_state.user_plural_input.strip()
+                # Allow verifying even if input is blank (to check if it SHOULD be blank)
+                plural_input_ready = True 
+
+                # Verification Button
+                verify_plural_btn = st.button(
+                    "Verify Plural", 
+                    key="verify_plural_btn", 
+                    disabled=not plural_input_ready # Should always be enabled if we reach here
+                )
+
+                if verify_plural_btn:
+                    start_task(
+                        f"Validating plural form in {selected_language}", 'plural',
+                        resources['word_interpreter'].validate_user_plural,
+                        word, user_plural_attempt, selected_language
+                    )
+                    st.rerun()
+
+                # Display Plural Validation Feedback
+                validation_data = st.session_state.get('plural_validation')
+                if validation_data:
+                    plural_validated = True
+                    st.markdown("--- E N D   P L U R A L   V A L I D A T I O N ---")
+                    if not validation_data.get("success", False):
+                        st.error(f"Validation failed: {validation_data.get('ai_reason', 'Unknown API error')}")
+                    else:
+                        user_correct = validation_data.get("user_correct")
+                        ai_status = validation_data.get("ai_status")
+                        ai_form = validation_data.get("ai_plural_form")
+                        ai_article = validation_data.get("ai_plural_article")
+                        ai_reason = validation_data.get("ai_reason")
+
+                        # Display Correct/Incorrect Status
+                        if user_correct:
+                            st.markdown('<span class="status-correct">✓ Correct</span>', unsafe_allow_html=True)
+                        elif user_correct is False:
+                             st.markdown('<span class="status-incorrect">✗ Incorrect</span>', unsafe_allow_html=True)
+                             # Show correction if available
+                             if ai_status == "HAS_PLURAL" and ai_form:
+                                 correction_display = f"{ai_article} {ai_form}".strip() if ai_article else ai_form
+                                 st.markdown(
+                                     f'<div class="correction-box">Suggested: <strong>{correction_display}</strong></div>',
+                                     unsafe_allow_html=True
+                                 )
+                        else:
+                            st.warning("Could not determine correctness.")
+
+                        # Display AI Status and Reason (in target language)
+                        # REMOVED AI STATUS BOX
+                        # if ai_status:
+                        #    st.info(f"AI Analysis Status: {ai_status}")
+                        if ai_reason:
+                            st.markdown(
+                                f'<div class="explanation-box"><strong>Explanation ({selected_language}):</strong> {ai_reason}</div>',
+                                unsafe_allow_html=True
+                            )
+                    st.markdown("--- E N D   P L U R A L   V A L I D A T I O N ---")
+
+            # --- Preview Word with Article (Singular) --- 
+            # Show this preview earlier, after gender is selected
+            if gender_selection_needed and gender:
+                article = GENDER_ARTICLES[selected_language][gender]
+                full_word = f"{article} {word}"
+                st.write(f"Word with article: **{full_word}**")
+            # elif not gender_selection_needed: # Handled by initial word display?
+            #    st.write(f"Word: **{word}**") # Redundant if word is already shown
+
+            # --- Generate Definition Button --- 
+            # Ready if type/gender validation passed AND plural has been validated
+            if can_proceed and plural_validated:
+                if st.button("Generate Definition", key="generate_def_noun"):
+                    # Get validation data again to store
+                    validation_data = st.session_state.plural_validation
+                    ai_status = validation_data.get('ai_status')
+                    ai_plural_form = validation_data.get('ai_plural_form')
+                    ai_plural_article = validation_data.get('ai_plural_article')
+                    user_correct = validation_data.get('user_correct')
+                    ai_reason = validation_data.get('ai_reason')
+                    user_attempt = st.session_state.user_plural_input # Store user's input
+
+                    # Store word data including validation info
+                    word_data = {
+                        "word": word,
+                        "language": selected_language,
+                        "word_type": word_type,
+                        # Plural Info
+                        "user_plural_attempt": user_attempt,
+                        "plural_validation_status": ai_status, 
+                        "plural_user_correct": user_correct,
+                        "plural_ai_form": ai_plural_form,
+                        "plural_ai_article": ai_plural_article,
+                        "plural_ai_reason": ai_reason 
+                    }
+
+                    # Add gender and article 
+                    if selected_language in GENDER_OPTIONS and gender:
+                        word_data.update({
+                            "gender": gender,
+                            "article": GENDER_ARTICLES[selected_language][gender]
+                        })
+
+                    # Determine final plural form/article to use (prefer AI's if available)
+                    final_plural_form = ai_plural_form if ai_status == "HAS_PLURAL" else None
+                    final_plural_article = ai_plural_article if ai_status == "HAS_PLURAL" else None
+
+                    # Store final forms if they exist
+                    if final_plural_form:
+                        word_data["plural_form"] = final_plural_form
+                    if final_plural_article:
+                        word_data["plural_article"] = final_plural_article
+                    elif ai_status == "HAS_PLURAL" and selected_language == "German": # Default German plural article if missing
+                        word_data["plural_article"] = GENDER_ARTICLES[selected_language].get('plural', 'die')
+
+                    # Definition (using the AI-validated plural form if available) and audio of the singular word
+                    start_enrichment(word_data)
+                    st.rerun()
+
+        # Handle VERBS
+        elif word_type == "verb":
+            # Check if language has verb conjugation patterns defined
+            if selected_language in VERB_CONJUGATIONS:
+                conjugation_grid(word, selected_language, word_type)
+
+            # If language doesn't have conjugation patterns, use the default flow
+            elif can_proceed: # Check added here
+                 if st.button("Generate Definition", key="generate_def_verb_simple"):
+                    start_enrichment({
+                        "word": word,
+                        "language": selected_language,
+                        "word_type": word_type
+                    })
+                    st.rerun()
+
+        # Handle other word types (adjectives, adverbs, etc.)
+        else:
+            if can_proceed:
+                 if st.button("Generate Definition", key="generate_def_other"):
+                    start_enrichment({
+                        "word": word,
+                        "language": selected_language,
+                        "word_type": word_type
+                    })
+                    st.rerun()
+
+@st.fragment
+def conjugation_grid(word, selected_language, word_type):
+    """Present tense conjugation inputs with their verification feedback."""
+    # Show conjugation form for present tense
+    st.subheader("Enter Present Tense Conjugations")
+
+    # Create dictionary to store conjugations
+    if 'conjugations' not in st.session_state:
+        st.session_state.conjugations = {}
+
+    # Display form fields for each person/pronoun
+    conjugation_patterns = VERB_CONJUGATIONS[selected_language]["present"]
+    all_conjugations_provided = True
+
+    # Track whether we have verification results to apply styling
+    has_verification = 'conjugation_verification' in st.session_state
+    verification = st.session_state.get('conjugation_verification', {})
+    feedback = verification.get('feedback', {})
+
+    # Use columns for input and feedback
+    with st.container():
+        # Add clear instructions
+        st.info("Enter conjugations for each form, then click 'Verify' to check your answers.")
+
+        # Create a grid layout with headers
+        col1, col2, col3 = st.columns([2, 3, 3])
+        with col1:
+            st.markdown("**Pronoun**")
+        with col2:
+            st.markdown("**Your Conjugation**")
+        with col3:
+            st.markdown("**Status**")
+
+        # Display each conjugation with better visual feedback
+        for pattern in conjugation_patterns:
+            pronoun = pattern["person"]
+            description = pattern["description"]
+
+            # Create a unique key for each input field
+            input_key = f"conj_{selected_language}_{pronoun}"
+
+            # Get feedback for this pronoun if available
+            pronoun_feedback = feedback.get(pronoun, {})
+            is_pronoun_correct = pronoun_feedback.get("is_correct", True)
+
+            # Create a row for this conjugation
+            col1, col2, col3 = st.columns([2, 3, 3])
+
+            with col1:
+                st.write(f"{pronoun}")
+                st.caption(f"{description}")
+
+            with col2:
+                # Regular input field (we'll apply styling via CSS)
+                st.session_state.conjugations[pronoun] = st.text_input(
+                    f"Conjugation for {pronoun}",  # Added descriptive label
+                    value=st.session_state.conjugations.get(pronoun, ""),
+                    key=input_key,
+                    placeholder=f"Conjugation for '{pronoun}'",
+                    label_visibility="collapsed" # Hide the label visually
+                )
+
+            with col3:
+                if has_verification:
+                    if pronoun not in feedback:
+                        st.warning("Verification issue")
+                    elif is_pronoun_correct:
+                        st.success("Correct! ✓")
+                    else:
+                        # Show error and correction
+                        correction = verification.get('corrections', {}).get(pronoun, "")
+                        if correction:
+                            st.error(f"Incorrect ✗")
+                            st.markdown(
+                                f"""<div class="correction-box">
+                                Correct: <strong>{correction}</strong>
+                                </div>""", 
+                                unsafe_allow_html=True
+                            )
+                        else:
+                            st.error(f"Incorrect ✗ (no correction available)")
+
+                    # Show debug info in expander if needed
+                    with st.expander("Technical details"):
+                        if pronoun in feedback:
+                            st.write(f"Raw feedback: {feedback[pronoun].get('message', 'No message')}")
+                        else:
+                            st.write("No feedback available for this pronoun")
+
+            # Check if this conjugation is provided
+            if not st.session_state.conjugations[pronoun]:
+                all_conjugations_provided = False
+
+    # Verification button - always show it, but disable if not all fields filled
+    verify_button = st.button(
+        "Verify Conjugations",
+        disabled=not all_conjugations_provided,
+        help="Fill all conjugation fields to enable verification"
+    )
+
+    if not all_conjugations_provided and not has_verification:
+        st.info("Please complete all conjugation fields to verify.")
+
+    if verify_button:
+        # Clear any previous verification results
+        if 'conjugation_verification' in st.session_state:
+            del st.session_state.conjugation_verification
+
+        # Verify a copy of the conjugations, so later edits don't race the task
+        start_task(
+            "Verifying conjugations with AI", 'conjugations',
+            resources['word_interpreter'].validate_verb_conjugations,
+            word, dict(st.session_state.conjugations), selected_language
+        )
+        st.rerun()
+
+    # If verification was performed, show results summary
+    if has_verification:
+        verification = st.session_state.conjugation_verification
+
+        st.markdown("---")
+
+        if not verification["success"]:
+            st.error("Verification failed - please try again")
+            st.write(f"Error: {verification.get('reason', 'Unknown error')}")
+        elif verification["is_correct"]:
+            st.success("🎉 All conjugations are correct!")
+
+            # Show the overall explanation in a box
+            if verification.get("reason"):
+                st.markdown(
+                    f"""<div class="explanation-box">
+                    <strong>Explanation:</strong> {verification["reason"]}
+                    </div>""", 
+                    unsafe_allow_html=True
+                )
+        else:
+            incorrect_count = len(verification.get("corrections", {}))
+            st.warning(f"⚠️ Found {incorrect_count} incorrect conjugation{'s' if incorrect_count > 1 else ''}. Corrections shown above.")
+
+            # Show the overall explanation in a box
+            if verification.get("reason"):
+                st.markdown(
+                    f"""<div class="explanation-box">
+                    <strong>Explanation:</strong> {verification["reason"]}
+                    </div>""", 
+                    unsafe_allow_html=True
+                )
+
+            # If we have corrections with incomplete feedback, show a special message
+            if any(pronoun not in feedback for pronoun in st.session_state.conjugations):
+                st.info("Some conjugations could not be fully verified. Please check your entries carefully.")
+
+        # Add a "Try again" button to clear verification and try again
+        if st.button("Reset Verification", key="reset_verification"):
+            # Clear verification results but keep entered conjugations
+            if 'conjugation_verification' in st.session_state:
+                del st.session_state.conjugation_verification
+            st.rerun()
+
+        # Button to proceed
+        proceed_label = "Continue with These Conjugations"
+        if st.button(proceed_label):
+            # Store word data with conjugations
+            start_enrichment({
+                "word": word,
+                "language": selected_language,
+                "word_type": word_type,
+                "conjugations": st.session_state.conjugations,
+                "corrections": verification.get("corrections", {})
+            })
+            st.rerun()
+
+@st.fragment
+def sentence_step():
+    """Step 2: definition, pronunciation and sentence input."""
+    st.subheader("Definition")
+    st.write(st.session_state.definition)
+
+    if st.session_state.audio_path:
+        st.subheader("Pronunciation")
+        show_audio(st.session_state.audio_path)
+
+    st.subheader("Create a Sentence")
+    user_sentence = st.text_area("Write a sentence using this word:")
+
+    if user_sentence:
+        if st.button("Check Grammar"):
+            # The result is shown in the preview; then the user is asked about an image (step 3)
+            start_task(
+                "Checking grammar", 'grammar',
+                resources['grammar_checker'].check_grammar,
+                user_sentence,
+                st.session_state.word_data["language"],
+                st.session_state.word_data["word"]
+            )
+            st.rerun()
+
+@st.fragment
+def image_step():
+    """Step 3: image generation and candidate selection."""
+    st.subheader("Generate an Image")
+
+    # Display generated image if available
+    if st.session_state.image_path:
+        show_image(st.session_state.image_path)
+
+    # Let the user choose one of several candidate images
+    candidates = st.session_state.get('image_candidates')
+    if candidates:
+        st.write("**Choose an image:**")
+        candidate_cols = st.columns(len(candidates))
+        for index, (candidate_col, candidate_path) in enumerate(zip(candidate_cols, candidates)):
+            with candidate_col:
+                show_image(candidate_path)
+                if st.button(f"Use Image {index + 1}", key=f"use_candidate_{index}"):
+                    st.session_state.image_path = candidate_path
+                    st.session_state.image_candidates = None
+                    st.rerun()
+
+    # Display the sentence (corrected if needed)
+    sentence = final_sentence()
+
+    st.write(f"**Sentence:** {sentence}")
+
+    generate_image_checkbox = st.checkbox("Generate an image for this sentence?", value=True, key="gen_img_cb")
+
+    if st.session_state.get('image_error'):
+        st.error(st.session_state.image_error)
+
+    if generate_image_checkbox:
+        if st.session_state.get('image_job_id'):
+            # The prediction runs in the background; only its status is polled here
+            image_job_status()
+        else:
+            image_profile = st.radio(
+                "Image mode:",
+                list(IMAGE_GENERATION_PROFILES),
+                index=list(IMAGE_GENERATION_PROFILES).index(DEFAULT_IMAGE_PROFILE),
+                format_func=lambda name: IMAGE_GENERATION_PROFILES[name]["label"],
+                horizontal=True,
+                key="image_profile_select"
+            )
+
+            num_candidates = st.slider(
+                "Number of image options:",
+                min_value=1,
+                max_value=MAX_IMAGE_CANDIDATES,
+                value=DEFAULT_IMAGE_CANDIDATES,
+                key="image_candidates_slider"
+            )
+
+            generate_col, more_col = st.columns([1, 1])
+            with generate_col:
+                generate_clicked = st.button("Generate Image", key="gen_img_btn")
+            with more_col:
+                # A new seed bypasses the image cache to get different options for the same prompt
+                more_clicked = st.button(
+                    "More Options",
+                    key="more_img_btn",
+                    disabled=st.session_state.get('image_prompt_sentence') != sentence
+                )
+
+            if generate_clicked or more_clicked:
+                seed = random.randint(0, 2**32 - 1) if more_clicked else None
+                # Refine the prompt once per sentence and reuse it for every generation
+                if st.session_state.get('image_prompt_sentence') != sentence:
+                    start_task(
+                        "Refining image prompt", 'image_prompt',
+                        resources['prompt_refiner'].refine_prompt,
+                        sentence, st.session_state.word_data["language"],
+                        context={'sentence': sentence, 'profile': image_profile,
+                                 'num_outputs': num_candidates, 'seed': seed}
+                    )
+                else:
+                    start_image_job(st.session_state.image_prompt, image_profile, num_candidates, seed)
+                st.rerun()
+
+            # Re-render only the kept preview in quality, reusing its refined prompt
+            if (st.session_state.image_path and st.session_state.get('image_prompt')
+                    and st.session_state.get('image_profile') != "quality"):
+                if st.button("Regenerate in Quality", key="regen_quality_btn"):
+                    start_image_job(st.session_state.image_prompt, "quality")
+                    st.rerun()
+    else:
+        if st.button("Skip Image Generation", key="skip_img_btn"):
+            cancel_image_job()
+            st.session_state.image_path = None
+            st.session_state.image_candidates = None
+            st.session_state.image_prompt = None
+            st.session_state.image_prompt_sentence = None
+            st.session_state.step = 4
+            st.rerun()
+
+    # Provide a button to continue to card preview once an image is available
+    if st.session_state.image_path:
+        if st.button("Continue to Card Preview", key="continue_to_card_preview"):
+            st.session_state.step = 4
+            st.rerun()
+
+@st.fragment
+def upload_step():
+    """Step 4: compile the card and queue it for upload."""
+    st.subheader("Card Preview and Upload")
+
+    # Compile card data
+    if not st.session_state.card_data:
+        card_compiler = resources['card_compiler']
+
+        sentence = final_sentence()
+
+        st.session_state.card_data = card_compiler.compile_card(
+            st.session_state.word_data,
+            st.session_state.definition,
+            sentence,
+            st.session_state.grammar_check,
+            st.session_state.image_path,
+            st.session_state.audio_path
+        )
+
+    # Select deck (defaults to the target deck chosen in the sidebar)
+    target_deck = st.session_state.get('target_deck')
+    deck_index = st.session_state.decks.index(target_deck) if target_deck in st.session_state.decks else 0
+    selected_deck = st.selectbox("Select Anki Deck:", st.session_state.decks, index=deck_index)
+
+    # Upload button: the card is queued durably and uploaded in the background
+    if st.button("Add to Anki"):
+        upload_outbox = resources['upload_outbox']
+        result = upload_outbox.enqueue(
+            st.session_state.card_data,
+            deck_name=selected_deck
+        )
+
+        if result["success"]:
+            # The outbox keeps its own copy of the card's media
+            resources['media_lifecycle'].discard(st.session_state.session_id, st.session_state.card_data["media_files"])
+            # Flag the word as a duplicate right away, before the deck index is synced again
+            resources['deck_index'].remember(selected_deck, st.session_state.word_data['word'])
+            st.success("Card saved! It will be added to Anki in the background.")
+            if not st.session_state.anki_connected:
+                st.info("Anki is not connected yet; the card will be uploaded once it is.")
+            st.balloons()
+            # Reset for next card after a short delay
+            time.sleep(2)
+            reset_session()
+            st.rerun()
+        else:
+            st.error(f"Failed to save card: {result['error']}")
+
+@st.fragment
+def card_preview():
+    """Preview of the card as far as it has been created."""
+    # Display card preview based on current step
+    if st.session_state.step >= 1 and st.session_state.word_data:
+        wd = st.session_state.word_data
+        st.subheader("Front")
+
+        # Word with article if applicable
+        word_display = wd['word']
+        if wd.get("word_type") == "noun" and "article" in wd:
+             word_display = f"{wd['article']} {wd['word']}"
+        elif wd.get("word_type") == "verb":
+             # Maybe add infinitive marker later?
+             pass 
+
+        st.markdown(f"### {word_display}")
+
+        # Audio player (available from step 2 onwards technically, but word_data exists earlier)
+        if st.session_state.audio_path:
+            show_audio(st.session_state.audio_path)
+
+        # Image (available from step 4 onwards)
+        if st.session_state.image_path and st.session_state.step >= 4: # Show image later
+            if not show_image(st.session_state.image_path):
+                st.warning("Preview image file not found. It might have been cleared.")
+
+        # Back of card (available from step 2 onwards)
+        if st.session_state.step >= 2:
+            st.subheader("Back")
+
+            # Definition
+            if st.session_state.definition:
+                st.markdown("**Definition:**")
+                st.write(st.session_state.definition)
+
+            # Sentence (available from step 3 onwards)
+            if st.session_state.step >= 3 and st.session_state.grammar_check:
+                gc = st.session_state.grammar_check
+                st.markdown("**Example Sentence:**")
+                st.write(final_sentence())
+
+                # Grammar note
+                if not gc.get("is_correct"):
+                    st.markdown("**Grammar Note:**")
+                    st.write(gc.get("explanation", ""))
+
+            # Word metadata (updated for new plural info)
+            if wd.get("word_type") == "noun":
+                 st.markdown("**Word Information:**")
+                 if "gender" in wd:
+                     st.write(f"Gender: {wd.get('gender', 'N/A')}")
+
+                 # Updated plural display logic based on validation
+                 p_status = wd.get("plural_validation_status")
+                 if p_status == "HAS_PLURAL":
+                     # Display the AI-confirmed plural form and article
+                     p_form = wd.get("plural_ai_form", "N/A") 
+                     p_article = wd.get("plural_ai_article", "") 
+                     # Use stored final article/form if available
+                     if "plural_form" in wd:
+                         p_form = wd["plural_form"]
+                     if "plural_article" in wd:
+                         p_article = wd["plural_article"]
+
+                     plural_display = f"{p_article} {p_form}".strip()
+                     st.write(f"Plural: {plural_display}")
+                 elif p_status == "NO_PLURAL":
+                     st.write("Plural: None (typically)")
+                 elif p_status == "ALREADY_PLURAL":
+                     st.write("Plural: Already plural or uncountable")
+                 else:
+                     # Check if validation was even done
+                     if wd.get("user_plural_attempt") is not None: # Check if attempt was made
+                         st.write(f"Plural: Status unknown (User attempt: {wd.get('user_plural_attempt')})")
+                     else:
+                         st.write("Plural: Not determined")
+
+
 def main():
+    # Record activity and the files the session needs, enforcing its media quota
+    resources['media_lifecycle'].touch(st.session_state.session_id, session_media())
+    
     st.title("AnkiForge")
     st.subheader("AI-powered flashcard creator for language learning")
     
@@ -187,6 +1244,8 @@ def main():
     with st.sidebar:
         st.header("Settings")
         selected_language = st.selectbox("Target Language", SUPPORTED_LANGUAGES, index=SUPPORTED_LANGUAGES.index(DEFAULT_LANGUAGE))
+        mode = st.radio("Mode", ["Single card", "Queue"], key="mode",
+                        help="Queue: enter several words and write sentences while the rest is generated in the background")
         
         # Check Anki connection
         if st.button("Check Anki Connection"):
@@ -197,11 +1256,33 @@ def main():
                     st.error("Could not connect to Anki MCP Server. Make sure it's installed and running.")
                     st.info("See instructions below for setting up anki-mcp-server.")
         
-        # Display connection status
+        # Display connection status (kept up to date by the background heartbeat)
+        check_anki_connection(probe=False)
         if st.session_state.anki_connected:
             st.success("✅ Connected to Anki")
         else:
             st.warning("❌ Not connected to Anki")
+            health_state = resources['anki_health'].state()
+            if health_state['retry_at']:
+                st.caption(f"Retrying in {max(0, int(health_state['retry_at'] - time.monotonic()))}s")
+        
+        # Target deck (chosen up front so duplicates can be detected before generating anything)
+        st.selectbox("Target Deck", st.session_state.decks, key="target_deck")
+        
+        # Upload queue status
+        outbox_status = resources['upload_outbox'].status()
+        if outbox_status["pending"]:
+            st.info(f"⏳ {outbox_status['pending']} card(s) waiting to be uploaded")
+            if outbox_status["last_error"]:
+                st.caption(f"Last error: {outbox_status['last_error']}")
+        if outbox_status["failed"]:
+            st.error(f"{outbox_status['failed']} card(s) were rejected by Anki")
+            with st.expander("Rejected cards"):
+                for entry in resources['upload_outbox'].failed_entries():
+                    st.write(f"**{entry['deck_name']}**: {entry['error']}")
+            if st.button("Retry Rejected Cards"):
+                resources['upload_outbox'].retry_failed()
+                st.rerun()
         
         # Instructions for anki-mcp-server
         with st.expander("Anki MCP Server Setup"):
@@ -227,764 +1308,37 @@ def main():
             reset_session()
             st.rerun()
     
+    if mode == "Queue":
+        st.header("Review Queue")
+        queue_mode(selected_language)
+        return
+    
     # Main workflow
     col1, col2 = st.columns([1, 1])
     
     with col1:
         st.header("Create New Flashcard")
         
-        # Step 1: Word Input
-        if st.session_state.step == 1:
-            word = st.text_input("Enter a word in the target language:")
-            
-            if word:
-                # --- Word Type and Initial Gender Selection --- 
-                # Use callbacks to reset dependent states when type/gender changes
-                def reset_dependent_states():
-                    st.session_state.type_gender_validation = None
-                    st.session_state.plural_validation = None
-                    st.session_state.user_plural_input = ""
-                
-                word_type = st.selectbox(
-                    "Select word type:", 
-                    WORD_TYPES[selected_language],
-                    key="word_type_select",
-                    on_change=reset_dependent_states
-                )
-                
-                gender = None
-                gender_selection_needed = selected_language in GENDER_OPTIONS and word_type == "noun"
-                if gender_selection_needed:
-                     gender = st.selectbox(
-                         "Select gender:", 
-                         GENDER_OPTIONS[selected_language], 
-                         index=None, 
-                         placeholder="Select gender...",
-                         key="gender_select",
-                         on_change=reset_dependent_states # Reset if gender changes too
-                     )
-                
-                # --- Type/Gender Validation --- 
-                type_gender_validated = False
-                type_gender_correct = False
-                # Check if ready for type/gender validation (word, type selected, gender selected if needed)
-                ready_for_type_gender_validation = bool(word and word_type and (gender is not None if gender_selection_needed else True))
-                
-                if ready_for_type_gender_validation:
-                    if st.button("Validate Word Info", key="validate_type_gender_btn"):
-                         with st.spinner(f"Validating type/gender for '{word}'..."):
-                             word_interpreter = resources['word_interpreter']
-                             validation_result = word_interpreter.validate_word_type_gender(
-                                 word, selected_language, word_type, gender
-                             )
-                             st.session_state.type_gender_validation = validation_result
-                             st.rerun()
-                            
-                    # Display Type/Gender Validation Feedback
-                    tg_validation = st.session_state.get('type_gender_validation')
-                    if tg_validation:
-                        type_gender_validated = True
-                        st.markdown("--- T Y P E / G E N D E R   V A L I D A T I O N ---")
-                        if not tg_validation.get("success", False):
-                             st.error(f"Validation failed: {tg_validation.get('reason', 'Unknown API error')}")
-                             # Allow proceeding even if validation fails, but maybe flag it?
-                             type_gender_correct = False # Treat failure as incorrect for blocking
-                        else:
-                            is_type_ok = tg_validation.get("is_type_correct")
-                            is_gender_ok = tg_validation.get("is_gender_correct")
-                            ai_type = tg_validation.get("ai_word_type")
-                            ai_gender = tg_validation.get("ai_gender")
-                            ai_reason = tg_validation.get("reason")
-                            
-                            # Determine overall correctness for blocking
-                            if gender_selection_needed:
-                                type_gender_correct = is_type_ok and is_gender_ok
-                            else:
-                                type_gender_correct = is_type_ok # Only type matters
-                                
-                            # Display feedback
-                            if type_gender_correct:
-                                st.success("✓ Word Type & Gender seem correct!")
-                            else:
-                                st.warning("Potential issue with Word Type or Gender:")
-                                if not is_type_ok:
-                                     st.error(f"Word Type: Incorrect. AI suggests: **{ai_type}**")
-                                else:
-                                     st.success("Word Type: Correct")
-                                    
-                                if gender_selection_needed:
-                                    if not is_gender_ok:
-                                         st.error(f"Gender: Incorrect. AI suggests: **{ai_gender or 'N/A'}**")
-                                    else:
-                                        st.success("Gender: Correct")
-                           
-                            # Display AI reason
-                            if ai_reason:
-                                st.markdown(
-                                    f'<div class="explanation-box"><strong>Reason:</strong> {ai_reason}</div>',
-                                    unsafe_allow_html=True
-                                )
-                        st.markdown("--- E N D   T Y P E / G E N D E R   V A L I D A T I O N ---")
-                else:
-                    # If not ready for validation, ensure validation state is clear
-                    st.session_state.type_gender_validation = None
-
-                # Determine if we can proceed to the next input stage (plural/conjugations/definition)
-                # Requires word input AND successful type/gender validation
-                can_proceed = bool(word and type_gender_validated and type_gender_correct)
-                
-                if not word:
-                     st.info("Please enter a word to begin.")
-                elif not ready_for_type_gender_validation:
-                     st.info("Please select word type (and gender if applicable) to proceed.")
-                elif not type_gender_validated:
-                     st.info("Please validate the Word Type/Gender information before proceeding.")
-                elif not type_gender_correct:
-                     st.error("Please correct the Word Type/Gender based on the validation feedback before proceeding.")
-                
-                # --- NOUN Specific Handling (Plural) --- 
-                if word_type == "noun":
-                    # --- User Plural Input & Validation --- 
-                    plural_input_ready = False
-                    plural_validated = False
-                    
-                    # Only show plural input if type/gender validation passed
-                    if can_proceed:
-                        st.subheader("Plural Information") # Add subheader
-                        st.session_state.user_plural_input = st.text_input(
-                            "Enter your guess for the plural form (leave blank if none):",
-                            value=st.session_state.user_plural_input,
-                            key="user_plural_input_field",
-                            on_change=lambda: st.session_state.update(plural_validation=None) 
-                        )
-                        
-                        user_plural_attempt = st.session_state.user_plural_input.strip()
-                        # Allow verifying even if input is blank (to check if it SHOULD be blank)
-                        plural_input_ready = True 
-
-                        # Verification Button
-                        verify_plural_btn = st.button(
-                            "Verify Plural", 
-                            key="verify_plural_btn", 
-                            disabled=not plural_input_ready # Should always be enabled if we reach here
-                        )
-
-                        if verify_plural_btn:
-                            with st.spinner(f"Validating plural form in {selected_language}..."):
-                                word_interpreter = resources['word_interpreter']
-                                validation_result = word_interpreter.validate_user_plural(
-                                    word, user_plural_attempt, selected_language
-                                )
-                                st.session_state.plural_validation = validation_result
-                                st.rerun()
-                        
-                        # Display Plural Validation Feedback
-                        validation_data = st.session_state.get('plural_validation')
-                        if validation_data:
-                            plural_validated = True
-                            st.markdown("--- E N D   P L U R A L   V A L I D A T I O N ---")
-                            if not validation_data.get("success", False):
-                                st.error(f"Validation failed: {validation_data.get('ai_reason', 'Unknown API error')}")
-                            else:
-                                user_correct = validation_data.get("user_correct")
-                                ai_status = validation_data.get("ai_status")
-                                ai_form = validation_data.get("ai_plural_form")
-                                ai_article = validation_data.get("ai_plural_article")
-                                ai_reason = validation_data.get("ai_reason")
-                                
-                                # Display Correct/Incorrect Status
-                                if user_correct:
-                                    st.markdown('<span class="status-correct">✓ Correct</span>', unsafe_allow_html=True)
-                                elif user_correct is False:
-                                     st.markdown('<span class="status-incorrect">✗ Incorrect</span>', unsafe_allow_html=True)
-                                     # Show correction if available
-                                     if ai_status == "HAS_PLURAL" and ai_form:
-                                         correction_display = f"{ai_article} {ai_form}".strip() if ai_article else ai_form
-                                         st.markdown(
-                                             f'<div class="correction-box">Suggested: <strong>{correction_display}</strong></div>',
-                                             unsafe_allow_html=True
-                                         )
-                                else:
-                                    st.warning("Could not determine correctness.")
-
-                                # Display AI Status and Reason (in target language)
-                                # REMOVED AI STATUS BOX
-                                # if ai_status:
-                                #    st.info(f"AI Analysis Status: {ai_status}")
-                                if ai_reason:
-                                    st.markdown(
-                                        f'<div class="explanation-box"><strong>Explanation ({selected_language}):</strong> {ai_reason}</div>',
-                                        unsafe_allow_html=True
-                                    )
-                            st.markdown("--- E N D   P L U R A L   V A L I D A T I O N ---")
-
-                    # --- Preview Word with Article (Singular) --- 
-                    # Show this preview earlier, after gender is selected
-                    if gender_selection_needed and gender:
-                        article = GENDER_ARTICLES[selected_language][gender]
-                        full_word = f"{article} {word}"
-                        st.write(f"Word with article: **{full_word}**")
-                    # elif not gender_selection_needed: # Handled by initial word display?
-                    #    st.write(f"Word: **{word}**") # Redundant if word is already shown
-
-                    # --- Generate Definition Button --- 
-                    # Ready if type/gender validation passed AND plural has been validated
-                    if can_proceed and plural_validated:
-                        if st.button("Generate Definition", key="generate_def_noun"):
-                            with st.spinner("Generating definition..."):
-                                # Get validation data again to store
-                                validation_data = st.session_state.plural_validation
-                                ai_status = validation_data.get('ai_status')
-                                ai_plural_form = validation_data.get('ai_plural_form')
-                                ai_plural_article = validation_data.get('ai_plural_article')
-                                user_correct = validation_data.get('user_correct')
-                                ai_reason = validation_data.get('ai_reason')
-                                user_attempt = st.session_state.user_plural_input # Store user's input
-
-                                # Store word data including validation info
-                                word_data = {
-                                    "word": word,
-                                    "language": selected_language,
-                                    "word_type": word_type,
-                                    # Plural Info
-                                    "user_plural_attempt": user_attempt,
-                                    "plural_validation_status": ai_status, 
-                                    "plural_user_correct": user_correct,
-                                    "plural_ai_form": ai_plural_form,
-                                    "plural_ai_article": ai_plural_article,
-                                    "plural_ai_reason": ai_reason 
-                                }
-                                
-                                # Add gender and article 
-                                if selected_language in GENDER_OPTIONS and gender:
-                                    word_data.update({
-                                        "gender": gender,
-                                        "article": GENDER_ARTICLES[selected_language][gender]
-                                    })
-                                
-                                # Determine final plural form/article to use (prefer AI's if available)
-                                final_plural_form = ai_plural_form if ai_status == "HAS_PLURAL" else None
-                                final_plural_article = ai_plural_article if ai_status == "HAS_PLURAL" else None
-                                
-                                # Store final forms if they exist
-                                if final_plural_form:
-                                    word_data["plural_form"] = final_plural_form
-                                if final_plural_article:
-                                    word_data["plural_article"] = final_plural_article
-                                elif ai_status == "HAS_PLURAL" and language == "German": # Default German plural article if missing
-                                    word_data["plural_article"] = GENDER_ARTICLES[selected_language].get('plural', 'die')
-                                        
-                                st.session_state.word_data = word_data
-                                
-                                # Generate definition using the AI-validated plural form if available
-                                word_interpreter = resources['word_interpreter']
-                                definition = word_interpreter.generate_definition(
-                                    word,
-                                    selected_language,
-                                    word_type,
-                                    gender=gender,
-                                    plural_form=final_plural_form 
-                                )
-                                st.session_state.definition = definition
-                                
-                                # Fetch audio (use singular word)
-                                audio_fetcher = resources['audio_fetcher']
-                                audio_file = os.path.join(st.session_state.temp_dir, f"{word}.mp3")
-                                audio_result = audio_fetcher.get_audio(
-                                    word, selected_language, audio_file, definition
-                                )
-                                
-                                if audio_result["success"]:
-                                    st.session_state.audio_path = audio_result.get("audio_path")
-                                
-                                # Move to next step
-                                st.session_state.step = 2
-                                st.rerun()
-                
-                # Handle VERBS
-                elif word_type == "verb":
-                    # Check if language has verb conjugation patterns defined
-                    if selected_language in VERB_CONJUGATIONS:
-                        # Show conjugation form for present tense
-                        st.subheader("Enter Present Tense Conjugations")
-                        
-                        # Create dictionary to store conjugations
-                        if 'conjugations' not in st.session_state:
-                            st.session_state.conjugations = {}
-                        
-                        # Display form fields for each person/pronoun
-                        conjugation_patterns = VERB_CONJUGATIONS[selected_language]["present"]
-                        all_conjugations_provided = True
-                        
-                        # Track whether we have verification results to apply styling
-                        has_verification = 'conjugation_verification' in st.session_state
-                        verification = st.session_state.get('conjugation_verification', {})
-                        feedback = verification.get('feedback', {})
-                        
-                        # Use columns for input and feedback
-                        with st.container():
-                            # Add clear instructions
-                            st.info("Enter conjugations for each form, then click 'Verify' to check your answers.")
-                            
-                            # Create a grid layout with headers
-                            col1, col2, col3 = st.columns([2, 3, 3])
-                            with col1:
-                                st.markdown("**Pronoun**")
-                            with col2:
-                                st.markdown("**Your Conjugation**")
-                            with col3:
-                                st.markdown("**Status**")
-                            
-                            # Display each conjugation with better visual feedback
-                            for pattern in conjugation_patterns:
-                                pronoun = pattern["person"]
-                                description = pattern["description"]
-                                
-                                # Create a unique key for each input field
-                                input_key = f"conj_{selected_language}_{pronoun}"
-                                
-                                # Get feedback for this pronoun if available
-                                pronoun_feedback = feedback.get(pronoun, {})
-                                is_pronoun_correct = pronoun_feedback.get("is_correct", True)
-                                
-                                # Create a row for this conjugation
-                                col1, col2, col3 = st.columns([2, 3, 3])
-                                
-                                with col1:
-                                    st.write(f"{pronoun}")
-                                    st.caption(f"{description}")
-                                
-                                with col2:
-                                    # Regular input field (we'll apply styling via CSS)
-                                    st.session_state.conjugations[pronoun] = st.text_input(
-                                        f"Conjugation for {pronoun}",  # Added descriptive label
-                                        value=st.session_state.conjugations.get(pronoun, ""),
-                                        key=input_key,
-                                        placeholder=f"Conjugation for '{pronoun}'",
-                                        label_visibility="collapsed" # Hide the label visually
-                                    )
-                                
-                                with col3:
-                                    if has_verification:
-                                        if pronoun not in feedback:
-                                            st.warning("Verification issue")
-                                        elif is_pronoun_correct:
-                                            st.success("Correct! ✓")
-                                        else:
-                                            # Show error and correction
-                                            correction = verification.get('corrections', {}).get(pronoun, "")
-                                            if correction:
-                                                st.error(f"Incorrect ✗")
-                                                st.markdown(
-                                                    f"""<div class="correction-box">
-                                                    Correct: <strong>{correction}</strong>
-                                                    </div>""", 
-                                                    unsafe_allow_html=True
-                                                )
-                                            else:
-                                                st.error(f"Incorrect ✗ (no correction available)")
-                                        
-                                        # Show debug info in expander if needed
-                                        with st.expander("Technical details"):
-                                            if pronoun in feedback:
-                                                st.write(f"Raw feedback: {feedback[pronoun].get('message', 'No message')}")
-                                            else:
-                                                st.write("No feedback available for this pronoun")
-                                
-                                # Check if this conjugation is provided
-                                if not st.session_state.conjugations[pronoun]:
-                                    all_conjugations_provided = False
-                        
-                        # Verification button - always show it, but disable if not all fields filled
-                        verify_button = st.button(
-                            "Verify Conjugations",
-                            disabled=not all_conjugations_provided,
-                            help="Fill all conjugation fields to enable verification"
-                        )
-                        
-                        if not all_conjugations_provided and not has_verification:
-                            st.info("Please complete all conjugation fields to verify.")
-                        
-                        if verify_button:
-                            with st.spinner("Verifying conjugations with AI..."):
-                                # Clear any previous verification results
-                                if 'conjugation_verification' in st.session_state:
-                                    del st.session_state.conjugation_verification
-                                
-                                # Prepare conjugations data for validation
-                                conjugations_data = st.session_state.conjugations
-                                
-                                # Call API to verify
-                                word_interpreter = resources['word_interpreter']
-                                verification = word_interpreter.validate_verb_conjugations(
-                                    word, conjugations_data, selected_language
-                                )
-                                
-                                # Store verification result
-                                st.session_state.conjugation_verification = verification
-                                
-                                # Force a rerun to update UI with new verification results
-                                st.rerun()
-                        
-                        # If verification was performed, show results summary
-                        if has_verification:
-                            verification = st.session_state.conjugation_verification
-                            
-                            st.markdown("---")
-                            
-                            if not verification["success"]:
-                                st.error("Verification failed - please try again")
-                                st.write(f"Error: {verification.get('reason', 'Unknown error')}")
-                            elif verification["is_correct"]:
-                                st.success("🎉 All conjugations are correct!")
-                                
-                                # Show the overall explanation in a box
-                                if verification.get("reason"):
-                                    st.markdown(
-                                        f"""<div class="explanation-box">
-                                        <strong>Explanation:</strong> {verification["reason"]}
-                                        </div>""", 
-                                        unsafe_allow_html=True
-                                    )
-                            else:
-                                incorrect_count = len(verification.get("corrections", {}))
-                                st.warning(f"⚠️ Found {incorrect_count} incorrect conjugation{'s' if incorrect_count > 1 else ''}. Corrections shown above.")
-                                
-                                # Show the overall explanation in a box
-                                if verification.get("reason"):
-                                    st.markdown(
-                                        f"""<div class="explanation-box">
-                                        <strong>Explanation:</strong> {verification["reason"]}
-                                        </div>""", 
-                                        unsafe_allow_html=True
-                                    )
-                                    
-                                # If we have corrections with incomplete feedback, show a special message
-                                if any(pronoun not in feedback for pronoun in st.session_state.conjugations):
-                                    st.info("Some conjugations could not be fully verified. Please check your entries carefully.")
-                            
-                            # Add a "Try again" button to clear verification and try again
-                            if st.button("Reset Verification", key="reset_verification"):
-                                # Clear verification results but keep entered conjugations
-                                if 'conjugation_verification' in st.session_state:
-                                    del st.session_state.conjugation_verification
-                                st.rerun()
-                            
-                            # Button to proceed
-                            proceed_label = "Continue with These Conjugations"
-                            if st.button(proceed_label):
-                                with st.spinner("Generating definition..."):
-                                    # Store word data with conjugations
-                                    st.session_state.word_data = {
-                                        "word": word,
-                                        "language": selected_language,
-                                        "word_type": word_type,
-                                        "conjugations": st.session_state.conjugations,
-                                        "corrections": verification.get("corrections", {})
-                                    }
-                                    
-                                    # Generate definition
-                                    word_interpreter = resources['word_interpreter']
-                                    definition = word_interpreter.generate_definition(
-                                        word, selected_language, word_type
-                                    )
-                                    st.session_state.definition = definition
-                                    
-                                    # Fetch audio
-                                    audio_fetcher = resources['audio_fetcher']
-                                    audio_file = os.path.join(st.session_state.temp_dir, f"{word}.mp3")
-                                    audio_result = audio_fetcher.get_audio(
-                                        word, selected_language, audio_file, definition
-                                    )
-                                    
-                                    if audio_result["success"]:
-                                        st.session_state.audio_path = audio_result.get("audio_path")
-                                    
-                                    # Move to next step
-                                    st.session_state.step = 2
-                                    st.rerun()
-                    
-                    # If language doesn't have conjugation patterns, use the default flow
-                    elif can_proceed: # Check added here
-                         if st.button("Generate Definition", key="generate_def_verb_simple"):
-                            with st.spinner("Generating definition..."):
-                                # Store word data
-                                st.session_state.word_data = {
-                                    "word": word,
-                                    "language": selected_language,
-                                    "word_type": word_type
-                                }
-                                
-                                # Generate definition
-                                word_interpreter = resources['word_interpreter']
-                                definition = word_interpreter.generate_definition(
-                                    word, selected_language, word_type
-                                )
-                                st.session_state.definition = definition
-                                
-                                # Fetch audio
-                                audio_fetcher = resources['audio_fetcher']
-                                audio_file = os.path.join(st.session_state.temp_dir, f"{word}.mp3")
-                                audio_result = audio_fetcher.get_audio(
-                                    word, selected_language, audio_file, definition
-                                )
-                                
-                                if audio_result["success"]:
-                                    st.session_state.audio_path = audio_result.get("audio_path")
-                                
-                                # Move to next step
-                                st.session_state.step = 2
-                                st.rerun()
-                
-                # Handle other word types (adjectives, adverbs, etc.)
-                else:
-                    if can_proceed:
-                         if st.button("Generate Definition", key="generate_def_other"):
-                            with st.spinner("Generating definition..."):
-                                # Store word data
-                                st.session_state.word_data = {
-                                    "word": word,
-                                    "language": selected_language,
-                                    "word_type": word_type
-                                }
-                                
-                                # Generate definition
-                                word_interpreter = resources['word_interpreter']
-                                definition = word_interpreter.generate_definition(
-                                    word, selected_language, word_type
-                                )
-                                st.session_state.definition = definition
-                                
-                                # Fetch audio
-                                audio_fetcher = resources['audio_fetcher']
-                                audio_file = os.path.join(st.session_state.temp_dir, f"{word}.mp3")
-                                audio_result = audio_fetcher.get_audio(
-                                    word, selected_language, audio_file, definition
-                                )
-                                
-                                if audio_result["success"]:
-                                    st.session_state.audio_path = audio_result.get("audio_path")
-                                
-                                # Move to next step
-                                st.session_state.step = 2
-                                st.rerun()
+        # Progress of the session's background task, if any (only polled while one runs)
+        if st.session_state.get('task_job_id'):
+            task_status()
+        if st.session_state.get('task_error'):
+            st.error(f"Error: {st.session_state.task_error}")
         
-        # Step 2: Sentence Input and Grammar Check
+        # Each step is a fragment: its widgets rerun only the step, not the whole page.
+        # Steps advance with a full rerun (st.rerun), which also refreshes the preview.
+        if st.session_state.step == 1:
+            word_input_step(selected_language)
         elif st.session_state.step == 2:
-            st.subheader("Definition")
-            st.write(st.session_state.definition)
-            
-            if st.session_state.audio_path:
-                st.subheader("Pronunciation")
-                st.markdown(get_audio_html(st.session_state.audio_path), unsafe_allow_html=True)
-            
-            st.subheader("Create a Sentence")
-            user_sentence = st.text_area("Write a sentence using this word:")
-            
-            if user_sentence:
-                if st.button("Check Grammar"):
-                    with st.spinner("Checking grammar..."):
-                        # Check grammar
-                        grammar_checker = resources['grammar_checker']
-                        grammar_check = grammar_checker.check_grammar(
-                            user_sentence, 
-                            st.session_state.word_data["language"],
-                            st.session_state.word_data["word"]
-                        )
-                        st.session_state.grammar_check = grammar_check
-                        
-                        # Display grammar check results
-                        if grammar_check["is_correct"]:
-                            st.success("Your sentence is grammatically correct! ✓")
-                        else:
-                            st.warning("Grammar issues found:")
-                            st.write(f"**Corrected sentence:** {grammar_check['corrected_sentence']}")
-                            st.write(f"**Explanation:** {grammar_check['explanation']}")
-                        
-                        # Ask if user wants to generate an image
-                        st.session_state.step = 3
-                        st.rerun()
-        
-        # Step 3: Image Generation
+            sentence_step()
         elif st.session_state.step == 3:
-            st.subheader("Generate an Image")
-            
-            # Display generated image if available
-            if st.session_state.image_path:
-                st.image(Image.open(st.session_state.image_path), use_column_width=True)
-
-            # Display the sentence (corrected if needed)
-            if st.session_state.grammar_check["is_correct"]:
-                sentence = st.session_state.grammar_check.get("sentence", "")
-            else:
-                sentence = st.session_state.grammar_check.get("corrected_sentence", "")
-            
-            st.write(f"**Sentence:** {sentence}")
-            
-            generate_image_checkbox = st.checkbox("Generate an image for this sentence?", value=True, key="gen_img_cb")
-            
-            if generate_image_checkbox:
-                if st.button("Generate Image", key="gen_img_btn"):
-                    with st.spinner("Generating image... This may take a minute."):
-                        # Refine prompt and generate image
-                        prompt_refiner = resources['prompt_refiner']
-                        language = st.session_state.word_data["language"]
-                        refined_prompt = prompt_refiner.refine_prompt(sentence, language)
-                        st.session_state.image_prompt = refined_prompt
-                        image_generator = resources['image_generator']
-                        timestamp = int(time.time())
-                        safe_word = "".join(c for c in st.session_state.word_data['word'] if c.isalnum() or c in (' ', '_')).rstrip()
-                        image_filename = f"ankiforge_{safe_word}_{timestamp}.png"
-                        image_file = os.path.join(st.session_state.temp_dir, image_filename)
-                        image_result = image_generator.generate_image(refined_prompt, save_path=image_file)
-                        if image_result["success"]:
-                            st.session_state.image_path = image_result.get("image_path")
-                            # Automatically proceed to card preview after image generation
-                            st.session_state.step = 4
-                        # After generating, show image and allow user to proceed
-                        st.rerun()
-            else:
-                if st.button("Skip Image Generation", key="skip_img_btn"):
-                    st.session_state.image_path = None
-                    st.session_state.image_prompt = None
-                    st.session_state.step = 4
-                    st.rerun()
-            
-            # Provide a button to continue to card preview once an image is available
-            if st.session_state.image_path:
-                if st.button("Continue to Card Preview", key="continue_to_card_preview"):
-                    st.session_state.step = 4
-                    st.rerun()
-        
-        # Step 4: Card Preview and Upload
+            image_step()
         elif st.session_state.step == 4:
-            st.subheader("Card Preview and Upload")
-            
-            # Compile card data
-            if not st.session_state.card_data:
-                card_compiler = resources['card_compiler']
-                
-                # Get the final sentence
-                if st.session_state.grammar_check["is_correct"]:
-                    sentence = st.session_state.grammar_check.get("sentence", "")
-                else:
-                    sentence = st.session_state.grammar_check.get("corrected_sentence", "")
-                
-                st.session_state.card_data = card_compiler.compile_card(
-                    st.session_state.word_data,
-                    st.session_state.definition,
-                    sentence,
-                    st.session_state.grammar_check,
-                    st.session_state.image_path,
-                    st.session_state.audio_path
-                )
-            
-            # Select deck
-            selected_deck = st.selectbox("Select Anki Deck:", st.session_state.decks)
-            
-            # Upload button
-            if st.button("Add to Anki"):
-                if not st.session_state.anki_connected:
-                    st.error("Not connected to Anki. Please check the connection first.")
-                else:
-                    with st.spinner("Adding card to Anki..."):
-                        anki_uploader = resources['anki_uploader']
-                        result = anki_uploader.upload_card(
-                            st.session_state.card_data,
-                            deck_name=selected_deck
-                        )
-                        
-                        if result["success"]:
-                            st.success(f"Card successfully added to Anki! Card ID: {result['card_id']}")
-                            st.balloons()
-                            # Reset for next card after a short delay
-                            time.sleep(2)
-                            reset_session()
-                            st.rerun()
-                        else:
-                            st.error(f"Failed to add card to Anki: {result['error']}")
-                            st.info("Make sure Anki and anki-mcp-server are running.")
+            upload_step()
     
     with col2:
         st.header("Card Preview")
-        
-        # Display card preview based on current step
-        if st.session_state.step >= 1 and st.session_state.word_data:
-            wd = st.session_state.word_data
-            st.subheader("Front")
-            
-            # Word with article if applicable
-            word_display = wd['word']
-            if wd.get("word_type") == "noun" and "article" in wd:
-                 word_display = f"{wd['article']} {wd['word']}"
-            elif wd.get("word_type") == "verb":
-                 # Maybe add infinitive marker later?
-                 pass 
-                
-            st.markdown(f"### {word_display}")
-            
-            # Audio player (available from step 2 onwards technically, but word_data exists earlier)
-            if st.session_state.audio_path:
-                st.markdown(get_audio_html(st.session_state.audio_path), unsafe_allow_html=True)
-            
-            # Image (available from step 4 onwards)
-            if st.session_state.image_path and st.session_state.step >= 4: # Show image later
-                try:
-                    st.image(Image.open(st.session_state.image_path), use_column_width=True)
-                except FileNotFoundError:
-                    st.warning("Preview image file not found. It might have been cleared.")
-            
-            # Back of card (available from step 2 onwards)
-            if st.session_state.step >= 2:
-                st.subheader("Back")
-                
-                # Definition
-                if st.session_state.definition:
-                    st.markdown("**Definition:**")
-                    st.write(st.session_state.definition)
-                
-                # Sentence (available from step 3 onwards)
-                if st.session_state.step >= 3 and st.session_state.grammar_check:
-                    gc = st.session_state.grammar_check
-                    st.markdown("**Example Sentence:**")
-                    sentence_to_display = gc.get("corrected_sentence") if not gc.get("is_correct") else gc.get("sentence", "")
-                    st.write(sentence_to_display)
-                    
-                    # Grammar note
-                    if not gc.get("is_correct"):
-                        st.markdown("**Grammar Note:**")
-                        st.write(gc.get("explanation", ""))
-                
-                # Word metadata (updated for new plural info)
-                if wd.get("word_type") == "noun":
-                     st.markdown("**Word Information:**")
-                     if "gender" in wd:
-                         st.write(f"Gender: {wd.get('gender', 'N/A')}")
-                     
-                     # Updated plural display logic based on validation
-                     p_status = wd.get("plural_validation_status")
-                     if p_status == "HAS_PLURAL":
-                         # Display the AI-confirmed plural form and article
-                         p_form = wd.get("plural_ai_form", "N/A") 
-                         p_article = wd.get("plural_ai_article", "") 
-                         # Use stored final article/form if available
-                         if "plural_form" in wd:
-                             p_form = wd["plural_form"]
-                         if "plural_article" in wd:
-                             p_article = wd["plural_article"]
-                         
-                         plural_display = f"{p_article} {p_form}".strip()
-                         st.write(f"Plural: {plural_display}")
-                     elif p_status == "NO_PLURAL":
-                         st.write("Plural: None (typically)")
-                     elif p_status == "ALREADY_PLURAL":
-                         st.write("Plural: Already plural or uncountable")
-                     else:
-                         # Check if validation was even done
-                         if wd.get("user_plural_attempt") is not None: # Check if attempt was made
-                             st.write(f"Plural: Status unknown (User attempt: {wd.get('user_plural_attempt')})")
-                         else:
-                             st.write("Plural: Not determined")
+        card_preview()
 
 if __name__ == "__main__":
     main()
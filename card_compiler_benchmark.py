@@ -0,0 +1,62 @@
+"""
+Microbenchmark for CardCompiler: compiles a large batch of noun and verb cards
+and reports throughput and average card size.
+
+Usage:
+    python card_compiler_benchmark.py [number_of_cards]
+"""
+import sys
+import time
+from itertools import islice, cycle
+from utils.card_compiler import CardCompiler
+
+NOUN_CARD = {
+    "word_data": {
+        "word": "Hund",
+        "language": "German",
+        "word_type": "noun",
+        "gender": "masculine",
+        "article": "der",
+        "plural_form": "Hunde",
+        "plural_article": "die"
+    },
+    "definition": "Ein Hund ist ein domestiziertes Säugetier aus der Familie der Canidae.",
+    "sentence": "Der große Hund spielt im Park.",
+    "grammar_check": {"is_correct": True, "explanation": ""}
+}
+
+VERB_CARD = {
+    "word_data": {
+        "word": "gehen",
+        "language": "German",
+        "word_type": "verb",
+        "conjugations": {
+            "ich": "gehe", "du": "gehst", "er/sie/es": "geht",
+            "wir": "gehen", "ihr": "geht", "sie/Sie": "gehen"
+        },
+        "corrections": {"du": "gehst"}
+    },
+    "definition": "Sich zu Fuß fortbewegen.",
+    "sentence": "Ich gehen nach Hause.",
+    "grammar_check": {
+        "is_correct": False,
+        "corrected_sentence": "Ich gehe nach Hause.",
+        "explanation": "Die erste Person Singular von <gehen> ist \"gehe\"."
+    }
+}
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    compiler = CardCompiler()
+
+    total_bytes = 0
+    start = time.perf_counter()
+    for card in compiler.compile_cards(islice(cycle([NOUN_CARD, VERB_CARD]), count)):
+        total_bytes += sum(len(value) for value in card["fields"].values())
+    elapsed = time.perf_counter() - start
+
+    print(f"Compiled {count} cards in {elapsed:.2f}s ({count / elapsed:,.0f} cards/s)")
+    print(f"Average note field size: {total_bytes / count:,.0f} characters")
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,9 @@ ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")
 # Anki MCP Server settings
 ANKI_MCP_SERVER_URL = os.getenv("ANKI_MCP_SERVER_URL", "http://localhost:8765")
 
+# Local storage for caches and other persistent AnkiForge data
+ANKIFORGE_DATA_DIR = os.getenv("ANKIFORGE_DATA_DIR", os.path.join(os.path.expanduser("~"), ".ankiforge"))
+
 # Language settings
 DEFAULT_LANGUAGE = "German"
 SUPPORTED_LANGUAGES = ["German"]  # Will be expanded later
@@ -68,11 +71,124 @@ VERB_CONJUGATIONS = {
 
 # Image generation settings
 DEFAULT_IMAGE_MODEL = "stability-ai/sdxl:c221b2b8ef527988fb59bf24a8b97c4561f1c671f73bd389f866bfb27c061316"
+FAST_IMAGE_MODEL = "bytedance/sdxl-lightning-4step:5599ed30703defd1d160a25a63321b4dec97101d98b4674bcc56e41f62f35637"
+
+# Named image generation profiles: a fast preview and a full-quality render
+IMAGE_GENERATION_PROFILES = {
+    "fast": {
+        "label": "Fast preview",
+        "model": FAST_IMAGE_MODEL,  # Distilled SDXL, 4 steps
+        "negative_prompt": "worst quality, low quality",
+        "width": 512,
+        "height": 512,
+        "scheduler": "K_EULER",
+        "num_inference_steps": 4,
+        "guidance_scale": 0,
+    },
+    "quality": {
+        "label": "Quality",
+        "model": DEFAULT_IMAGE_MODEL,
+        "negative_prompt": "low quality, blurry, distorted, deformed, disfigured, bad anatomy, watermark",
+        "width": 768,
+        "height": 768,
+        "scheduler": "K_EULER",
+        "num_inference_steps": 30,
+        "guidance_scale": 7.5,
+    },
+}
+DEFAULT_IMAGE_PROFILE = "fast"
+DEFAULT_IMAGE_CANDIDATES = 3  # Candidate images generated per prediction in step 3
+MAX_IMAGE_CANDIDATES = 4      # Upper limit of num_outputs for the SDXL models
+
+# Image cache settings (generated images are reused for identical generation parameters)
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", os.path.join(ANKIFORGE_DATA_DIR, "image_cache"))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))  # 500 MB
+
+# Image output settings (applied to generated images before they are saved and uploaded to Anki)
+IMAGE_OUTPUT_SETTINGS = {
+    "width": 512,             # Maximum width; aspect ratio is preserved
+    "height": 512,            # Maximum height
+    "format": "WEBP",         # "WEBP", "JPEG" or "PNG"
+    "quality": 80,            # Lossy quality for WEBP/JPEG
+    "strip_metadata": True,   # Drop EXIF/ICC/text metadata from the output
+}
+IMAGE_PROCESSING_WORKERS = int(os.getenv("IMAGE_PROCESSING_WORKERS", "2"))
+
+# Preview rendering (thumbnails and audio bytes cached per file version for the app's previews)
+RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 64 MB shared by all sessions
+PREVIEW_THUMBNAIL_SIZE = 384               # Maximum width/height of preview thumbnails
+PREVIEW_THUMBNAIL_QUALITY = 80             # JPEG quality of preview thumbnails
+
+# Asynchronous Replicate predictions
+PREDICTION_POLL_INTERVAL = 1.5      # Seconds between background status polls
+PREDICTION_JOB_RETENTION = 60 * 60  # Seconds finished image jobs are kept in memory
+PREDICTION_COMPLETION_WORKERS = 4   # Threads downloading and processing finished predictions
+IMAGE_JOB_POLL_INTERVAL = 2         # Seconds between UI polls of a running image job
+
+# Background tasks (agent and integration calls run off the Streamlit script thread)
+TASK_THREAD_WORKERS = int(os.getenv("TASK_THREAD_WORKERS", "16"))   # Shared by all sessions
+TASK_RETENTION = 60 * 60            # Seconds finished tasks are kept for their session to collect
+TASK_POLL_INTERVAL = 1              # Seconds between UI polls of a running task
+
+# Bulk imports: concurrent cards per pipeline stage, sized to each provider's rate limits
+BULK_STAGE_CONCURRENCY = {
+    "validate": 8,      # OpenAI (gender and plural lookups)
+    "definition": 8,    # OpenAI
+    "audio": 4,         # Forvo / ElevenLabs
+    "grammar": 8,       # OpenAI
+    "prompt": 8,        # OpenAI
+    "image": 4,         # Replicate
+    "compile": 1,       # Local CPU, microseconds per card
+}
+BULK_QUEUE_SIZE = 16    # Cards waiting between two stages before the earlier stage blocks
+BULK_JOBS_DB_PATH = os.path.join(ANKIFORGE_DATA_DIR, "bulk_jobs.sqlite3")  # Per-card checkpoints
+BULK_JOBS_MEDIA_DIR = os.path.join(ANKIFORGE_DATA_DIR, "bulk_media")       # Durable media of bulk jobs
 
 # Audio settings
 AUDIO_PREFERENCE = ["Forvo", "ElevenLabs"]  # Try Forvo first, then ElevenLabs
 
 # Anki settings
 DEFAULT_DECK_NAME = "Default"
-DEFAULT_MODEL_NAME = "Basic"
+ANKIFORGE_MODEL_NAME = "AnkiForge"  # Note type created in Anki for AnkiForge cards (see integrations/note_type.py)
+DEFAULT_MODEL_NAME = ANKIFORGE_MODEL_NAME
 DEFAULT_TAGS = ["auto", "anki-forge"]
+ANKI_BATCH_SIZE = 100                     # Notes added per AnkiConnect "multi" request
+ANKI_MULTI_MAX_BYTES = 4 * 1024 * 1024    # Maximum base64 media payload per "multi" request
+ANKI_MEDIA_UPLOAD_WORKERS = 4             # Concurrent storeMediaFile requests per card
+ANKI_MEDIA_STREAM_CHUNK = 48 * 1024       # Bytes of a media file base64-encoded at a time when streaming uploads
+ANKI_MEDIA_INLINE_MAX_BYTES = 256 * 1024  # Larger media is streamed on its own instead of inlined in a "multi" request
+# Media files larger than this are rejected. This only limits the file size: memory use while
+# streaming is one ANKI_MEDIA_STREAM_CHUNK per upload whatever the size
+ANKI_MEDIA_MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+# Send media as a file path instead of base64 data: "auto" (only for a local server), "true" or "false"
+ANKI_MEDIA_USE_PATH = os.getenv("ANKI_MEDIA_USE_PATH", "auto").lower()
+MEDIA_MANIFEST_PATH = os.path.join(ANKIFORGE_DATA_DIR, "media_manifest.json")
+ANKI_METADATA_TTL = 60                    # Seconds deck/model names are cached to pick up changes made in Anki
+DUPLICATE_INDEX_TTL = 300                 # Seconds before a deck's duplicate index is synced again
+
+# Anki health monitor (background heartbeat with a circuit breaker)
+ANKI_HEALTH_INTERVAL = 10           # Seconds between heartbeats while Anki is reachable
+ANKI_HEALTH_PROBE_TIMEOUT = 2       # Seconds before a heartbeat gives up
+ANKI_HEALTH_FAILURE_THRESHOLD = 2   # Consecutive failures before requests fail fast
+ANKI_HEALTH_RESET_TIMEOUT = 15      # Seconds before Anki is probed again after the circuit opens
+
+# Session media (temporary audio and images of app sessions, deleted when no longer needed)
+SESSION_MEDIA_DIR = os.path.join(ANKIFORGE_DATA_DIR, "session_media")
+SESSION_MEDIA_QUOTA_BYTES = int(os.getenv("SESSION_MEDIA_QUOTA_BYTES", str(50 * 1024 * 1024)))           # 50 MB per session
+SESSION_MEDIA_GLOBAL_QUOTA_BYTES = int(os.getenv("SESSION_MEDIA_GLOBAL_QUOTA_BYTES", str(1024 * 1024 * 1024)))  # 1 GB in total
+SESSION_MEDIA_IDLE_TIMEOUT = 2 * 60 * 60  # Seconds without activity after which a session's media is deleted
+SESSION_MEDIA_GRACE_PERIOD = 60           # Seconds a new file is protected (background work may have just written it)
+SESSION_MEDIA_SWEEP_INTERVAL = 5 * 60     # Seconds between sweeps
+
+# Upload outbox (cards are queued durably and flushed to Anki in the background)
+OUTBOX_DB_PATH = os.path.join(ANKIFORGE_DATA_DIR, "outbox.sqlite3")
+OUTBOX_MEDIA_DIR = os.path.join(ANKIFORGE_DATA_DIR, "outbox_media")
+OUTBOX_BATCH_SIZE = 50          # Cards uploaded per flush
+OUTBOX_POLL_INTERVAL = 5        # Seconds between checks for due retries
+OUTBOX_RETRY_BASE_DELAY = 5     # Seconds before the first retry; doubled on every failure
+OUTBOX_RETRY_MAX_DELAY = 300    # Upper limit of the retry delay
+OUTBOX_MAX_ATTEMPTS = 5         # Attempts before a card Anki rejects is marked as failed
+OUTBOX_UPLOADED_RETENTION = 7 * 24 * 60 * 60  # Seconds uploaded cards are kept in the outbox before being deleted
+
+# .apkg export (cards are written directly to an Anki package, without AnkiConnect)
+APKG_COMMIT_INTERVAL = 1000     # Notes written to the package's collection per SQLite commit
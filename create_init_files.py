@@ -5,6 +5,7 @@ directories = [
     "/home/ubuntu/AnkiForge/agents",
     "/home/ubuntu/AnkiForge/integrations",
     "/home/ubuntu/AnkiForge/utils",
+    "/home/ubuntu/AnkiForge/pipeline",
     "/home/ubuntu/AnkiForge/config"
 ]
 
@@ -0,0 +1,185 @@
+"""
+AnkiForge command line interface: create flashcards without the Streamlit app.
+
+Usage:
+    python forge.py create Hund "Der Hund spielt im Park." --gender der --apkg hund.apkg
+    python forge.py create gehen "Ich gehe nach Hause." --type verb --upload --deck German
+    python forge.py bulk words.csv --apkg german.apkg --report report.csv
+    python forge.py jobs
+"""
+import os
+import sys
+import json
+import argparse
+from config.config import (
+    SUPPORTED_LANGUAGES, DEFAULT_LANGUAGE, WORD_TYPES, DEFAULT_DECK_NAME,
+    IMAGE_GENERATION_PROFILES, DEFAULT_IMAGE_PROFILE
+)
+
+def build_parser():
+    """Build the argument parser."""
+    parser = argparse.ArgumentParser(prog="forge", description="Create Anki flashcards with AnkiForge.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="Create a single card")
+    create.add_argument("word", help="The word (without article)")
+    create.add_argument("sentence", help="A sentence using the word")
+    create.add_argument("--language", default=DEFAULT_LANGUAGE, choices=SUPPORTED_LANGUAGES)
+    create.add_argument("--type", dest="word_type", default="noun",
+                        choices=sorted({word_type for types in WORD_TYPES.values() for word_type in types}))
+    create.add_argument("--gender", help="Article/gender of a noun (looked up if omitted)")
+    create.add_argument("--plural", dest="plural_form", help="Plural form of a noun (looked up if omitted)")
+    create.add_argument("--no-image", dest="generate_image", action="store_false", help="Skip image generation")
+    create.add_argument("--profile", default=DEFAULT_IMAGE_PROFILE, choices=list(IMAGE_GENERATION_PROFILES))
+    create.add_argument("--output-dir", help="Directory for the audio and image files")
+    create.add_argument("--deck", default=DEFAULT_DECK_NAME, help="Anki deck for --upload and --apkg")
+    create.add_argument("--upload", action="store_true", help="Add the card to Anki through anki-mcp-server")
+    create.add_argument("--apkg", help="Write the card to this .apkg package")
+    create.add_argument("--json", action="store_true", help="Print the result as JSON")
+
+    bulk = commands.add_parser("bulk", help="Create cards for every row of a CSV/TSV word list")
+    bulk.add_argument("file", help="CSV/TSV file with word and sentence columns (optional: type, gender, plural)")
+    bulk.add_argument("--language", default=DEFAULT_LANGUAGE, choices=SUPPORTED_LANGUAGES)
+    bulk.add_argument("--no-image", dest="generate_image", action="store_false", help="Skip image generation")
+    bulk.add_argument("--profile", default=DEFAULT_IMAGE_PROFILE, choices=list(IMAGE_GENERATION_PROFILES))
+    bulk.add_argument("--output-dir", help="Directory for the audio and image files (default: the job's media directory)")
+    bulk.add_argument("--deck", default=DEFAULT_DECK_NAME, help="Anki deck for the cards")
+    delivery = bulk.add_mutually_exclusive_group()
+    delivery.add_argument("--upload", action="store_true", help="Add the cards to Anki through anki-mcp-server")
+    delivery.add_argument("--outbox", action="store_true", help="Queue the cards in the upload outbox")
+    delivery.add_argument("--apkg", help="Write the cards to this .apkg package")
+    bulk.add_argument("--report", help="Write a per-card report (.csv or .json)")
+    bulk.add_argument("--workers", action="append", default=[], metavar="STAGE=N",
+                      help="Workers for a stage, e.g. --workers image=2 (repeatable)")
+    bulk.add_argument("--job", dest="job_id",
+                      help="Job ID to checkpoint under (default: derived from the file and options, "
+                           "so running the same command again resumes it)")
+    bulk.add_argument("--fresh", action="store_true", help="Discard the job's checkpoints and start over")
+
+    commands.add_parser("jobs", help="List checkpointed bulk jobs")
+    return parser
+
+def create(args):
+    """Run the create command. Returns the process exit code."""
+    from pipeline.card_pipeline import create_card
+
+    result = create_card(
+        args.word,
+        args.sentence,
+        language=args.language,
+        word_type=args.word_type,
+        gender=args.gender,
+        plural_form=args.plural_form,
+        generate_image=args.generate_image,
+        image_profile=args.profile,
+        output_dir=args.output_dir
+    )
+    if not result["success"]:
+        print(result["error"], file=sys.stderr)
+        return 1
+
+    delivery = {}
+    if args.upload:
+        from integrations.anki_uploader import AnkiUploader
+        delivery["upload"] = AnkiUploader().upload_card(result["card_data"], deck_name=args.deck)
+    if args.apkg:
+        from integrations.apkg_exporter import ApkgExporter
+        delivery["apkg"] = ApkgExporter(deck_name=args.deck).export([result["card_data"]], args.apkg)
+
+    if args.json:
+        print(json.dumps({**result, "delivery": delivery}, ensure_ascii=False, indent=2))
+    else:
+        print(f"Definition: {result['definition']}")
+        if not result["grammar_check"].get("is_correct"):
+            print(f"Corrected sentence: {result['grammar_check'].get('corrected_sentence')}")
+        print(f"Audio: {result['audio_path'] or '-'}")
+        print(f"Image: {result['image_path'] or '-'}")
+        for warning in result["warnings"]:
+            print(f"Warning: {warning}", file=sys.stderr)
+        for target, outcome in delivery.items():
+            print(f"{target}: {'ok' if outcome['success'] else outcome['error']}")
+
+    return 0 if all(outcome["success"] for outcome in delivery.values()) else 1
+
+def bulk(args):
+    """Run the bulk command. Returns the process exit code."""
+    from pipeline.bulk import BulkPipeline, BULK_STAGES, read_word_list
+    from pipeline.job_store import BulkJobStore
+
+    concurrency = {}
+    for setting in args.workers:
+        stage, _, workers = setting.partition("=")
+        if stage not in BULK_STAGES or not workers.isdigit():
+            print(f"Invalid --workers '{setting}' (stages: {', '.join(BULK_STAGES)})", file=sys.stderr)
+            return 2
+        concurrency[stage] = int(workers)
+
+    if not os.path.isfile(args.file):
+        print(f"Word list not found: {args.file}", file=sys.stderr)
+        return 2
+
+    deliver = "anki" if args.upload else "outbox" if args.outbox else "apkg" if args.apkg else "none"
+    job_store = BulkJobStore()
+    try:
+        job_id = args.job_id or BulkJobStore.job_id_for(args.file, {
+            "language": args.language,
+            "generate_image": args.generate_image,
+            "image_profile": args.profile,
+            "deliver": deliver,
+            "deck_name": args.deck
+        })
+    except OSError as e:
+        print(f"Error reading word list: {e}", file=sys.stderr)
+        return 1
+    if args.fresh:
+        job_store.delete_job(job_id)
+
+    summary = BulkPipeline(concurrency=concurrency, job_store=job_store).run(
+        read_word_list(args.file),
+        args.output_dir,
+        language=args.language,
+        generate_image=args.generate_image,
+        image_profile=args.profile,
+        deliver=deliver,
+        deck_name=args.deck,
+        apkg_path=args.apkg,
+        report_path=args.report,
+        job_id=job_id,
+        source=os.path.abspath(args.file)
+    )
+    if not summary["success"]:
+        print(summary["error"], file=sys.stderr)
+        return 1
+
+    for entry in summary["report"]:
+        if entry["status"] != "ok":
+            print(f"Row {entry['row']} ({entry['word']}): {entry['failed_stage']}: {entry['error']}", file=sys.stderr)
+    if summary["resumed"]:
+        print(f"Resumed job {job_id}: {summary['resumed']} cards continued from checkpoints")
+    print(f"{summary['succeeded']}/{summary['total']} cards created in {summary['seconds']}s (job {job_id})")
+    if summary["report_path"]:
+        print(f"Report: {summary['report_path']}")
+    return 0 if summary["failed"] == 0 else 1
+
+def jobs(args):
+    """Run the jobs command. Returns the process exit code."""
+    from pipeline.job_store import BulkJobStore
+
+    for job in BulkJobStore().list_jobs():
+        summary = job["summary"]
+        counts = f"{summary['succeeded']}/{summary['total']} cards" if summary else "-"
+        print(f"{job['id']}  {job['status']:<8}  {counts:<14}  {job['source']}")
+    return 0
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "create":
+        return create(args)
+    if args.command == "bulk":
+        return bulk(args)
+    if args.command == "jobs":
+        return jobs(args)
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
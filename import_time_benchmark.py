@@ -0,0 +1,97 @@
+"""
+Import-time benchmark: imports AnkiForge modules in fresh interpreters with
+``python -X importtime`` and reports their cumulative import time and the slowest
+modules they pull in. Run it to track cold start of the app and the forge CLI.
+
+Usage:
+    python import_time_benchmark.py [--repeat N] [--top N] [--max-ms MS] [module ...]
+
+With --max-ms the exit code is 1 if any module takes longer to import, so the
+benchmark can guard against heavy imports creeping back into startup paths.
+"""
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+
+# Modules on the startup paths of the forge CLI and the Streamlit app
+DEFAULT_MODULES = [
+    "forge",
+    "pipeline.card_pipeline",
+    "pipeline.bulk",
+    "agents.word_interpreter",
+    "agents.grammar_checker",
+    "agents.prompt_refiner",
+    "integrations.image_generator",
+    "integrations.audio_fetcher",
+    "integrations.anki_uploader",
+    "utils.card_compiler",
+]
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure(module):
+    """
+    Import a module in a fresh interpreter (None: just start the interpreter).
+
+    Returns:
+        tuple: (cumulative microseconds of the module, {imported module: cumulative microseconds})
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}" if module else "pass"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            timings[match.group(4)] = int(match.group(2))
+    return timings.get(module, 0), timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import times of AnkiForge modules.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh imports per module (the median is reported)")
+    parser.add_argument("--top", type=int, default=3, help="Slowest dependencies shown per module")
+    parser.add_argument("--max-ms", type=float, help="Fail if a module's median import time exceeds this")
+    args = parser.parse_args()
+
+    # Modules every interpreter imports at startup are not the module's doing
+    startup_modules = set(measure(None)[1])
+    over_budget = []
+    print(f"{'module':<32} {'median ms':>10}  slowest imports")
+    for module in args.modules:
+        try:
+            runs = [measure(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{module:<32} {'error':>10}  {e}")
+            over_budget.append(module)
+            continue
+
+        median_ms = statistics.median(total for total, _ in runs) / 1000
+        _, timings = runs[-1]
+        slowest = sorted(
+            ((name, micros) for name, micros in timings.items()
+             if name != module and "." not in name and name not in startup_modules),
+            key=lambda item: item[1],
+            reverse=True
+        )[:args.top]
+        print(f"{module:<32} {median_ms:>10.1f}  " + ", ".join(f"{name} {micros / 1000:.1f}" for name, micros in slowest))
+
+        if args.max_ms is not None and median_ms > args.max_ms:
+            over_budget.append(module)
+
+    if over_budget:
+        print(f"Over budget: {', '.join(over_budget)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
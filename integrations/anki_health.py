@@ -0,0 +1,162 @@
+import time
+import threading
+from config.config import (
+    ANKI_HEALTH_INTERVAL, ANKI_HEALTH_PROBE_TIMEOUT,
+    ANKI_HEALTH_FAILURE_THRESHOLD, ANKI_HEALTH_RESET_TIMEOUT
+)
+
+# Circuit breaker states
+CLOSED = "closed"        # Anki is reachable; requests go through
+OPEN = "open"            # Anki is down; requests fail immediately
+HALF_OPEN = "half_open"  # Probing whether Anki is back
+
+class AnkiHealthMonitor:
+    """
+    Integration responsible for tracking whether anki-mcp-server is reachable, using a
+    background heartbeat and a circuit breaker shared by every session, so callers can
+    read the connection state without probing and fail fast while Anki is down.
+    """
+
+    def __init__(self, uploader, interval=ANKI_HEALTH_INTERVAL, probe_timeout=ANKI_HEALTH_PROBE_TIMEOUT,
+                 failure_threshold=ANKI_HEALTH_FAILURE_THRESHOLD, reset_timeout=ANKI_HEALTH_RESET_TIMEOUT,
+                 start_worker=True):
+        """
+        Initialize the AnkiHealthMonitor.
+
+        Args:
+            uploader (AnkiUploader): Uploader whose server is probed with the "version" action
+            interval (float): Seconds between heartbeats while Anki is reachable
+            probe_timeout (float): Seconds before a heartbeat gives up
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds the circuit stays open before Anki is probed again
+            start_worker (bool): Whether to start the background heartbeat thread
+        """
+        self.uploader = uploader
+        self.interval = interval
+        self.probe_timeout = probe_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._circuit = CLOSED
+        self._connected = False
+        self._version = None
+        self._last_error = None
+        self._last_checked = None
+        self._opened_at = None
+        self._failures = 0
+        self._thread = None
+
+        if start_worker:
+            self._thread = threading.Thread(target=self._heartbeat_loop, name="anki-health", daemon=True)
+            self._thread.start()
+
+    def state(self):
+        """
+        Get the latest known connection state without contacting Anki.
+
+        Returns:
+            dict: A dictionary containing:
+                - connected (bool): Whether the last probe succeeded
+                - circuit (str): "closed", "open" or "half_open"
+                - version (int | None): AnkiConnect version reported by the last successful probe
+                - last_checked (float | None): Time of the last probe
+                - retry_at (float | None): When Anki is probed again while the circuit is open
+                - error (str | None): Error of the last failed probe
+        """
+        with self._lock:
+            return {
+                "connected": self._connected,
+                "circuit": self._circuit,
+                "version": self._version,
+                "last_checked": self._last_checked,
+                "retry_at": self._opened_at + self.reset_timeout if self._circuit == OPEN else None,
+                "error": self._last_error
+            }
+
+    def allow_request(self):
+        """
+        Whether a request to Anki should be attempted: False while the circuit is open,
+        until the reset timeout has passed and requests may test whether Anki is back.
+        """
+        with self._lock:
+            self._half_open_if_due()
+            return self._circuit != OPEN
+
+    def check_now(self):
+        """
+        Probe Anki immediately, regardless of the circuit state (e.g. when the user asks).
+
+        Returns:
+            dict: The updated connection state (see state)
+        """
+        self._probe()
+        return self.state()
+
+    def record_success(self):
+        """Record a successful request made outside the heartbeat."""
+        self._record(success=True)
+
+    def record_failure(self, error):
+        """
+        Record a failed connection made outside the heartbeat, so the circuit can open
+        before the next heartbeat notices.
+
+        Args:
+            error (str): Description of the failure
+        """
+        self._record(success=False, error=error)
+
+    def _heartbeat_loop(self):
+        """Probe Anki every interval; while the circuit is open, only once the reset timeout has passed."""
+        while True:
+            with self._lock:
+                self._half_open_if_due()
+                if self._circuit == OPEN:
+                    wait, probe = self._opened_at + self.reset_timeout - time.monotonic(), False
+                else:
+                    wait, probe = self.interval, True
+
+            if probe:
+                self._probe()
+                with self._lock:
+                    wait = self.interval if self._circuit != OPEN else self.reset_timeout
+
+            self._wake.wait(max(wait, 0.1))
+            self._wake.clear()
+
+    def _half_open_if_due(self):
+        """Move an open circuit to half-open once the reset timeout has passed. Must be called with the lock held."""
+        if self._circuit == OPEN and time.monotonic() >= self._opened_at + self.reset_timeout:
+            self._circuit = HALF_OPEN
+
+    def _probe(self):
+        """Send the "version" action and record the outcome."""
+        result = self.uploader.check_connection(timeout=self.probe_timeout)
+        if result["success"]:
+            self._record(success=True, version=result.get("version"))
+        else:
+            self._record(success=False, error=result.get("error"))
+
+    def _record(self, success, error=None, version=None):
+        """Update the circuit after a request or probe."""
+        with self._lock:
+            self._last_checked = time.time()
+            if success:
+                self._connected = True
+                self._circuit = CLOSED
+                self._failures = 0
+                self._last_error = None
+                if version is not None:
+                    self._version = version
+                return
+
+            self._connected = False
+            self._last_error = error
+            self._failures += 1
+            # A failed half-open probe reopens the circuit straight away
+            if self._circuit == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._circuit != OPEN:
+                    self._opened_at = time.monotonic()
+                self._circuit = OPEN
@@ -1,7 +1,23 @@
-import requests
 import json
 import os
-from config.config import ANKI_MCP_SERVER_URL, DEFAULT_DECK_NAME, DEFAULT_MODEL_NAME, DEFAULT_TAGS
+import base64
+import time
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from config.config import (
+    ANKI_MCP_SERVER_URL, DEFAULT_DECK_NAME, DEFAULT_MODEL_NAME, ANKIFORGE_MODEL_NAME, DEFAULT_TAGS,
+    ANKI_BATCH_SIZE, ANKI_MULTI_MAX_BYTES, ANKI_METADATA_TTL,
+    ANKI_MEDIA_USE_PATH, ANKI_MEDIA_UPLOAD_WORKERS, ANKI_MEDIA_STREAM_CHUNK,
+    ANKI_MEDIA_INLINE_MAX_BYTES, ANKI_MEDIA_MAX_UPLOAD_BYTES
+)
+from integrations.media_manifest import MediaManifest
+from integrations.note_type import create_model_params
+from utils.media import media_filename, MEDIA_PREFIX
+from utils.streaming_body import Base64JsonBody
+from utils.lazy_import import lazy_import
+
+requests = lazy_import("requests")
 
 class AnkiUploader:
     """
@@ -16,6 +32,23 @@ class AnkiUploader:
             server_url (str): URL of the anki-mcp-server (default from config)
         """
         self.server_url = server_url
+        # A local AnkiConnect can read media straight from disk instead of base64 payloads
+        if ANKI_MEDIA_USE_PATH == "auto":
+            self.use_media_path = urlparse(server_url).hostname in ("localhost", "127.0.0.1", "::1")
+        else:
+            self.use_media_path = ANKI_MEDIA_USE_PATH == "true"
+        # Content-addressed media already stored in the collection
+        self.media_manifest = MediaManifest(scope=server_url)
+        self._manifest_synced = False
+        self._manifest_lock = threading.Lock()
+        # Deck and note model names, shared across sessions: action -> (fetched_at, result)
+        self._metadata = {}
+        self._metadata_lock = threading.Lock()
+        # Optional AnkiHealthMonitor; while its circuit is open requests fail immediately
+        self.health_monitor = None
+        # Whether the AnkiForge note type is known to exist in the collection
+        self._note_type_ready = False
+        self._note_type_lock = threading.Lock()
         
     def upload_card(self, card_data, deck_name=DEFAULT_DECK_NAME, model_name=DEFAULT_MODEL_NAME, additional_tags=None):
         """
@@ -23,8 +56,8 @@ class AnkiUploader:
         
         Args:
             card_data (dict): Dictionary containing the compiled card data:
-                - front_html (str): HTML content for the front of the card
-                - back_html (str): HTML content for the back of the card
+                - fields (dict): Note field values (see CardCompiler.compile_card); cards
+                  queued before the AnkiForge note type have front_html/back_html instead
                 - tags (list): List of tags for the card
                 - media_files (list): List of media files to include
             deck_name (str): Name of the Anki deck to add the card to
@@ -37,45 +70,25 @@ class AnkiUploader:
                 - card_id (int): ID of the created card if successful
                 - error (str): Error message if upload failed
         """
+        circuit_error = self._circuit_error()
+        if circuit_error:
+            return {
+                "success": False,
+                "error": circuit_error
+            }
+        
         try:
-            # Combine tags
-            tags = card_data.get("tags", []) + (additional_tags or []) + DEFAULT_TAGS
-            tags = list(set(tags))  # Remove duplicates
-            
             # Prepare the note data
-            note = {
-                "deckName": deck_name,
-                "modelName": model_name,
-                "fields": {
-                    "Front": card_data["front_html"],
-                    "Back": card_data["back_html"]
-                },
-                "tags": tags,
-                "options": {
-                    "allowDuplicate": False
-                }
-            }
+            note = self._build_note(card_data, deck_name, model_name, additional_tags)
             
-            # First, check if anki-mcp-server is running
+            # Check if the deck exists (deck names are cached between cards), create it if not
             try:
-                response = requests.post(
-                    self.server_url,
-                    json={
-                        "action": "deckNames",
-                        "version": 6
-                    }
-                )
-                
-                if response.status_code != 200:
-                    return {
-                        "success": False,
-                        "error": f"anki-mcp-server not responding: HTTP {response.status_code}"
-                    }
-                    
-                # Check if the deck exists, create it if not
-                decks = response.json().get("result", [])
-                if deck_name not in decks:
-                    self._create_deck(deck_name)
+                deck_result = self._ensure_deck(deck_name)
+                if not deck_result["success"]:
+                    return deck_result
+                model_result = self._ensure_note_type(model_name)
+                if not model_result["success"]:
+                    return model_result
                 
             except requests.exceptions.ConnectionError:
                 return {
@@ -83,9 +96,12 @@ class AnkiUploader:
                     "error": "Could not connect to anki-mcp-server. Make sure it's installed and running."
                 }
             
-            # Upload media files first
-            for media_file in card_data.get("media_files", []):
-                media_upload_result = self._upload_media(media_file)
+            # Upload media files first (concurrently; media already in the collection is skipped)
+            media_files = card_data.get("media_files", [])
+            with ThreadPoolExecutor(max_workers=ANKI_MEDIA_UPLOAD_WORKERS) as executor:
+                media_upload_results = list(executor.map(self._upload_media, media_files))
+            
+            for media_file, media_upload_result in zip(media_files, media_upload_results):
                 # Check if the upload was successful or if there was an error reported by the API
                 if media_upload_result.get("error") is not None:
                     # If error is not None, upload failed
@@ -98,8 +114,7 @@ class AnkiUploader:
                 #    st.warning(f"Media file {os.path.basename(media_file)} uploaded, but API result was unexpected: {media_upload_result.get('result')}")
             
             # Add the note
-            response = requests.post(
-                self.server_url,
+            response = self._post(
                 json={
                     "action": "addNote",
                     "version": 6,
@@ -133,11 +148,293 @@ class AnkiUploader:
                 "error": f"Error uploading card: {str(e)}"
             }
     
+    def upload_cards(self, cards, deck_name=DEFAULT_DECK_NAME, model_name=DEFAULT_MODEL_NAME, additional_tags=None):
+        """
+        Upload many flashcards to Anki in as few requests as possible.
+        
+        Deck creation and media uploads are sent as AnkiConnect "multi" requests, and the
+        notes are added with one "multi" request of addNote actions per ANKI_BATCH_SIZE cards,
+        so every note gets its own result even if others fail.
+        
+        Args:
+            cards (list): Compiled card data dictionaries (see upload_card)
+            deck_name (str): Name of the Anki deck to add the cards to
+            model_name (str): Name of the Anki note model to use
+            additional_tags (list, optional): Additional tags to add to every card
+            
+        Returns:
+            list: One dictionary per card, in the same order, containing:
+                - success (bool): Whether the card was added
+                - card_id (int): ID of the created note if successful
+                - error (str): Error message if the card failed
+        """
+        cards = list(cards)
+        results = [None] * len(cards)
+        if not cards:
+            return results
+        
+        def fail_remaining(error):
+            for index, result in enumerate(results):
+                if result is None:
+                    results[index] = {"success": False, "error": error}
+            return results
+        
+        circuit_error = self._circuit_error()
+        if circuit_error:
+            return fail_remaining(circuit_error)
+        
+        try:
+            # Make sure the deck exists
+            deck_result = self._ensure_deck(deck_name)
+            if not deck_result["success"]:
+                return fail_remaining(deck_result["error"])
+            model_result = self._ensure_note_type(model_name)
+            if not model_result["success"]:
+                return fail_remaining(model_result["error"])
+            
+            # Upload every distinct media file once, batched by payload size
+            media_paths = []
+            for card_data in cards:
+                for media_file in card_data.get("media_files", []):
+                    if media_file not in media_paths:
+                        media_paths.append(media_file)
+            media_errors = self._store_media_batch(media_paths)
+            
+            # Cards whose media failed are not added; the rest are added in batches
+            pending = []
+            for index, card_data in enumerate(cards):
+                failed_media = [path for path in card_data.get("media_files", []) if path in media_errors]
+                if failed_media:
+                    results[index] = {
+                        "success": False,
+                        "error": f"Failed to upload media file '{os.path.basename(failed_media[0])}': {media_errors[failed_media[0]]}"
+                    }
+                else:
+                    pending.append(index)
+            
+            for start in range(0, len(pending), ANKI_BATCH_SIZE):
+                batch = pending[start:start + ANKI_BATCH_SIZE]
+                actions = [
+                    {
+                        "action": "addNote",
+                        "version": 6,
+                        "params": {"note": self._build_note(cards[index], deck_name, model_name, additional_tags)}
+                    }
+                    for index in batch
+                ]
+                response = self.invoke("multi", actions=actions)
+                if response.get("error"):
+                    for index in batch:
+                        results[index] = {"success": False, "error": response["error"]}
+                    continue
+                
+                for index, action_result in zip(batch, response.get("result") or []):
+                    if action_result.get("error"):
+                        results[index] = {"success": False, "error": action_result["error"]}
+                    else:
+                        results[index] = {"success": True, "card_id": action_result.get("result")}
+            
+            return fail_remaining("No result returned by anki-mcp-server")
+            
+        except requests.exceptions.ConnectionError:
+            return fail_remaining("Could not connect to anki-mcp-server. Make sure it's installed and running.")
+        except Exception as e:
+            return fail_remaining(f"Error uploading cards: {str(e)}")
+    
+    def _build_note(self, card_data, deck_name, model_name, additional_tags=None):
+        """Build the AnkiConnect note for compiled card data."""
+        # Combine tags
+        tags = card_data.get("tags", []) + (additional_tags or []) + DEFAULT_TAGS
+        tags = list(set(tags))  # Remove duplicates
+        
+        if "fields" in card_data:
+            fields = card_data["fields"]
+        else:
+            # Card compiled for the Basic note type (e.g. queued before the AnkiForge note type existed)
+            fields = {
+                "Front": card_data["front_html"],
+                "Back": card_data["back_html"]
+            }
+        
+        return {
+            "deckName": deck_name,
+            "modelName": model_name,
+            "fields": fields,
+            "tags": tags,
+            "options": {
+                "allowDuplicate": False
+            }
+        }
+    
+    def _store_media_batch(self, file_paths):
+        """
+        Upload media files with "multi" requests of at most ANKI_MULTI_MAX_BYTES each.
+        
+        Returns:
+            dict: Error message per file path that failed to upload
+        """
+        errors = {}
+        batch, batch_paths, batch_names, batch_bytes = [], [], [], 0
+        
+        def flush():
+            if not batch:
+                return
+            response = self.invoke("multi", actions=batch)
+            action_results = response.get("result") or []
+            stored = []
+            for index, path in enumerate(batch_paths):
+                if response.get("error"):
+                    errors[path] = response["error"]
+                elif index >= len(action_results):
+                    errors[path] = "No result returned by anki-mcp-server"
+                elif action_results[index].get("error"):
+                    errors[path] = action_results[index]["error"]
+                else:
+                    stored.append(batch_names[index])
+            self.media_manifest.add(stored)
+            batch.clear()
+            batch_paths.clear()
+            batch_names.clear()
+        
+        manifest_synced = self._sync_media_manifest()
+        # Paths sharing a content-hash name are uploaded once; an error applies to all of them
+        paths_by_name = {}
+        
+        for file_path in file_paths:
+            try:
+                filename = media_filename(file_path)
+                if filename in paths_by_name:
+                    paths_by_name[filename].append(file_path)
+                    continue
+                paths_by_name[filename] = [file_path]
+                # Skip media the collection already has
+                if manifest_synced and filename in self.media_manifest:
+                    continue
+                if not self.use_media_path and os.path.getsize(file_path) > ANKI_MEDIA_INLINE_MAX_BYTES:
+                    # Too large to inline in a "multi" request; stream it on its own
+                    result = self._upload_media(file_path)
+                    if result.get("error"):
+                        errors[file_path] = result["error"]
+                    continue
+                params = self._media_params(file_path, filename)
+            except FileNotFoundError:
+                errors[file_path] = f"Media file not found: {file_path}"
+                continue
+            
+            params_bytes = len(params.get("data", ""))
+            if batch and batch_bytes + params_bytes > ANKI_MULTI_MAX_BYTES:
+                flush()
+                batch_bytes = 0
+            batch.append({
+                "action": "storeMediaFile",
+                "version": 6,
+                "params": params
+            })
+            batch_paths.append(file_path)
+            batch_names.append(filename)
+            batch_bytes += params_bytes
+        flush()
+        
+        for paths in paths_by_name.values():
+            error = next((errors[path] for path in paths if path in errors), None)
+            if error:
+                for path in paths:
+                    errors.setdefault(path, error)
+        return errors
+    
+    def invoke(self, action, **params):
+        """Send a single AnkiConnect action and return the JSON response."""
+        payload = {
+            "action": action,
+            "version": 6
+        }
+        if params:
+            payload["params"] = params
+        circuit_error = self._circuit_error()
+        if circuit_error:
+            return {
+                "result": None,
+                "error": circuit_error
+            }
+        response = self._post(json=payload)
+        if response.status_code != 200:
+            return {
+                "result": None,
+                "error": f"HTTP error: {response.status_code}"
+            }
+        return response.json()
+    
+    def _post(self, **kwargs):
+        """
+        POST to anki-mcp-server, reporting the outcome to the health monitor: a reply
+        closes a half-open circuit, no connection or a server error counts as a failure.
+        """
+        try:
+            response = requests.post(self.server_url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if self.health_monitor:
+                self.health_monitor.record_failure(str(e))
+            raise
+        if self.health_monitor:
+            if response.status_code >= 500:
+                self.health_monitor.record_failure(f"HTTP error: {response.status_code}")
+            else:
+                self.health_monitor.record_success()
+        return response
+    
+    def is_available(self):
+        """Whether requests to Anki are currently allowed (always True without a health monitor)."""
+        return self.health_monitor is None or self.health_monitor.allow_request()
+    
+    def _circuit_error(self):
+        """Error message to fail with immediately while the health monitor's circuit is open, else None."""
+        if self.is_available():
+            return None
+        return "Anki is unreachable (circuit open); the request was not sent. Make sure anki-mcp-server is running."
+    
+    def _ensure_deck(self, deck_name):
+        """Create the deck unless the (cached) deck list already contains it."""
+        decks = self._get_metadata("deckNames")
+        if decks is None:
+            return {
+                "success": False,
+                "error": "anki-mcp-server not responding to deckNames"
+            }
+        if deck_name not in decks:
+            self._create_deck(deck_name)
+        return {"success": True}
+    
+    def _ensure_note_type(self, model_name):
+        """Create the AnkiForge note type (fields, templates and shared CSS) once, if the collection lacks it."""
+        if model_name != ANKIFORGE_MODEL_NAME:
+            return {"success": True}
+        
+        with self._note_type_lock:
+            if self._note_type_ready:
+                return {"success": True}
+            
+            models = self._get_metadata("modelNames")
+            if models is None:
+                return {
+                    "success": False,
+                    "error": "anki-mcp-server not responding to modelNames"
+                }
+            if model_name not in models:
+                response = self.invoke("createModel", **create_model_params())
+                # The model list changed; fetch it again next time
+                self.invalidate_metadata("modelNames")
+                if response.get("error"):
+                    return {
+                        "success": False,
+                        "error": f"Could not create note type '{model_name}': {response['error']}"
+                    }
+            self._note_type_ready = True
+            return {"success": True}
+    
     def _create_deck(self, deck_name):
         """Create a new deck in Anki."""
         try:
-            response = requests.post(
-                self.server_url,
+            response = self._post(
                 json={
                     "action": "createDeck",
                     "version": 6,
@@ -146,36 +443,106 @@ class AnkiUploader:
                     }
                 }
             )
+            # The deck list changed; fetch it again next time
+            self.invalidate_metadata("deckNames")
             return response.status_code == 200
         except:
             return False
     
+    def _get_metadata(self, action, refresh=False):
+        """
+        Return the result of a parameterless metadata action ("deckNames", "modelNames"),
+        cached for ANKI_METADATA_TTL seconds.
+        
+        Returns:
+            list | None: The action result, or None if anki-mcp-server returned an error
+        
+        Raises:
+            requests.exceptions.ConnectionError: If anki-mcp-server cannot be reached
+        """
+        with self._metadata_lock:
+            cached = self._metadata.get(action)
+            if cached and not refresh and time.monotonic() - cached[0] < ANKI_METADATA_TTL:
+                return list(cached[1])
+        
+        response = self.invoke(action)
+        if response.get("error") or response.get("result") is None:
+            return None
+        
+        with self._metadata_lock:
+            self._metadata[action] = (time.monotonic(), list(response["result"]))
+        return list(response["result"])
+    
+    def invalidate_metadata(self, action=None):
+        """
+        Drop cached deck/model metadata so it is fetched again on next use.
+        
+        Args:
+            action (str, optional): Only invalidate this action ("deckNames" or "modelNames")
+        """
+        with self._metadata_lock:
+            if action:
+                self._metadata.pop(action, None)
+            else:
+                self._metadata.clear()
+        if action in (None, "modelNames"):
+            # The note type may have been deleted in Anki; check again before the next upload
+            self._note_type_ready = False
+    
     def _upload_media(self, file_path):
-        """Upload a media file to Anki. Returns the API response dictionary."""
+        """
+        Upload a media file to Anki under its content-addressed name, unless the
+        collection already has it. Returns the API response dictionary.
+        """
         try:
-            filename = os.path.basename(file_path)
-            
-            with open(file_path, "rb") as f:
-                file_data = f.read()
-                
-            # Convert binary data to base64
-            import base64
-            file_data_b64 = base64.b64encode(file_data).decode("utf-8")
+            filename = media_filename(file_path)
+        except FileNotFoundError:
+            return {
+                "result": None,
+                "error": f"Media file not found: {file_path}"
+            }
+        
+        try:
+            if self._sync_media_manifest() and filename in self.media_manifest:
+                return {
+                    "result": filename,
+                    "error": None
+                }
             
-            response = requests.post(
-                self.server_url,
-                json={
-                    "action": "storeMediaFile",
-                    "version": 6,
-                    "params": {
-                        "filename": filename,
-                        "data": file_data_b64
+            if self.use_media_path:
+                response = self._post(
+                    json={
+                        "action": "storeMediaFile",
+                        "version": 6,
+                        "params": self._media_params(file_path, filename)
                     }
-                }
-            )
+                )
+            else:
+                if os.path.getsize(file_path) > ANKI_MEDIA_MAX_UPLOAD_BYTES:
+                    return {
+                        "result": None,
+                        "error": f"Media file {filename} exceeds the {ANKI_MEDIA_MAX_UPLOAD_BYTES} byte upload limit"
+                    }
+                # Encode the file into the request as it is sent, holding one chunk in memory at a time
+                body = Base64JsonBody(
+                    prefix=f'{{"action": "storeMediaFile", "version": 6, "params": {{"filename": {json.dumps(filename)}, "data": "',
+                    file_path=file_path,
+                    suffix='"}}',
+                    chunk_size=ANKI_MEDIA_STREAM_CHUNK
+                )
+                try:
+                    response = self._post(
+                        data=body,
+                        headers={"Content-Type": "application/json"}
+                    )
+                finally:
+                    body.close()
             
             if response.status_code == 200:
-                return response.json() # Return the full JSON response
+                result = response.json()
+                if result.get("error") is None:
+                    self.media_manifest.add([filename])
+                return result # Return the full JSON response
             else:
                 # Return an error structure similar to other methods
                 return {
@@ -192,35 +559,93 @@ class AnkiUploader:
                 "result": None,
                 "error": f"Exception uploading media {filename}: {str(e)}"
             }
+    
+    def _media_params(self, file_path, filename):
+        """Build storeMediaFile params: a file path for a local Anki, inline base64 data otherwise (small files only)."""
+        if self.use_media_path:
+            return {
+                "filename": filename,
+                "path": os.path.abspath(file_path)
+            }
+        
+        with open(file_path, "rb") as f:
+            file_data = f.read()
+        
+        # Convert binary data to base64
+        return {
+            "filename": filename,
+            "data": base64.b64encode(file_data).decode("utf-8")
+        }
+    
+    def _sync_media_manifest(self):
+        """
+        Reconcile the media manifest with the AnkiForge media in the collection, once per uploader.
+        
+        A failed sync (Anki unreachable, circuit open, HTTP error) is retried on the next
+        upload; until then the manifest may be stale and must not be used to skip uploads.
+        
+        Returns:
+            bool: Whether the manifest can be trusted to skip media the collection has
+        """
+        with self._manifest_lock:
+            if self._manifest_synced:
+                return True
+            try:
+                response = self.invoke("getMediaFilesNames", pattern=f"{MEDIA_PREFIX}*")
+            except requests.exceptions.RequestException:
+                return False
+            error = response.get("error")
+            if error is None and response.get("result") is not None:
+                self.media_manifest.replace(response["result"])
+            elif not (isinstance(error, str) and "unsupported action" in error.lower()):
+                return False
+            # Synced, or this AnkiConnect version lacks getMediaFilesNames: don't ask again
+            self._manifest_synced = True
+            return True
             
-    def get_deck_names(self):
-        """Get a list of all deck names in Anki."""
+    def get_deck_names(self, refresh=False):
+        """
+        Get a list of all deck names in Anki.
+        
+        The list is cached for ANKI_METADATA_TTL seconds and shared by every caller of
+        this uploader; it is invalidated whenever the uploader creates a deck.
+        
+        Args:
+            refresh (bool): Bypass the cache and fetch the list from Anki
+        """
         try:
-            response = requests.post(
-                self.server_url,
-                json={
-                    "action": "deckNames",
-                    "version": 6
-                }
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("result", [])
-            else:
-                return []
+            return self._get_metadata("deckNames", refresh) or []
+        except:
+            return []
+    
+    def get_model_names(self, refresh=False):
+        """
+        Get a list of all note model names in Anki (cached like get_deck_names).
+        
+        Args:
+            refresh (bool): Bypass the cache and fetch the list from Anki
+        """
+        try:
+            return self._get_metadata("modelNames", refresh) or []
         except:
             return []
             
-    def check_connection(self):
-        """Check if anki-mcp-server is running and accessible."""
+    def check_connection(self, timeout=None):
+        """
+        Check if anki-mcp-server is running and accessible.
+        
+        Args:
+            timeout (float, optional): Seconds to wait for a response
+        """
         try:
+            # Not reported to the health monitor: its heartbeat records the outcome itself
             response = requests.post(
                 self.server_url,
                 json={
                     "action": "version",
                     "version": 6
-                }
+                },
+                timeout=timeout
             )
             
             if response.status_code == 200:
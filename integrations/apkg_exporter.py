@@ -0,0 +1,255 @@
+import os
+import re
+import json
+import time
+import html
+import base64
+import sqlite3
+import zipfile
+import hashlib
+import tempfile
+from contextlib import closing
+from config.config import DEFAULT_DECK_NAME, DEFAULT_TAGS, APKG_COMMIT_INTERVAL, ANKIFORGE_MODEL_NAME
+from integrations.note_type import NOTE_TYPE_FIELDS, NOTE_TYPE_FRONT, NOTE_TYPE_BACK, NOTE_TYPE_CSS
+from utils.media import media_filename
+
+# Fixed ID so repeated imports reuse the same note type instead of creating copies
+APKG_MODEL_ID = 1713961728001
+
+# Schema of a legacy (version 11) Anki collection, which every Anki version can import
+COLLECTION_SCHEMA = """
+CREATE TABLE col (
+    id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+    ver integer not null, dty integer not null, usn integer not null, ls integer not null,
+    conf text not null, models text not null, decks text not null, dconf text not null, tags text not null
+);
+CREATE TABLE notes (
+    id integer primary key, guid text not null, mid integer not null, mod integer not null,
+    usn integer not null, tags text not null, flds text not null, sfld integer not null,
+    csum integer not null, flags integer not null, data text not null
+);
+CREATE TABLE cards (
+    id integer primary key, nid integer not null, did integer not null, ord integer not null,
+    mod integer not null, usn integer not null, type integer not null, queue integer not null,
+    due integer not null, ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null, odid integer not null,
+    flags integer not null, data text not null
+);
+CREATE TABLE revlog (
+    id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+    ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+    type integer not null
+);
+CREATE TABLE graves (usn integer not null, oid integer not null, type integer not null);
+CREATE INDEX ix_notes_usn on notes (usn);
+CREATE INDEX ix_cards_usn on cards (usn);
+CREATE INDEX ix_revlog_usn on revlog (usn);
+CREATE INDEX ix_cards_nid on cards (nid);
+CREATE INDEX ix_cards_sched on cards (did, queue, due);
+CREATE INDEX ix_revlog_cid on revlog (cid);
+CREATE INDEX ix_notes_csum on notes (csum);
+"""
+
+DEFAULT_DECK_CONFIG = {
+    "id": 1, "name": "Default", "replayq": True, "timer": 0, "maxTaken": 60, "usn": 0, "mod": 0,
+    "autoplay": True, "dyn": False,
+    "new": {"perDay": 20, "delays": [1, 10], "separate": True, "ints": [1, 4, 7],
+            "initialFactor": 2500, "bury": False, "order": 1},
+    "rev": {"perDay": 200, "fuzz": 0.05, "ivlFct": 1, "maxIvl": 36500, "ease4": 1.3,
+            "bury": False, "minSpace": 1},
+    "lapse": {"leechFails": 8, "minInt": 1, "delays": [10], "leechAction": 0, "mult": 0},
+}
+
+class ApkgExporter:
+    """
+    Integration responsible for writing compiled cards and their media straight into an
+    .apkg package that can be imported into Anki, without a running Anki or anki-mcp-server.
+    """
+
+    def __init__(self, deck_name=DEFAULT_DECK_NAME):
+        """
+        Initialize the ApkgExporter.
+
+        Args:
+            deck_name (str): Default name of the deck the exported cards are placed in
+        """
+        self.deck_name = deck_name
+
+    def export(self, cards, output_path, deck_name=None, additional_tags=None):
+        """
+        Export cards to an .apkg file.
+
+        Cards are consumed one at a time and written to an on-disk collection, and media
+        files are streamed into the package from disk, so arbitrarily large decks can be
+        exported with constant memory.
+
+        Args:
+            cards (iterable): Compiled card data dictionaries (see CardCompiler.compile_card)
+            output_path (str): Path of the .apkg file to create
+            deck_name (str, optional): Name of the deck (default: the exporter's deck name)
+            additional_tags (list, optional): Additional tags to add to every card
+
+        Returns:
+            dict: A dictionary containing:
+                - success (bool): Whether the export was successful
+                - path (str): Path of the created package
+                - note_count (int): Number of notes exported
+                - media_count (int): Number of distinct media files packaged
+                - error (str): Error message if the export failed
+        """
+        deck_name = deck_name or self.deck_name
+        temp_dir = tempfile.mkdtemp(prefix="ankiforge_apkg_")
+        collection_path = os.path.join(temp_dir, "collection.anki2")
+        temp_output = f"{output_path}.tmp"
+
+        try:
+            now = int(time.time())
+            deck_id = self._deck_id(deck_name)
+
+            media = {}  # Media filename in the package -> zip entry name
+            note_count = 0
+            base_id = now * 1000
+
+            with zipfile.ZipFile(temp_output, "w", zipfile.ZIP_DEFLATED) as package:
+                # Closed on failure too, before the temporary directory is deleted
+                with closing(sqlite3.connect(collection_path)) as conn:
+                    conn.executescript(COLLECTION_SCHEMA)
+                    conn.execute(
+                        "INSERT INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, ?, ?, ?, ?, '{}')",
+                        (now, now * 1000, now * 1000,
+                         json.dumps(self._collection_config()),
+                         json.dumps({str(APKG_MODEL_ID): self._model(deck_id, now)}),
+                         json.dumps(self._decks(deck_id, deck_name, now)),
+                         json.dumps({"1": DEFAULT_DECK_CONFIG}))
+                    )
+
+                    for card_data in cards:
+                        # Media is already compressed (WEBP/MP3); store it without deflating again
+                        for media_file in card_data.get("media_files", []):
+                            filename = media_filename(media_file)
+                            if filename not in media:
+                                entry_name = str(len(media))
+                                package.write(media_file, entry_name, compress_type=zipfile.ZIP_STORED)
+                                media[filename] = entry_name
+
+                        self._write_note(conn, card_data, base_id + note_count, deck_id, deck_name,
+                                         note_count, now, additional_tags)
+                        note_count += 1
+                        if note_count % APKG_COMMIT_INTERVAL == 0:
+                            conn.commit()
+
+                    conn.commit()
+
+                package.write(collection_path, "collection.anki2")
+                package.writestr("media", json.dumps({entry: name for name, entry in media.items()}))
+
+            os.replace(temp_output, output_path)
+            return {
+                "success": True,
+                "path": output_path,
+                "note_count": note_count,
+                "media_count": len(media)
+            }
+
+        except Exception as e:
+            if os.path.exists(temp_output):
+                os.remove(temp_output)
+            return {
+                "success": False,
+                "error": f"Error exporting package: {str(e)}"
+            }
+        finally:
+            for name in os.listdir(temp_dir):
+                os.remove(os.path.join(temp_dir, name))
+            os.rmdir(temp_dir)
+
+    def _write_note(self, conn, card_data, note_id, deck_id, deck_name, position, now, additional_tags):
+        """Insert one note and its card."""
+        fields = [card_data["fields"].get(name, "") for name in NOTE_TYPE_FIELDS]
+        tags = sorted(set(card_data.get("tags", []) + (additional_tags or []) + DEFAULT_TAGS))
+        sort_field = self._strip_html(fields[0])
+
+        conn.execute(
+            "INSERT INTO notes VALUES (?, ?, ?, ?, -1, ?, ?, ?, ?, 0, '')",
+            (note_id, self._guid(deck_name, fields), APKG_MODEL_ID, now,
+             f" {' '.join(tags)} ", "\x1f".join(fields), sort_field,
+             int(hashlib.sha1(sort_field.encode("utf-8")).hexdigest()[:8], 16))
+        )
+        # New card, due in the order the cards were exported
+        conn.execute(
+            "INSERT INTO cards VALUES (?, ?, ?, 0, ?, -1, 0, 0, ?, 0, 0, 0, 0, 0, 0, 0, 0, '')",
+            (note_id, note_id, deck_id, now, position + 1)
+        )
+
+    def _model(self, deck_id, now):
+        """The AnkiForge note type, as created in Anki by AnkiUploader."""
+        field = {"sticky": False, "rtl": False, "font": "Arial", "size": 20, "media": []}
+        return {
+            "id": APKG_MODEL_ID,
+            "name": ANKIFORGE_MODEL_NAME,
+            "type": 0,
+            "mod": now,
+            "usn": -1,
+            "sortf": 0,
+            "did": deck_id,
+            "tags": [],
+            "vers": [],
+            "flds": [{**field, "name": name, "ord": index} for index, name in enumerate(NOTE_TYPE_FIELDS)],
+            "tmpls": [{
+                "name": "Card 1",
+                "ord": 0,
+                "qfmt": NOTE_TYPE_FRONT,
+                "afmt": NOTE_TYPE_BACK,
+                "did": None,
+                "bqfmt": "",
+                "bafmt": ""
+            }],
+            "css": NOTE_TYPE_CSS,
+            "latexPre": "\\documentclass[12pt]{article}\n\\special{papersize=3in,5in}\n\\usepackage[utf8]{inputenc}\n"
+                        "\\usepackage{amssymb,amsmath}\n\\pagestyle{empty}\n\\setlength{\\parindent}{0in}\n"
+                        "\\begin{document}\n",
+            "latexPost": "\\end{document}",
+            "req": [[0, "any", [0]]]
+        }
+
+    def _decks(self, deck_id, deck_name, now):
+        """Deck definitions: Anki's default deck plus the export deck."""
+        def deck(did, name):
+            return {
+                "id": did, "name": name, "desc": "", "mod": now, "usn": -1, "collapsed": False,
+                "newToday": [0, 0], "revToday": [0, 0], "lrnToday": [0, 0], "timeToday": [0, 0],
+                "dyn": 0, "conf": 1, "extendNew": 10, "extendRev": 50
+            }
+        decks = {"1": deck(1, "Default")}
+        if deck_id != 1:
+            decks[str(deck_id)] = deck(deck_id, deck_name)
+        return decks
+
+    def _collection_config(self):
+        """Minimal collection configuration."""
+        return {
+            "activeDecks": [1], "curDeck": 1, "newSpread": 0, "collapseTime": 1200, "timeLim": 0,
+            "estTimes": True, "dueCounts": True, "curModel": None, "nextPos": 1,
+            "sortType": "noteFld", "sortBackwards": False, "addToCur": True
+        }
+
+    def _deck_id(self, deck_name):
+        """Stable deck ID derived from the deck name (Anki matches decks by name on import)."""
+        if deck_name == "Default":
+            return 1
+        return int(hashlib.sha1(deck_name.encode("utf-8")).hexdigest()[:12], 16)
+
+    def _guid(self, deck_name, fields):
+        """
+        Note GUID derived from the note's content: re-importing the same card does not
+        duplicate it, while different cards for the same word (which Anki would merge on
+        import if they shared a GUID) get different GUIDs.
+        """
+        digest = hashlib.sha256("\x1f".join([deck_name] + fields).encode("utf-8")).digest()
+        return base64.b64encode(digest[:10]).decode("ascii")
+
+    def _strip_html(self, text):
+        """Plain-text version of a field, as Anki stores in the sort field."""
+        text = re.sub(r"\[sound:[^\]]*\]", "", text)
+        text = re.sub(r"<[^>]+>", " ", text)
+        return " ".join(html.unescape(text).split())
@@ -1,10 +1,10 @@
-import requests
 import os
 import json
-import miniaudio
 import tempfile
-from io import BytesIO
 from config.config import FORVO_API_KEY, ELEVENLABS_API_KEY, AUDIO_PREFERENCE, ELEVENLABS_VOICE_ID
+from utils.lazy_import import lazy_import
+
+requests = lazy_import("requests")
 
 class AudioFetcher:
     """
@@ -18,7 +18,7 @@ class AudioFetcher:
         self.elevenlabs_api_key = ELEVENLABS_API_KEY
         self.elevenlabs_voice_id = ELEVENLABS_VOICE_ID
         
-    def get_audio(self, word, language, save_path=None, fallback_text=None):
+    def get_audio(self, word, language, save_path=None, fallback_text=None, sources=None):
         """
         Get audio pronunciation for a word, trying Forvo first and then ElevenLabs.
         
@@ -27,6 +27,7 @@ class AudioFetcher:
             language (str): The language of the word
             save_path (str, optional): Path to save the audio file
             fallback_text (str, optional): Text to use for TTS if word not found on Forvo
+            sources (list, optional): Only try these sources (default: AUDIO_PREFERENCE)
             
         Returns:
             dict: A dictionary containing:
@@ -37,7 +38,7 @@ class AudioFetcher:
                 - error (str): Error message if fetching failed
         """
         # Try sources in order of preference
-        for source in AUDIO_PREFERENCE:
+        for source in sources or AUDIO_PREFERENCE:
             if source == "Forvo":
                 result = self._get_from_forvo(word, language, save_path)
                 if result["success"]:
@@ -0,0 +1,252 @@
+import re
+import html
+import time
+import threading
+from config.config import GENDER_ARTICLES, DUPLICATE_INDEX_TTL, ANKIFORGE_MODEL_NAME
+
+# Articles stripped from note fronts so "der Hund" matches the word "Hund"
+ARTICLES = {article for articles in GENDER_ARTICLES.values() for article in articles.values()}
+
+# Number of note IDs requested per notesInfo call
+NOTES_INFO_CHUNK = 500
+
+class DeckIndex:
+    """
+    Integration responsible for detecting duplicate words before a card is generated,
+    using a locally cached index of the note fronts in each Anki deck.
+
+    Words whose cards were just uploaded or queued are remembered until a sync finds
+    them in Anki, so they are flagged even before the index expires.
+    """
+
+    def __init__(self, uploader, ttl=DUPLICATE_INDEX_TTL):
+        """
+        Initialize the DeckIndex.
+
+        Args:
+            uploader (AnkiUploader): Uploader used to talk to anki-mcp-server
+            ttl (float): Seconds before a deck's index is synced with Anki again
+        """
+        self.uploader = uploader
+        self.ttl = ttl
+        # deck_name -> {"synced_at": float, "fronts": {note_id: [keys]}, "keys": {key: note_id}, "added": set of keys}
+        self._decks = {}
+        self._lock = threading.Lock()
+        # Decks being synced by a background thread
+        self._syncing = set()
+
+    def find_duplicate(self, deck_name, word, wait=True):
+        """
+        Check whether a deck already has a note for a word.
+
+        Args:
+            deck_name (str): Name of the Anki deck
+            word (str): The word (optionally with its article) about to be turned into a card
+            wait (bool): Sync an outdated index before answering. With False (e.g. on the
+                Streamlit script thread) the cached index answers and is synced in the
+                background; without an index yet, Anki is asked with a single canAddNotes.
+
+        Returns:
+            dict: A dictionary containing:
+                - success (bool): Whether the check could be performed
+                - is_duplicate (bool): Whether a note for the word already exists
+                - note_id (int): ID of the existing note if known
+                - source (str): "index" or "canAddNotes"
+                - error (str): Error message if the check failed
+        """
+        try:
+            if wait:
+                indexed = self.sync(deck_name)
+            else:
+                indexed = self._has_index(deck_name)
+                self.sync_in_background(deck_name)
+
+            key = self._normalize(word)
+            with self._lock:
+                entry = self._decks.get(deck_name, {})
+                keys = entry.get("keys", {})
+                note_id = keys.get(key) or keys.get(self._strip_article(key))
+                added = bool({key, self._strip_article(key)} & entry.get("added", set()))
+            if note_id is not None or added:
+                return {
+                    "success": True,
+                    "is_duplicate": True,
+                    "note_id": note_id,
+                    "source": "index"
+                }
+            if indexed:
+                return {
+                    "success": True,
+                    "is_duplicate": False,
+                    "note_id": None,
+                    "source": "index"
+                }
+
+            # Fall back to asking Anki whether the note could be added
+            return self._check_can_add(deck_name, word)
+
+        except Exception as e:
+            return {
+                "success": False,
+                "is_duplicate": False,
+                "error": f"Error checking for duplicates: {str(e)}"
+            }
+
+    def sync(self, deck_name, force=False):
+        """
+        Bring a deck's index up to date. Only notes added since the last sync are fetched.
+
+        Args:
+            deck_name (str): Name of the Anki deck
+            force (bool): Sync even if the index is younger than the TTL
+
+        Returns:
+            bool: Whether the index is available
+        """
+        with self._lock:
+            entry = self._decks.get(deck_name)
+            if entry and not force and time.monotonic() - entry["synced_at"] < self.ttl:
+                return True
+            known_ids = set(entry["fronts"]) if entry else set()
+
+        escaped_deck = deck_name.replace('"', '\\"')
+        response = self.uploader.invoke("findNotes", query=f'"deck:{escaped_deck}"')
+        if response.get("error") or response.get("result") is None:
+            return False
+        note_ids = set(response["result"])
+
+        # Fetch fronts only for notes we have not seen yet
+        new_fronts = {}
+        new_ids = sorted(note_ids - known_ids)
+        for start in range(0, len(new_ids), NOTES_INFO_CHUNK):
+            info = self.uploader.invoke("notesInfo", notes=new_ids[start:start + NOTES_INFO_CHUNK])
+            if info.get("error"):
+                return False
+            for note in info.get("result") or []:
+                if note and note.get("fields"):
+                    new_fronts[note["noteId"]] = self._note_keys(note["fields"])
+
+        with self._lock:
+            entry = self._decks.setdefault(deck_name, self._new_entry())
+            # Drop notes deleted in Anki, then add the new ones
+            for note_id in set(entry["fronts"]) - note_ids:
+                for key in entry["fronts"].pop(note_id):
+                    if entry["keys"].get(key) == note_id:
+                        del entry["keys"][key]
+            for note_id, keys in new_fronts.items():
+                entry["fronts"][note_id] = keys
+                for key in keys:
+                    entry["keys"].setdefault(key, note_id)
+            # Remembered words are in the index once their notes have arrived
+            entry["added"] -= set(entry["keys"])
+            entry["synced_at"] = time.monotonic()
+        return True
+
+    def sync_in_background(self, deck_name):
+        """
+        Sync a deck's index in a background thread if it is outdated.
+
+        Args:
+            deck_name (str): Name of the Anki deck
+        """
+        with self._lock:
+            entry = self._decks.get(deck_name)
+            if deck_name in self._syncing or (entry and time.monotonic() - entry["synced_at"] < self.ttl):
+                return
+            self._syncing.add(deck_name)
+        threading.Thread(target=self._background_sync, args=(deck_name,), name="deck-index-sync", daemon=True).start()
+
+    def remember(self, deck_name, word):
+        """
+        Record a word whose card was uploaded or queued for upload, so it counts as a
+        duplicate until a sync finds its note.
+
+        Args:
+            deck_name (str): Name of the Anki deck
+            word (str): The word (optionally with its article)
+        """
+        key = self._normalize(word)
+        with self._lock:
+            entry = self._decks.setdefault(deck_name, self._new_entry())
+            entry["added"].add(self._strip_article(key))
+
+    def invalidate(self, deck_name=None):
+        """
+        Force the next lookup to sync with Anki.
+
+        Args:
+            deck_name (str, optional): Only invalidate this deck
+        """
+        with self._lock:
+            for name, entry in self._decks.items():
+                if deck_name is None or name == deck_name:
+                    entry["synced_at"] = 0
+
+    def _has_index(self, deck_name):
+        """Whether a deck has been synced at least once."""
+        with self._lock:
+            entry = self._decks.get(deck_name)
+            return bool(entry and entry["synced_at"])
+
+    def _background_sync(self, deck_name):
+        """Sync a deck's index (background thread started by sync_in_background)."""
+        try:
+            self.sync(deck_name)
+        except Exception as e:
+            print(f"Error syncing the index of deck '{deck_name}': {e}")
+        finally:
+            with self._lock:
+                self._syncing.discard(deck_name)
+
+    def _new_entry(self):
+        """Empty index of a deck that has not been synced."""
+        return {"synced_at": 0, "fronts": {}, "keys": {}, "added": set()}
+
+    def _check_can_add(self, deck_name, word):
+        """Ask Anki whether an AnkiForge note for this word would be a duplicate."""
+        # canAddNotes also answers false if the note type is missing (e.g. before the first upload)
+        if ANKIFORGE_MODEL_NAME not in self.uploader.get_model_names():
+            return {
+                "success": False,
+                "is_duplicate": False,
+                "error": f"The '{ANKIFORGE_MODEL_NAME}' note type does not exist yet, so duplicates cannot be checked"
+            }
+        response = self.uploader.invoke("canAddNotes", notes=[{
+            "deckName": deck_name,
+            "modelName": ANKIFORGE_MODEL_NAME,
+            # The Word field holds the word without its article
+            "fields": {"Word": self._strip_article(" ".join(word.split()))},
+            "options": {"allowDuplicate": False, "duplicateScope": "deck"}
+        }])
+        if response.get("error") or not response.get("result"):
+            return {
+                "success": False,
+                "is_duplicate": False,
+                "error": response.get("error") or "No result from canAddNotes"
+            }
+        return {
+            "success": True,
+            "is_duplicate": not response["result"][0],
+            "note_id": None,
+            "source": "canAddNotes"
+        }
+
+    def _note_keys(self, fields):
+        """Lookup keys for a note: its first field, with and without a leading article."""
+        first_field = min(fields.values(), key=lambda field: field.get("order", 0))
+        key = self._normalize(first_field.get("value", ""))
+        return list({key, self._strip_article(key)} - {""})
+
+    def _normalize(self, text):
+        """Reduce field HTML to lower-case plain text."""
+        text = re.sub(r"\[sound:[^\]]*\]", " ", text)
+        text = re.sub(r"<[^>]+>", " ", text)
+        text = html.unescape(text)
+        return " ".join(text.split()).lower()
+
+    def _strip_article(self, key):
+        """Remove a leading article ("der hund" -> "hund")."""
+        parts = key.split(" ", 1)
+        if len(parts) == 2 and parts[0].lower() in ARTICLES:
+            return parts[1]
+        return key
@@ -1,86 +1,271 @@
-import replicate
-from config.config import REPLICATE_API_KEY, DEFAULT_IMAGE_MODEL
+from config.config import REPLICATE_API_KEY, IMAGE_GENERATION_PROFILES, DEFAULT_IMAGE_PROFILE, MAX_IMAGE_CANDIDATES
 import os
-import requests
-from PIL import Image
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from utils.image_cache import ImageCache
+from utils.image_processor import ImageProcessor
+from integrations.prediction_registry import PredictionRegistry
+from utils.lazy_import import lazy_import
+
+replicate = lazy_import("replicate")
+requests = lazy_import("requests")
 
 class ImageGenerator:
     """
     Integration responsible for generating images from prompts using Replicate's SDXL model.
     """
-    
-    def __init__(self):
-        """Initialize the ImageGenerator with Replicate API key."""
+
+    def __init__(self, cache=None, processor=None):
+        """
+        Initialize the ImageGenerator with Replicate API key.
+
+        Args:
+            cache (ImageCache, optional): Cache for generated images (default: on-disk cache from config)
+            processor (ImageProcessor, optional): Output stage for generated images (default: IMAGE_OUTPUT_SETTINGS)
+        """
         os.environ["REPLICATE_API_TOKEN"] = REPLICATE_API_KEY
-        
-    def generate_image(self, prompt, model=DEFAULT_IMAGE_MODEL, save_path=None):
+        self.cache = cache or ImageCache()
+        self.processor = processor or ImageProcessor()
+        # Jobs for predictions started with submit_image, shared by every caller of this instance
+        self.jobs = PredictionRegistry(self._handle_prediction_output)
+
+    def generate_image(self, prompt, model=None, save_path=None, seed=None, use_cache=True, profile=DEFAULT_IMAGE_PROFILE, num_outputs=1):
         """
-        Generate an image from a prompt using Replicate's SDXL model.
-        
+        Generate an image from a prompt using Replicate's SDXL models.
+
+        Identical generation parameters are served from the local image cache
+        instead of running a new prediction. The result is resized and recompressed
+        according to IMAGE_OUTPUT_SETTINGS.
+
         Args:
             prompt (str): The image generation prompt
-            model (str): The Replicate model to use (default: SDXL)
-            save_path (str, optional): Path to save the generated image
-            
+            model (str, optional): The Replicate model to use (default: the profile's model)
+            save_path (str, optional): Path to save the generated image. The extension
+                is replaced to match the configured output format, and candidates are
+                numbered (_1, _2, ...) when num_outputs > 1.
+            seed (int, optional): Random seed for the prediction
+            use_cache (bool): Whether to look up and store results in the image cache
+            profile (str): Name of the generation profile in IMAGE_GENERATION_PROFILES
+                ("fast" for previews, "quality" for final images)
+            num_outputs (int): Number of candidate images to generate in the same prediction
+
         Returns:
             dict: A dictionary containing:
                 - success (bool): Whether the image generation was successful
-                - image_path (str): Path to the saved image if save_path is provided
-                - image_data (bytes): Raw image data if save_path is not provided
+                - image_path (str): Path to the saved (first) image if save_path is provided
+                - image_paths (list): Paths to all saved candidates if save_path is provided
+                - image_data (bytes): Processed (first) image data if save_path is not provided
+                - image_data_list (list): Processed data of all candidates if save_path is not provided
+                - cached (bool): Whether the image was served from the cache
                 - error (str): Error message if generation failed
         """
         try:
+            model, generation_input = self._build_input(prompt, profile, model, seed, num_outputs)
+            cache_keys = self._cache_keys(model, generation_input, use_cache)
+
+            # Serve from the cache if this exact image was generated before
+            cached_result = self._get_cached(cache_keys, save_path)
+            if cached_result:
+                return cached_result
+
             # Generate image using Replicate
-            output = replicate.run(
-                model,
-                input={
-                    "prompt": prompt,
-                    "negative_prompt": "low quality, blurry, distorted, deformed, disfigured, bad anatomy, watermark",
-                    "width": 768,
-                    "height": 768,
-                    "num_outputs": 1,
-                    "scheduler": "K_EULER",
-                    "num_inference_steps": 30,
-                    "guidance_scale": 7.5,
+            output = replicate.run(model, input=generation_input)
+
+            return self._handle_prediction_output(output, {"cache_keys": cache_keys, "save_path": save_path})
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Error generating image: {str(e)}"
+            }
+
+    def submit_image(self, prompt, model=None, save_path=None, seed=None, use_cache=True, profile=DEFAULT_IMAGE_PROFILE, num_outputs=1):
+        """
+        Start generating an image without waiting for the prediction to finish.
+
+        The prediction is created through Replicate's predictions API and polled in the
+        background. Use get_image_job() to read its state and cancel_image_job() to abandon it.
+
+        Args:
+            prompt (str): The image generation prompt
+            model (str, optional): The Replicate model to use (default: the profile's model)
+            save_path (str, optional): Path to save the generated image
+            seed (int, optional): Random seed for the prediction
+            use_cache (bool): Whether to look up and store results in the image cache
+            profile (str): Name of the generation profile in IMAGE_GENERATION_PROFILES
+                ("fast" for previews, "quality" for final images)
+            num_outputs (int): Number of candidate images to generate in the same prediction
+
+        Returns:
+            dict: A dictionary containing:
+                - success (bool): Whether the job was submitted
+                - job_id (str): ID of the image job
+                - error (str): Error message if submitting failed
+        """
+        try:
+            model, generation_input = self._build_input(prompt, profile, model, seed, num_outputs)
+            cache_keys = self._cache_keys(model, generation_input, use_cache)
+
+            # Cache hits finish immediately without a prediction
+            cached_result = self._get_cached(cache_keys, save_path)
+            if cached_result:
+                return {
+                    "success": True,
+                    "job_id": self.jobs.add(result=cached_result)
                 }
+
+            prediction = self._create_prediction(model, generation_input)
+            job_id = self.jobs.add(
+                prediction_id=prediction.id,
+                context={"cache_keys": cache_keys, "save_path": save_path}
             )
-            
-            # Replicate returns a list of image URLs
-            if output and len(output) > 0:
-                image_url = output[0]
-                
-                # Download the image
-                response = requests.get(image_url)
-                if response.status_code == 200:
-                    image_data = response.content
-                    
-                    # Save the image if a path is provided
-                    if save_path:
-                        img = Image.open(BytesIO(image_data))
-                        img.save(save_path)
-                        return {
-                            "success": True,
-                            "image_path": save_path
-                        }
-                    else:
-                        return {
-                            "success": True,
-                            "image_data": image_data
-                        }
-                else:
-                    return {
-                        "success": False,
-                        "error": f"Failed to download image: HTTP {response.status_code}"
-                    }
-            else:
+            return {
+                "success": True,
+                "job_id": job_id
+            }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Error starting image generation: {str(e)}"
+            }
+
+    def get_image_job(self, job_id):
+        """
+        Get the state of an image job started with submit_image().
+
+        Args:
+            job_id (str): The job ID returned by submit_image()
+
+        Returns:
+            dict | None: The job (see PredictionRegistry.get), whose "result" has the same
+                         format as generate_image() once the job has finished
+        """
+        return self.jobs.get(job_id)
+
+    def cancel_image_job(self, job_id):
+        """
+        Cancel an image job and its Replicate prediction.
+
+        Args:
+            job_id (str): The job ID returned by submit_image()
+
+        Returns:
+            bool: Whether a running job was canceled
+        """
+        return self.jobs.cancel(job_id)
+
+    def _build_input(self, prompt, profile, model=None, seed=None, num_outputs=1):
+        """Build the Replicate model reference and input for a prompt and generation profile."""
+        if profile not in IMAGE_GENERATION_PROFILES:
+            raise ValueError(f"Unknown image generation profile: {profile}")
+        if not 1 <= num_outputs <= MAX_IMAGE_CANDIDATES:
+            raise ValueError(f"num_outputs must be between 1 and {MAX_IMAGE_CANDIDATES}")
+        settings = IMAGE_GENERATION_PROFILES[profile]
+
+        generation_input = {
+            "prompt": prompt,
+            "negative_prompt": settings["negative_prompt"],
+            "width": settings["width"],
+            "height": settings["height"],
+            "num_outputs": num_outputs,
+            "scheduler": settings["scheduler"],
+            "num_inference_steps": settings["num_inference_steps"],
+            "guidance_scale": settings["guidance_scale"],
+        }
+        if seed is not None:
+            generation_input["seed"] = seed
+        return model or settings["model"], generation_input
+
+    def _cache_keys(self, model, generation_input, use_cache):
+        """Build one cache key per requested candidate image, or None if caching is disabled."""
+        if not use_cache:
+            return None
+        params = {"model": model, **generation_input}
+        if generation_input["num_outputs"] == 1:
+            return [ImageCache.make_key(params)]
+        return [ImageCache.make_key({**params, "candidate": index})
+                for index in range(generation_input["num_outputs"])]
+
+    def _create_prediction(self, model, generation_input):
+        """Create a Replicate prediction for "owner/name:version" or "owner/name" model references."""
+        if ":" in model:
+            version = model.split(":", 1)[1]
+            return replicate.predictions.create(version=version, input=generation_input)
+        return replicate.models.predictions.create(model=model, input=generation_input)
+
+    def _get_cached(self, cache_keys, save_path):
+        """Return the generate_image result if every candidate is cached, or None on a miss."""
+        if not cache_keys:
+            return None
+        cached_paths = [self.cache.get(cache_key) for cache_key in cache_keys]
+        if not all(cached_paths):
+            return None
+
+        images_data = []
+        for cached_path in cached_paths:
+            with open(cached_path, "rb") as f:
+                images_data.append(f.read())
+        return self._finish_images(images_data, save_path, cached=True)
+
+    def _handle_prediction_output(self, output, context):
+        """Download, cache and post-process the output of a finished prediction."""
+        # Replicate returns a list of image URLs
+        if not output or len(output) == 0:
+            return {
+                "success": False,
+                "error": "No image was generated"
+            }
+
+        image_urls = [str(url) for url in output]
+
+        # Download all candidates concurrently
+        with ThreadPoolExecutor(max_workers=len(image_urls)) as executor:
+            responses = list(executor.map(requests.get, image_urls))
+
+        for response in responses:
+            if response.status_code != 200:
                 return {
                     "success": False,
-                    "error": "No image was generated"
+                    "error": f"Failed to download image: HTTP {response.status_code}"
                 }
-                
-        except Exception as e:
+        images_data = [response.content for response in responses]
+
+        cache_keys = context.get("cache_keys")
+        if cache_keys and len(cache_keys) == len(images_data):
+            for cache_key, image_url, image_data in zip(cache_keys, image_urls, images_data):
+                extension = os.path.splitext(image_url.split("?")[0])[1] or ".png"
+                self.cache.put(cache_key, image_data, extension)
+
+        return self._finish_images(images_data, context.get("save_path"), cached=False)
+
+    def _finish_images(self, images_data, save_path, cached):
+        """Run the output stage on every candidate and build the generate_image result."""
+        if save_path and len(images_data) > 1:
+            base, extension = os.path.splitext(save_path)
+            save_paths = [f"{base}_{index + 1}{extension}" for index in range(len(images_data))]
+        else:
+            save_paths = [save_path] * len(images_data)
+
+        # The encoding itself runs in the processor's worker pool
+        with ThreadPoolExecutor(max_workers=len(images_data)) as executor:
+            results = list(executor.map(self.processor.process, images_data, save_paths))
+
+        for result in results:
+            if not result["success"]:
+                return result
+
+        if save_path:
+            image_paths = [result["image_path"] for result in results]
             return {
-                "success": False,
-                "error": f"Error generating image: {str(e)}"
+                "success": True,
+                "image_path": image_paths[0],
+                "image_paths": image_paths,
+                "cached": cached
             }
+        images = [result["image_data"] for result in results]
+        return {
+            "success": True,
+            "image_data": images[0],
+            "image_data_list": images,
+            "cached": cached
+        }
@@ -0,0 +1,70 @@
+import os
+import json
+import threading
+from config.config import MEDIA_MANIFEST_PATH
+
+class MediaManifest:
+    """
+    Integration responsible for remembering which media files have already been
+    stored in an Anki collection, so unchanged media is never uploaded twice.
+    """
+
+    def __init__(self, scope, path=MEDIA_MANIFEST_PATH):
+        """
+        Initialize the MediaManifest.
+
+        Args:
+            scope (str): Identifies the collection (e.g. the anki-mcp-server URL)
+            path (str): JSON file the manifest is persisted to
+        """
+        self.scope = scope
+        self.path = path
+        self._lock = threading.Lock()
+        self._names = set(self._load().get(scope, []))
+
+    def __contains__(self, filename):
+        with self._lock:
+            return filename in self._names
+
+    def add(self, filenames):
+        """
+        Record media files as stored in the collection.
+
+        Args:
+            filenames (iterable): Stored media filenames
+        """
+        with self._lock:
+            new_names = set(filenames) - self._names
+            if not new_names:
+                return
+            self._names |= new_names
+            self._save()
+
+    def replace(self, filenames):
+        """
+        Replace the manifest with the media actually present in the collection.
+
+        Args:
+            filenames (iterable): Media filenames reported by Anki
+        """
+        with self._lock:
+            self._names = set(filenames)
+            self._save()
+
+    def _load(self):
+        """Read the manifest file for all scopes."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self):
+        """Write the manifest atomically. Must be called with the lock held."""
+        data = self._load()
+        data[self.scope] = sorted(self._names)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,65 @@
+from config.config import ANKIFORGE_MODEL_NAME
+
+# Fields of the AnkiForge note type, in order. The first field (Word) is Anki's duplicate check key.
+NOTE_TYPE_FIELDS = ["Word", "Article", "Plural", "Definition", "Sentence", "Audio", "Image", "Conjugations"]
+
+NOTE_TYPE_FRONT = """<div class="card-front">
+<div class="word">{{#Article}}{{Article}} {{/Article}}{{Word}}</div>
+{{#Audio}}<div class="audio">{{Audio}}</div>{{/Audio}}
+{{#Image}}<div class="image">{{Image}}</div>{{/Image}}
+</div>"""
+
+NOTE_TYPE_BACK = """<div class="card-back">
+<div class="word">{{#Article}}{{Article}} {{/Article}}{{Word}}</div>
+<div class="definition">{{Definition}}</div>
+<div class="sentence">{{Sentence}}</div>
+{{#Plural}}<div class="metadata"><div class="plural">Plural: {{Plural}}</div></div>{{/Plural}}
+{{#Conjugations}}<div class="conjugations">
+<h4>Present Tense Conjugations</h4>
+<table class="conjugation-table">
+<thead><tr><th>Person</th><th>Conjugation</th></tr></thead>
+<tbody>{{Conjugations}}</tbody>
+</table>
+</div>{{/Conjugations}}
+</div>"""
+
+# Stylesheet shared by every AnkiForge note (stored once in the note type, not per card)
+NOTE_TYPE_CSS = """.card {
+    font-family: arial;
+    font-size: 20px;
+    text-align: center;
+    color: black;
+    background-color: white;
+}
+.word { font-size: 32px; font-weight: bold; margin-bottom: 10px; }
+.image img { max-width: 100%; max-height: 300px; }
+.definition { margin: 10px 0; }
+.sentence { font-style: italic; margin: 10px 0; }
+.grammar-note { font-size: 16px; color: #6c757d; margin-top: 5px; }
+.metadata { font-size: 16px; margin-top: 10px; }
+.conjugation-table { width: 100%; border-collapse: collapse; }
+.conjugation-table th, .conjugation-table td { text-align: left; padding: 5px; border-bottom: 1px solid #ddd; }
+.conjugation-table .wrong { text-decoration: line-through; color: #dc3545; }
+.conjugation-table .correct { color: #28a745; margin-left: 5px; }
+"""
+
+def create_model_params():
+    """
+    Get the AnkiConnect createModel parameters for the AnkiForge note type.
+
+    Returns:
+        dict: Parameters for the "createModel" action
+    """
+    return {
+        "modelName": ANKIFORGE_MODEL_NAME,
+        "inOrderFields": NOTE_TYPE_FIELDS,
+        "css": NOTE_TYPE_CSS,
+        "isCloze": False,
+        "cardTemplates": [
+            {
+                "Name": "Card 1",
+                "Front": NOTE_TYPE_FRONT,
+                "Back": NOTE_TYPE_BACK
+            }
+        ]
+    }
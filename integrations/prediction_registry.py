@@ -0,0 +1,201 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config.config import PREDICTION_POLL_INTERVAL, PREDICTION_JOB_RETENTION, PREDICTION_COMPLETION_WORKERS
+from utils.lazy_import import lazy_import
+
+replicate = lazy_import("replicate")
+
+# Replicate prediction statuses that will not change anymore
+FINISHED_STATUSES = ("succeeded", "failed", "canceled")
+
+class PredictionRegistry:
+    """
+    Integration responsible for tracking asynchronous Replicate predictions as jobs.
+
+    Predictions are polled by a single background thread, so callers (e.g. Streamlit
+    reruns) only read the latest job state from memory and never block on Replicate.
+    Succeeded predictions are handed to a small worker pool for on_complete, so
+    downloading one prediction's output never delays polling the others.
+    """
+
+    def __init__(self, on_complete, poll_interval=PREDICTION_POLL_INTERVAL, retention=PREDICTION_JOB_RETENTION,
+                 completion_workers=PREDICTION_COMPLETION_WORKERS):
+        """
+        Initialize the PredictionRegistry.
+
+        Args:
+            on_complete (callable): Called as on_complete(output, context) in a worker thread
+                when a prediction succeeds. Must return a result dict with a "success" key.
+            poll_interval (float): Seconds between two status polls
+            retention (float): Seconds a finished job is kept before it is forgotten
+            completion_workers (int): Threads running on_complete
+        """
+        self.on_complete = on_complete
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._completions = ThreadPoolExecutor(max_workers=completion_workers, thread_name_prefix="replicate-output")
+
+    def add(self, prediction_id=None, context=None, result=None):
+        """
+        Register a new job.
+
+        Args:
+            prediction_id (str, optional): ID of a running Replicate prediction
+            context (dict, optional): Data passed to on_complete when the prediction succeeds
+            result (dict, optional): Final result for jobs that finished without a prediction
+                (e.g. cache hits)
+
+        Returns:
+            str: The job ID
+        """
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "prediction_id": prediction_id,
+            "status": "starting" if prediction_id else "succeeded",
+            "context": context or {},
+            "result": result,
+            "error": result.get("error") if result else None,
+            "handling_output": False,
+            "created_at": now,
+            "updated_at": now
+        }
+
+        with self._lock:
+            self._jobs[job["id"]] = job
+            if prediction_id and self._thread is None:
+                self._thread = threading.Thread(target=self._poll_loop, name="replicate-poller", daemon=True)
+                self._thread.start()
+
+        return job["id"]
+
+    def get(self, job_id):
+        """
+        Get the latest state of a job.
+
+        Args:
+            job_id (str): The job ID returned by add()
+
+        Returns:
+            dict | None: A copy of the job containing:
+                - status (str): "starting", "processing", "succeeded", "failed" or "canceled"
+                - result (dict): Final result once the job has finished
+                - error (str): Error message if the job failed
+              or None if the job is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def cancel(self, job_id):
+        """
+        Cancel a running job and its Replicate prediction.
+
+        Args:
+            job_id (str): The job ID returned by add()
+
+        Returns:
+            bool: Whether the job was still running and has been canceled
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job["status"] in FINISHED_STATUSES:
+                return False
+            self._finish(job, "canceled", {"success": False, "error": "Image generation was canceled"})
+            prediction_id = job["prediction_id"]
+
+        try:
+            replicate.predictions.cancel(prediction_id)
+        except Exception as e:
+            print(f"Error canceling prediction {prediction_id}: {e}")
+        return True
+
+    def _poll_loop(self):
+        """Poll all running predictions until none are left."""
+        while True:
+            time.sleep(self.poll_interval)
+
+            with self._lock:
+                self._prune()
+                running = [job for job in self._jobs.values()
+                           if job["status"] not in FINISHED_STATUSES and not job["handling_output"]]
+                if not running:
+                    self._thread = None
+                    return
+
+            for job in running:
+                self._poll_job(job)
+
+    def _poll_job(self, job):
+        """Fetch the status of a single prediction and finish its job when done (succeeded ones via _complete)."""
+        try:
+            prediction = replicate.predictions.get(job["prediction_id"])
+        except Exception as e:
+            # Transient API errors are retried on the next poll
+            print(f"Error polling prediction {job['prediction_id']}: {e}")
+            return
+
+        if prediction.status == "succeeded":
+            with self._lock:
+                # The job may have been canceled while we were polling
+                if job["status"] in FINISHED_STATUSES:
+                    return
+                job["status"] = "processing"
+                job["handling_output"] = True
+                job["updated_at"] = time.time()
+            self._completions.submit(self._complete, job, prediction.output)
+            return
+
+        if prediction.status in ("failed", "canceled"):
+            status = prediction.status
+            result = {
+                "success": False,
+                "error": f"Image generation {prediction.status}: {prediction.error or 'no details'}"
+            }
+        else:
+            status = prediction.status
+            result = None
+
+        with self._lock:
+            # The job may have been canceled while we were polling
+            if job["status"] in FINISHED_STATUSES:
+                return
+            if status in FINISHED_STATUSES:
+                self._finish(job, status, result)
+            else:
+                job["status"] = status
+                job["updated_at"] = time.time()
+
+    def _complete(self, job, output):
+        """Run on_complete for a succeeded prediction (in a worker thread) and finish its job."""
+        try:
+            result = self.on_complete(output, job["context"])
+        except Exception as e:
+            result = {
+                "success": False,
+                "error": f"Error handling prediction output: {str(e)}"
+            }
+
+        with self._lock:
+            if job["status"] in FINISHED_STATUSES:
+                return
+            self._finish(job, "succeeded" if result.get("success") else "failed", result)
+
+    def _finish(self, job, status, result):
+        """Mark a job as finished. Must be called with the lock held."""
+        job["status"] = status
+        job["result"] = result
+        job["error"] = result.get("error") if result else None
+        job["updated_at"] = time.time()
+
+    def _prune(self):
+        """Forget finished jobs older than the retention period. Must be called with the lock held."""
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job["status"] in FINISHED_STATUSES and job["updated_at"] < cutoff]:
+            del self._jobs[job_id]
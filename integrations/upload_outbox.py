@@ -0,0 +1,367 @@
+import os
+import re
+import json
+import time
+import shutil
+import threading
+from config.config import (
+    OUTBOX_DB_PATH, OUTBOX_MEDIA_DIR, OUTBOX_BATCH_SIZE, OUTBOX_POLL_INTERVAL,
+    OUTBOX_RETRY_BASE_DELAY, OUTBOX_RETRY_MAX_DELAY, OUTBOX_MAX_ATTEMPTS, OUTBOX_UPLOADED_RETENTION,
+    DEFAULT_DECK_NAME, DEFAULT_MODEL_NAME
+)
+from utils.media import media_filename
+from utils.sqlite_connection import SQLiteConnection
+
+# Error fragments that mean Anki (or anki-mcp-server) is unavailable rather than the card being invalid
+TRANSIENT_ERRORS = ("connect", "HTTP error", "not responding", "timed out", "circuit")
+
+# Status code of an HTTP error message (client errors other than these are permanent)
+HTTP_STATUS = re.compile(r"HTTP error:?\s*(\d{3})")
+TRANSIENT_HTTP_STATUSES = (408, 429)
+
+# Seconds after which a card claimed by a crashed worker is retried
+STALE_CLAIM_SECONDS = 10 * 60
+
+class UploadOutbox:
+    """
+    Integration responsible for queueing compiled cards durably (SQLite plus a copy of
+    their media) and flushing them to Anki in the background, so card creation never
+    waits on Anki being available.
+    """
+
+    def __init__(self, uploader, db_path=OUTBOX_DB_PATH, media_dir=OUTBOX_MEDIA_DIR, start_worker=True):
+        """
+        Initialize the UploadOutbox.
+
+        Args:
+            uploader (AnkiUploader): Uploader used to flush queued cards
+            db_path (str): Path of the SQLite outbox database
+            media_dir (str): Directory holding copies of the queued cards' media
+            start_worker (bool): Whether to start the background flushing thread
+        """
+        self.uploader = uploader
+        self.db_path = db_path
+        self.media_dir = media_dir
+        self.last_error = None
+        self._wake = threading.Event()
+        self._thread = None
+
+        os.makedirs(self.media_dir, exist_ok=True)
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._init_db()
+
+        if start_worker:
+            self._thread = threading.Thread(target=self._worker_loop, name="anki-outbox", daemon=True)
+            self._thread.start()
+
+    def enqueue(self, card_data, deck_name=DEFAULT_DECK_NAME, model_name=DEFAULT_MODEL_NAME, additional_tags=None):
+        """
+        Queue a compiled card for upload to Anki.
+
+        Args:
+            card_data (dict): Compiled card data (see AnkiUploader.upload_card)
+            deck_name (str): Name of the Anki deck to add the card to
+            model_name (str): Name of the Anki note model to use
+            additional_tags (list, optional): Additional tags to add to the card
+
+        Returns:
+            dict: A dictionary containing:
+                - success (bool): Whether the card was queued
+                - outbox_id (int): ID of the queued entry
+                - error (str): Error message if queueing failed
+        """
+        try:
+            # Keep our own copy of the media so session cleanup cannot lose it
+            media_files = []
+            for media_file in card_data.get("media_files", []):
+                outbox_path = os.path.join(self.media_dir, media_filename(media_file))
+                if os.path.exists(outbox_path):
+                    # Mark as recently used so cleanup leaves it alone until the card is stored
+                    os.utime(outbox_path, None)
+                else:
+                    shutil.copyfile(media_file, outbox_path)
+                media_files.append(outbox_path)
+            card_data = {**card_data, "media_files": media_files}
+
+            with self._connect() as conn:
+                conn.execute("BEGIN")
+                cursor = conn.execute(
+                    """
+                    INSERT INTO outbox (card_json, deck_name, model_name, tags_json, status,
+                                        attempts, next_attempt_at, created_at)
+                    VALUES (?, ?, ?, ?, 'pending', 0, ?, ?)
+                    """,
+                    (json.dumps(card_data), deck_name, model_name, json.dumps(additional_tags or []),
+                     time.time(), time.time())
+                )
+                outbox_id = cursor.lastrowid
+                conn.executemany(
+                    "INSERT OR IGNORE INTO outbox_media (outbox_id, filename) VALUES (?, ?)",
+                    [(outbox_id, os.path.basename(path)) for path in media_files]
+                )
+
+            self._wake.set()
+            return {
+                "success": True,
+                "outbox_id": outbox_id
+            }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Error queueing card: {str(e)}"
+            }
+
+    def status(self):
+        """
+        Summarize the outbox for display.
+
+        Returns:
+            dict: A dictionary containing:
+                - pending (int): Cards waiting to be uploaded
+                - failed (int): Cards that were rejected and need attention
+                - uploaded (int): Cards uploaded successfully (within OUTBOX_UPLOADED_RETENTION)
+                - next_attempt_at (float | None): When the next upload attempt is due
+                - last_error (str | None): Most recent upload error
+        """
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+            next_attempt_at = conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'"
+            ).fetchone()[0]
+        return {
+            "pending": counts.get("pending", 0) + counts.get("uploading", 0),
+            "failed": counts.get("failed", 0),
+            "uploaded": counts.get("uploaded", 0),
+            "next_attempt_at": next_attempt_at,
+            "last_error": self.last_error
+        }
+
+    def failed_entries(self):
+        """Get the queued cards Anki rejected, with their errors."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, card_json, deck_name, last_error FROM outbox WHERE status = 'failed' ORDER BY id"
+            ).fetchall()
+        return [
+            {"outbox_id": row[0], "card_data": json.loads(row[1]), "deck_name": row[2], "error": row[3]}
+            for row in rows
+        ]
+
+    def retry_failed(self):
+        """Move every failed card back into the queue and flush immediately."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE outbox SET status = 'pending', attempts = 0, retries = 0, next_attempt_at = ? WHERE status = 'failed'",
+                (time.time(),)
+            )
+        self._wake.set()
+
+    def flush(self):
+        """
+        Upload all due cards now, in batches of OUTBOX_BATCH_SIZE.
+
+        Returns:
+            int: Number of cards uploaded
+        """
+        uploaded = 0
+        while True:
+            entries = self._claim_batch()
+            if not entries:
+                return uploaded
+            uploaded += self._upload_batch(entries)
+
+    def _worker_loop(self):
+        """Flush the outbox whenever cards are queued or a retry is due."""
+        while True:
+            self._wake.wait(OUTBOX_POLL_INTERVAL)
+            self._wake.clear()
+            # Leave cards queued while Anki is known to be down
+            if not self.uploader.is_available():
+                continue
+            try:
+                self.flush()
+            except Exception as e:
+                self.last_error = f"Outbox worker error: {str(e)}"
+                print(self.last_error)
+
+    def _claim_batch(self):
+        """Atomically mark a batch of due cards as being uploaded and return them."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Release cards claimed by a worker that died mid-upload
+            conn.execute(
+                "UPDATE outbox SET status = 'pending' WHERE status = 'uploading' AND claimed_at < ?",
+                (now - STALE_CLAIM_SECONDS,)
+            )
+            rows = conn.execute(
+                """
+                SELECT id, card_json, deck_name, model_name, tags_json, attempts, retries FROM outbox
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                ORDER BY id LIMIT ?
+                """,
+                (now, OUTBOX_BATCH_SIZE)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox SET status = 'uploading', claimed_at = ? WHERE id = ?",
+                [(now, row[0]) for row in rows]
+            )
+        return [
+            {
+                "id": row[0],
+                "card_data": json.loads(row[1]),
+                "deck_name": row[2],
+                "model_name": row[3],
+                "tags": json.loads(row[4]),
+                "attempts": row[5],
+                "retries": row[6]
+            }
+            for row in rows
+        ]
+
+    def _upload_batch(self, entries):
+        """Upload claimed cards grouped by deck/model/tags and record each outcome."""
+        groups = {}
+        for entry in entries:
+            key = (entry["deck_name"], entry["model_name"], tuple(entry["tags"]))
+            groups.setdefault(key, []).append(entry)
+
+        uploaded = 0
+        for (deck_name, model_name, tags), group in groups.items():
+            results = self.uploader.upload_cards(
+                [entry["card_data"] for entry in group],
+                deck_name=deck_name,
+                model_name=model_name,
+                additional_tags=list(tags)
+            )
+            for entry, result in zip(group, results):
+                if result["success"]:
+                    self._mark_uploaded(entry, result.get("card_id"))
+                    uploaded += 1
+                else:
+                    self._mark_failed_attempt(entry, result["error"])
+
+        self._purge_uploaded()
+        self._cleanup_media()
+        return uploaded
+
+    def _mark_uploaded(self, entry, note_id):
+        """Record a successful upload."""
+        self.last_error = None
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE outbox SET status = 'uploaded', note_id = ?, uploaded_at = ?, last_error = NULL WHERE id = ?",
+                (note_id, time.time(), entry["id"])
+            )
+
+    def _mark_failed_attempt(self, entry, error):
+        """
+        Schedule a retry with exponential backoff, or give up on cards Anki keeps rejecting.
+
+        Every failure counts towards the backoff (retries), but only rejections (including
+        HTTP client errors) count towards OUTBOX_MAX_ATTEMPTS (attempts): Anki being
+        offline is retried forever.
+        """
+        self.last_error = error
+        retries = entry["retries"] + 1
+        attempts = entry["attempts"] if self._is_transient(error) else entry["attempts"] + 1
+
+        # Retrying a duplicate can never succeed
+        if "duplicate" in str(error).lower() or attempts >= OUTBOX_MAX_ATTEMPTS:
+            status, next_attempt_at = "failed", None
+        else:
+            status = "pending"
+            next_attempt_at = time.time() + min(OUTBOX_RETRY_BASE_DELAY * 2 ** min(retries - 1, 16), OUTBOX_RETRY_MAX_DELAY)
+
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, retries = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (status, attempts, retries, next_attempt_at, str(error), entry["id"])
+            )
+
+    @staticmethod
+    def _is_transient(error):
+        """Whether an upload error means Anki is unavailable rather than the card being rejected."""
+        error = str(error)
+        status = HTTP_STATUS.search(error)
+        if status:
+            # Client errors (e.g. 413 for a media file that is too large) won't go away by retrying
+            code = int(status.group(1))
+            return not (400 <= code < 500) or code in TRANSIENT_HTTP_STATUSES
+        return any(fragment.lower() in error.lower() for fragment in TRANSIENT_ERRORS)
+
+    def _purge_uploaded(self):
+        """Delete cards uploaded longer than OUTBOX_UPLOADED_RETENTION ago."""
+        cutoff = time.time() - OUTBOX_UPLOADED_RETENTION
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            conn.execute(
+                """
+                DELETE FROM outbox_media WHERE outbox_id IN
+                    (SELECT id FROM outbox WHERE status = 'uploaded' AND uploaded_at < ?)
+                """,
+                (cutoff,)
+            )
+            conn.execute("DELETE FROM outbox WHERE status = 'uploaded' AND uploaded_at < ?", (cutoff,))
+
+    def _cleanup_media(self):
+        """Delete media copies no longer referenced by a queued card."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT DISTINCT outbox_media.filename FROM outbox_media
+                JOIN outbox ON outbox.id = outbox_media.outbox_id
+                WHERE outbox.status != 'uploaded'
+                """
+            ).fetchall()
+        referenced = {row[0] for row in rows}
+
+        # Files touched recently may belong to a card that is being queued right now
+        cutoff = time.time() - 60
+        for entry in os.scandir(self.media_dir):
+            if entry.is_file() and entry.name not in referenced and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def _connect(self):
+        """Open a connection to the outbox database (one per operation, safe across threads)."""
+        return SQLiteConnection(self.db_path, autocommit=True)
+
+    def _init_db(self):
+        """Create the outbox tables if needed."""
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    card_json TEXT NOT NULL,
+                    deck_name TEXT NOT NULL,
+                    model_name TEXT NOT NULL,
+                    tags_json TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    retries INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL,
+                    claimed_at REAL,
+                    last_error TEXT,
+                    note_id INTEGER,
+                    created_at REAL NOT NULL,
+                    uploaded_at REAL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, next_attempt_at)")
+            # Media file names per card, so cleanup doesn't have to parse every queued card
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS outbox_media (
+                    outbox_id INTEGER NOT NULL,
+                    filename TEXT NOT NULL,
+                    PRIMARY KEY (outbox_id, filename)
+                )
+                """
+            )
@@ -0,0 +1,442 @@
+import os
+import csv
+import json
+import time
+import queue
+import tempfile
+import threading
+from config.config import (
+    BULK_STAGE_CONCURRENCY, BULK_QUEUE_SIZE, DEFAULT_LANGUAGE, DEFAULT_IMAGE_PROFILE,
+    DEFAULT_DECK_NAME, ANKI_BATCH_SIZE
+)
+from pipeline.card_pipeline import CardPipeline, safe_filename
+from pipeline.job_store import BulkJobStore
+
+# Stages every card passes through, in order
+BULK_STAGES = ["validate", "definition", "audio", "grammar", "prompt", "image", "compile"]
+
+# Stages whose output is a media file, which must still exist for a checkpoint to count
+MEDIA_STAGES = {"audio": "audio_path", "image": "image_path"}
+
+# Ways of delivering the compiled cards
+DELIVERY_MODES = ["none", "anki", "outbox", "apkg"]
+
+REPORT_COLUMNS = [
+    "row", "word", "status", "resumed", "failed_stage", "error", "warnings",
+    "definition", "audio_path", "image_path", "note_id", "seconds"
+]
+
+# Marks the end of the stream between stages
+_DONE = object()
+
+def read_word_list(path):
+    """
+    Stream the rows of a CSV or TSV word list.
+
+    The file needs a header with at least "word" and "sentence" columns; "type",
+    "gender" and "plural" are optional.
+
+    Args:
+        path (str): Path to the .csv or .tsv file
+
+    Yields:
+        tuple: (line number, row dictionary with lower-case column names)
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if path.lower().endswith(".tsv"):
+            delimiter = "\t"
+        else:
+            try:
+                delimiter = csv.Sniffer().sniff(f.read(4096), delimiters=",;\t").delimiter
+            except csv.Error:
+                delimiter = ","
+            f.seek(0)
+
+        for line_number, row in enumerate(csv.DictReader(f, delimiter=delimiter), start=2):
+            row = {(key or "").strip().lower(): (value or "").strip() for key, value in row.items()}
+            if row.get("word"):
+                yield line_number, row
+
+
+class BulkPipeline:
+    """
+    Utility responsible for turning a whole word list into cards. Each stage runs its own
+    pool of workers (sized by BULK_STAGE_CONCURRENCY), and stages are connected by
+    bounded queues, so a slow stage holds back the earlier ones instead of buffering
+    the whole list in memory.
+
+    Runs with a job ID checkpoint every card after each stage, so an interrupted run
+    picks up from each card's last completed stage.
+    """
+
+    def __init__(self, card_pipeline=None, concurrency=None, queue_size=BULK_QUEUE_SIZE, job_store=None):
+        """
+        Initialize the BulkPipeline.
+
+        Args:
+            card_pipeline (CardPipeline, optional): Pipeline providing the agents and integrations
+            concurrency (dict, optional): Workers per stage (default: BULK_STAGE_CONCURRENCY)
+            queue_size (int): Cards waiting between two stages before the earlier stage blocks
+            job_store (BulkJobStore, optional): Checkpoint store for runs with a job ID
+                (default: created on first use)
+        """
+        self.card_pipeline = card_pipeline or CardPipeline()
+        self.concurrency = {**BULK_STAGE_CONCURRENCY, **(concurrency or {})}
+        self.queue_size = queue_size
+        self.job_store = job_store
+
+    def run(self, rows, output_dir=None, language=DEFAULT_LANGUAGE, generate_image=True,
+            image_profile=DEFAULT_IMAGE_PROFILE, deliver="none", deck_name=DEFAULT_DECK_NAME,
+            apkg_path=None, report_path=None, job_id=None, source=None):
+        """
+        Run every row through the pipeline and deliver the compiled cards.
+
+        Args:
+            rows (iterable): (line number, row) tuples, e.g. from read_word_list
+            output_dir (str, optional): Directory for the generated audio and images
+                (default: the job's media directory, or a new temporary directory)
+            language (str): Language of the words
+            generate_image (bool): Whether to generate an image for each sentence
+            image_profile (str): Image generation profile ("fast" or "quality")
+            deliver (str): "none", "anki" (upload now), "outbox" (queue for upload) or "apkg"
+            deck_name (str): Anki deck for the cards
+            apkg_path (str, optional): Package to write when deliver is "apkg"
+            report_path (str, optional): Where to write the per-card report (.csv or .json)
+            job_id (str, optional): Checkpoint the run under this ID, resuming it if it exists.
+                Completed stages are skipped and cards already uploaded are not uploaded again.
+            source (str, optional): Where the rows come from, stored with the job
+
+        Returns:
+            dict: A dictionary containing:
+                - success (bool): Whether the run completed (individual cards may have failed)
+                - job_id (str | None): ID the run was checkpointed under
+                - resumed (int): Cards that continued from a checkpoint
+                - total (int): Number of rows processed
+                - succeeded (int): Cards created (and delivered)
+                - failed (int): Cards that failed at some stage
+                - seconds (float): Duration of the run
+                - report_path (str | None): Path of the written report
+                - report (list): Per-card report entries
+                - error (str): Error message if the run failed
+        """
+        if deliver not in DELIVERY_MODES:
+            return {"success": False, "error": f"Unknown delivery mode '{deliver}'"}
+        if deliver == "apkg" and not apkg_path:
+            return {"success": False, "error": "An .apkg path is required to deliver to a package"}
+
+        started = time.monotonic()
+        options = {
+            "job_id": job_id,
+            "language": language,
+            "generate_image": generate_image,
+            "image_profile": image_profile
+        }
+
+        try:
+            checkpoints = {}
+            if job_id:
+                if self.job_store is None:
+                    self.job_store = BulkJobStore()
+                job = self.job_store.open_job(job_id, source or "", {**options, "deliver": deliver, "deck_name": deck_name})
+                output_dir = output_dir or job["media_dir"]
+                checkpoints = self.job_store.load_items(job_id)
+            options["output_dir"] = output_dir or tempfile.mkdtemp(prefix="ankiforge_bulk_")
+            os.makedirs(options["output_dir"], exist_ok=True)
+
+            items = (self._resume_item(checkpoints.get(line_number), line_number, row) for line_number, row in rows)
+            results = self._run_stages(items, options)
+            finished = getattr(self, f"_deliver_{deliver}")(results, deck_name, apkg_path, options)
+        except Exception as e:
+            return {"success": False, "error": f"Error running bulk import: {str(e)}"}
+
+        report = [self._report_entry(item) for item in sorted(finished, key=lambda item: item["row"])]
+        if report_path:
+            self._write_report(report, report_path)
+
+        succeeded = sum(1 for entry in report if entry["status"] == "ok")
+        if job_id:
+            self.job_store.finish_job(job_id, {"total": len(report), "succeeded": succeeded, "failed": len(report) - succeeded})
+        return {
+            "success": True,
+            "job_id": job_id,
+            "resumed": sum(1 for item in finished if item["resumed"]),
+            "total": len(report),
+            "succeeded": succeeded,
+            "failed": len(report) - succeeded,
+            "seconds": round(time.monotonic() - started, 1),
+            "report_path": report_path,
+            "report": report
+        }
+
+    def _new_item(self, line_number, row):
+        """Per-card state carried through the stages."""
+        return {
+            "row": line_number,
+            "input": row,
+            "status": "pending",
+            "failed_stage": None,
+            "error": None,
+            "warnings": [],
+            "timings": {},
+            "completed": [],
+            "delivered": False,
+            "resumed": False
+        }
+
+    def _resume_item(self, checkpoint, line_number, row):
+        """
+        Continue a card from its checkpoint, or start it afresh if there is none (or the row changed).
+        Failed cards are retried from the stage that failed; stages whose media file has
+        disappeared are redone.
+        """
+        if not checkpoint or checkpoint.get("input") != row:
+            return self._new_item(line_number, row)
+
+        item = {**checkpoint, "failed_stage": None, "error": None, "resumed": True}
+        for stage, key in MEDIA_STAGES.items():
+            if stage in item["completed"] and item.get(key) and not os.path.exists(item[key]):
+                item["completed"] = [done for done in item["completed"] if done not in (stage, "compile")]
+                item["warnings"] = [warning for warning in item["warnings"] if not warning.startswith(f"{stage.title()}:")]
+        item["status"] = "ok" if "compile" in item["completed"] else "pending"
+        return item
+
+    def _checkpoint(self, item, options):
+        """Save a card's state if the run is checkpointed."""
+        if options.get("job_id"):
+            self.job_store.save_item(options["job_id"], item)
+
+    def _run_stages(self, items, options):
+        """
+        Start the stage workers and yield cards as they leave the last stage.
+
+        Raises:
+            RuntimeError: If reading the rows failed (after the cards read before have been yielded)
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(BULK_STAGES) + 1)]
+        workers = [max(1, self.concurrency.get(stage, 1)) for stage in BULK_STAGES] + [1]
+
+        for index, stage in enumerate(BULK_STAGES):
+            remaining = {"workers": workers[index], "lock": threading.Lock()}
+            for _ in range(workers[index]):
+                threading.Thread(
+                    target=self._stage_worker,
+                    args=(stage, queues[index], queues[index + 1], workers[index + 1], remaining, options),
+                    name=f"bulk-{stage}",
+                    daemon=True
+                ).start()
+
+        reader = {"row": None, "error": None}
+
+        def feed():
+            try:
+                for item in items:
+                    reader["row"] = item["row"]
+                    queues[0].put(item)  # Blocks while the first stage is busy
+            except Exception as e:
+                # Raised to the consumer once the cards already read have drained
+                reader["error"] = e
+            finally:
+                for _ in range(workers[0]):
+                    queues[0].put(_DONE)
+
+        threading.Thread(target=feed, name="bulk-reader", daemon=True).start()
+
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                break
+            yield item
+
+        if reader["error"] is not None:
+            position = f" after row {reader['row']}" if reader["row"] else ""
+            raise RuntimeError(f"Error reading the word list{position}: {reader['error']}") from reader["error"]
+
+    def _stage_worker(self, stage, input_queue, output_queue, next_workers, remaining, options):
+        """Run one stage on cards from input_queue; the last worker to finish passes the end on."""
+        run_stage = getattr(self, f"_stage_{stage}")
+        while True:
+            item = input_queue.get()
+            if item is _DONE:
+                with remaining["lock"]:
+                    remaining["workers"] -= 1
+                    last = remaining["workers"] == 0
+                if last:
+                    for _ in range(next_workers):
+                        output_queue.put(_DONE)
+                return
+
+            if item["status"] != "failed" and stage not in item["completed"]:
+                started = time.monotonic()
+                try:
+                    run_stage(item, options)
+                    item["completed"].append(stage)
+                except Exception as e:
+                    item["status"] = "failed"
+                    item["failed_stage"] = stage
+                    item["error"] = str(e) or type(e).__name__
+                item["timings"][stage] = round(time.monotonic() - started, 2)
+                self._checkpoint(item, options)
+            output_queue.put(item)  # Blocks while the next stage is busy
+
+    def _stage_validate(self, item, options):
+        """Check the row and complete the word information (noun gender and plural)."""
+        row = item["input"]
+        if not row.get("sentence"):
+            raise ValueError("Missing sentence")
+        word_type = (row.get("type") or "noun").lower()
+        word_data = {"word": row["word"], "language": options["language"], "word_type": word_type}
+        if word_type == "noun":
+            word_data.update(self.card_pipeline.noun_details(
+                row["word"], options["language"], row.get("gender") or None, row.get("plural") or None, None
+            ))
+        item["word_data"] = word_data
+
+    def _stage_definition(self, item, options):
+        word_data = item["word_data"]
+        item["definition"] = self.card_pipeline.component("word_interpreter").generate_definition(
+            word_data["word"], word_data["language"], word_data["word_type"],
+            gender=word_data.get("gender"), plural_form=word_data.get("plural_form")
+        )
+
+    def _stage_audio(self, item, options):
+        word_data = item["word_data"]
+        audio_file = os.path.join(options["output_dir"], f"{item['row']:05d}_{safe_filename(word_data['word'])}.mp3")
+        result = self.card_pipeline.component("audio_fetcher").get_audio(
+            word_data["word"], word_data["language"], audio_file, fallback_text=item["definition"]
+        )
+        item["audio_path"] = result.get("audio_path") if result["success"] else None
+        if not result["success"]:
+            item["warnings"].append(f"Audio: {result.get('error')}")
+
+    def _stage_grammar(self, item, options):
+        item["grammar_check"] = self.card_pipeline.component("grammar_checker").check_grammar(
+            item["input"]["sentence"], item["word_data"]["language"], item["word_data"]["word"]
+        )
+
+    def _stage_prompt(self, item, options):
+        if not options["generate_image"]:
+            return
+        grammar_check = item["grammar_check"]
+        sentence = item["input"]["sentence"]
+        if not grammar_check.get("is_correct"):
+            sentence = grammar_check.get("corrected_sentence", sentence)
+        item["prompt"] = self.card_pipeline.component("prompt_refiner").refine_prompt(sentence, item["word_data"]["language"])
+
+    def _stage_image(self, item, options):
+        item["image_path"] = None
+        if not options["generate_image"]:
+            return
+        save_path = os.path.join(options["output_dir"], f"{item['row']:05d}_{safe_filename(item['word_data']['word'])}.png")
+        result = self.card_pipeline.component("image_generator").generate_image(
+            item["prompt"], save_path=save_path, profile=options["image_profile"]
+        )
+        if result["success"]:
+            item["image_path"] = result["image_path"]
+        else:
+            item["warnings"].append(f"Image: {result.get('error')}")
+
+    def _stage_compile(self, item, options):
+        item["card_data"] = self.card_pipeline.component("card_compiler").compile_card(
+            item["word_data"],
+            item["definition"],
+            item["input"]["sentence"],
+            item["grammar_check"],
+            image_path=item.get("image_path"),
+            audio_path=item.get("audio_path")
+        )
+        item["status"] = "ok"
+
+    def _deliver_none(self, results, deck_name, apkg_path, options):
+        """Keep the compiled cards (media stays in the output directory)."""
+        return list(results)
+
+    def _delivered(self, item, options, outcome, note_id=None):
+        """Record the outcome of uploading or queueing a card."""
+        if outcome["success"]:
+            item["delivered"] = True
+            item["note_id"] = note_id
+        else:
+            item["status"] = "failed"
+            item["failed_stage"] = "upload"
+            item["error"] = outcome["error"]
+        self._checkpoint(item, options)
+
+    def _deliver_anki(self, results, deck_name, apkg_path, options):
+        """Upload compiled cards to Anki in batches of ANKI_BATCH_SIZE as they come in."""
+        from integrations.anki_uploader import AnkiUploader
+        uploader = AnkiUploader()
+        finished, batch = [], []
+
+        def flush():
+            outcomes = uploader.upload_cards([item["card_data"] for item in batch], deck_name=deck_name)
+            for item, outcome in zip(batch, outcomes):
+                self._delivered(item, options, outcome, note_id=outcome.get("card_id"))
+            batch.clear()
+
+        for item in results:
+            finished.append(item)
+            if item["status"] == "ok" and not item["delivered"]:
+                batch.append(item)
+                if len(batch) >= ANKI_BATCH_SIZE:
+                    flush()
+        if batch:
+            flush()
+        return finished
+
+    def _deliver_outbox(self, results, deck_name, apkg_path, options):
+        """Queue compiled cards in the durable upload outbox (uploaded by the app's worker)."""
+        from integrations.anki_uploader import AnkiUploader
+        from integrations.upload_outbox import UploadOutbox
+        outbox = UploadOutbox(AnkiUploader(), start_worker=False)
+        finished = []
+        for item in results:
+            finished.append(item)
+            if item["status"] == "ok" and not item["delivered"]:
+                outcome = outbox.enqueue(item["card_data"], deck_name=deck_name)
+                self._delivered(item, options, outcome)
+        return finished
+
+    def _deliver_apkg(self, results, deck_name, apkg_path, options):
+        """Stream compiled cards into an .apkg package."""
+        from integrations.apkg_exporter import ApkgExporter
+        finished = []
+
+        def cards():
+            for item in results:
+                finished.append(item)
+                if item["status"] == "ok":
+                    yield item["card_data"]
+
+        outcome = ApkgExporter(deck_name=deck_name).export(cards(), apkg_path)
+        if not outcome["success"]:
+            raise RuntimeError(outcome["error"])
+        return finished
+
+    def _report_entry(self, item):
+        """Flatten a card's state for the report."""
+        return {
+            "row": item["row"],
+            "word": item["input"].get("word"),
+            "status": item["status"],
+            "resumed": item["resumed"],
+            "failed_stage": item["failed_stage"],
+            "error": item["error"],
+            "warnings": "; ".join(item["warnings"]),
+            "definition": item.get("definition"),
+            "audio_path": item.get("audio_path"),
+            "image_path": item.get("image_path"),
+            "note_id": item.get("note_id"),
+            "seconds": round(sum(item["timings"].values()), 2)
+        }
+
+    def _write_report(self, report, report_path):
+        """Write the report as JSON (.json) or CSV (anything else)."""
+        os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+        if report_path.lower().endswith(".json"):
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            return
+        with open(report_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(report)
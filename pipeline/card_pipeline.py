@@ -0,0 +1,316 @@
+import os
+import re
+import uuid
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config.config import DEFAULT_LANGUAGE, DEFAULT_IMAGE_PROFILE, GENDER_ARTICLES
+from pipeline.stages import enrich_word
+
+def safe_filename(word):
+    """File-name-safe version of a word."""
+    return re.sub(r"[^\w\-]+", "_", word).strip("_") or "word"
+
+class CardPipeline:
+    """
+    Utility responsible for creating a complete flashcard from a word and a sentence
+    without the Streamlit UI, for scripts, cron jobs and the forge CLI.
+
+    Agents and integrations are created on first use, so importing this module does
+    not load the OpenAI or Replicate clients.
+    """
+
+    def __init__(self, word_interpreter=None, grammar_checker=None, prompt_refiner=None,
+                 image_generator=None, audio_fetcher=None, card_compiler=None):
+        """
+        Initialize the CardPipeline. Components that are not given are created when needed.
+
+        Args:
+            word_interpreter (WordInterpreter, optional): Agent for definitions and noun info
+            grammar_checker (GrammarChecker, optional): Agent checking the sentence
+            prompt_refiner (PromptRefiner, optional): Agent turning the sentence into an image prompt
+            image_generator (ImageGenerator, optional): Integration generating the image
+            audio_fetcher (AudioFetcher, optional): Integration fetching the pronunciation
+            card_compiler (CardCompiler, optional): Utility compiling the note fields
+        """
+        self._components = {
+            "word_interpreter": word_interpreter,
+            "grammar_checker": grammar_checker,
+            "prompt_refiner": prompt_refiner,
+            "image_generator": image_generator,
+            "audio_fetcher": audio_fetcher,
+            "card_compiler": card_compiler
+        }
+        self._lock = threading.Lock()
+
+    def create_card(self, word, sentence, language=DEFAULT_LANGUAGE, word_type="noun", gender=None,
+                    plural_form=None, plural_article=None, generate_image=True,
+                    image_profile=DEFAULT_IMAGE_PROFILE, output_dir=None):
+        """
+        Create a flashcard: noun details, definition, pronunciation, grammar check,
+        image and compiled note fields.
+
+        Independent stages run concurrently: the definition and pronunciation are
+        fetched while the sentence is checked and the image is generated.
+
+        Args:
+            word (str): The word (without article)
+            sentence (str): A sentence using the word
+            language (str): Language of the word
+            word_type (str): Type of word (noun, verb, adjective, ...)
+            gender (str, optional): Article/gender of a noun (looked up if not given)
+            plural_form (str, optional): Plural of a noun (looked up if not given)
+            plural_article (str, optional): Article of the plural form
+            generate_image (bool): Whether to generate an image for the sentence
+            image_profile (str): Image generation profile ("fast" or "quality")
+            output_dir (str, optional): Directory for the audio and image files
+                (default: a new temporary directory)
+
+        Returns:
+            dict: A dictionary containing:
+                - success (bool): Whether the card was created
+                - card_data (dict): Compiled card data (see CardCompiler.compile_card)
+                - word_data (dict): Word information used for the card
+                - definition (str): Generated definition
+                - grammar_check (dict): Grammar check of the sentence
+                - audio_path (str | None): Pronunciation file, if one was found
+                - image_path (str | None): Image file, if one was generated
+                - warnings (list): Non-fatal problems (missing audio or image)
+                - error (str): Error message if creation failed
+        """
+        try:
+            output_dir = output_dir or tempfile.mkdtemp(prefix="ankiforge_")
+            os.makedirs(output_dir, exist_ok=True)
+            warnings = []
+
+            word_data = {"word": word, "language": language, "word_type": word_type}
+            if word_type == "noun":
+                word_data.update(self.noun_details(word, language, gender, plural_form, plural_article))
+
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                enrichment_future = executor.submit(
+                    enrich_word, self.component("word_interpreter"), self.component("audio_fetcher"), word_data, output_dir
+                )
+
+                grammar_check, image_path, image_error = self.illustrate(
+                    word, sentence, language, generate_image, image_profile, output_dir
+                )
+                if image_error:
+                    warnings.append(image_error)
+
+                enrichment = enrichment_future.result()
+
+            if enrichment["audio_error"]:
+                warnings.append(enrichment["audio_error"])
+
+            card_data = self.component("card_compiler").compile_card(
+                word_data,
+                enrichment["definition"],
+                sentence,
+                grammar_check,
+                image_path=image_path,
+                audio_path=enrichment["audio_path"]
+            )
+
+            return {
+                "success": True,
+                "card_data": card_data,
+                "word_data": word_data,
+                "definition": enrichment["definition"],
+                "grammar_check": grammar_check,
+                "audio_path": enrichment["audio_path"],
+                "image_path": image_path,
+                "warnings": warnings
+            }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Error creating card for '{word}': {str(e)}"
+            }
+
+    def prepare_word(self, word, language=DEFAULT_LANGUAGE, word_type="noun", gender=None,
+                     plural_form=None, plural_article=None, output_dir=None):
+        """
+        First half of create_card, which needs no sentence: noun details, definition and pronunciation.
+        Unlike create_card, errors are raised (for callers running it as a background task).
+
+        Args:
+            word (str): The word (without article)
+            language (str): Language of the word
+            word_type (str): Type of word (noun, verb, adjective, ...)
+            gender (str, optional): Article/gender of a noun (looked up if not given)
+            plural_form (str, optional): Plural of a noun (looked up if not given)
+            plural_article (str, optional): Article of the plural form
+            output_dir (str, optional): Directory for the audio file (default: a new temporary directory)
+
+        Returns:
+            dict: A dictionary containing:
+                - word_data (dict): Word information for the card
+                - definition (str): Generated definition
+                - audio_path (str | None): Pronunciation file, if one was found
+                - warnings (list): Non-fatal problems (missing audio)
+        """
+        output_dir = output_dir or tempfile.mkdtemp(prefix="ankiforge_")
+        os.makedirs(output_dir, exist_ok=True)
+
+        word_data = {"word": word, "language": language, "word_type": word_type}
+        if word_type == "noun":
+            word_data.update(self.noun_details(word, language, gender, plural_form, plural_article))
+
+        enrichment = enrich_word(self.component("word_interpreter"), self.component("audio_fetcher"), word_data, output_dir)
+        return {
+            "word_data": word_data,
+            "definition": enrichment["definition"],
+            "audio_path": enrichment["audio_path"],
+            "warnings": [enrichment["audio_error"]] if enrichment["audio_error"] else []
+        }
+
+    def finish_card(self, prepared, sentence, generate_image=True, image_profile=DEFAULT_IMAGE_PROFILE, output_dir=None):
+        """
+        Second half of create_card: check the sentence, generate the image and compile the card.
+        Unlike create_card, errors are raised.
+
+        Args:
+            prepared (dict): Result of prepare_word
+            sentence (str): A sentence using the word
+            generate_image (bool): Whether to generate an image for the sentence
+            image_profile (str): Image generation profile ("fast" or "quality")
+            output_dir (str, optional): Directory for the image file (default: a new temporary directory)
+
+        Returns:
+            dict: Same as create_card
+        """
+        output_dir = output_dir or tempfile.mkdtemp(prefix="ankiforge_")
+        os.makedirs(output_dir, exist_ok=True)
+        word_data = prepared["word_data"]
+        warnings = list(prepared.get("warnings", []))
+
+        grammar_check, image_path, image_error = self.illustrate(
+            word_data["word"], sentence, word_data["language"], generate_image, image_profile, output_dir
+        )
+        if image_error:
+            warnings.append(image_error)
+
+        card_data = self.component("card_compiler").compile_card(
+            word_data,
+            prepared["definition"],
+            sentence,
+            grammar_check,
+            image_path=image_path,
+            audio_path=prepared["audio_path"]
+        )
+        return {
+            "success": True,
+            "card_data": card_data,
+            "word_data": word_data,
+            "definition": prepared["definition"],
+            "grammar_check": grammar_check,
+            "audio_path": prepared["audio_path"],
+            "image_path": image_path,
+            "warnings": warnings
+        }
+
+    def illustrate(self, word, sentence, language, generate_image, image_profile, output_dir):
+        """
+        Check the sentence and generate an image of its (corrected) version.
+
+        Returns:
+            tuple: (grammar check, image path or None, image error or None)
+        """
+        grammar_check = self.component("grammar_checker").check_grammar(sentence, language, word)
+        if not generate_image:
+            return grammar_check, None, None
+
+        final_sentence = sentence if grammar_check.get("is_correct") else grammar_check.get("corrected_sentence", sentence)
+        prompt = self.component("prompt_refiner").refine_prompt(final_sentence, language)
+        # Unique name: cards for the same word may be finished at the same time
+        image_file = os.path.join(output_dir, f"{safe_filename(word)}_{uuid.uuid4().hex[:8]}.png")
+        image_result = self.component("image_generator").generate_image(prompt, save_path=image_file, profile=image_profile)
+        if image_result["success"]:
+            return grammar_check, image_result["image_path"], None
+        return grammar_check, None, image_result["error"]
+
+    def noun_details(self, word, language, gender, plural_form, plural_article):
+        """
+        Get the gender/article and plural of a noun, asking the word interpreter for what is missing.
+
+        Returns:
+            dict: Word data entries (gender, article, plural_form, plural_article, has_plural)
+        """
+        details = {}
+        word_interpreter = self.component("word_interpreter")
+
+        if gender is None:
+            validation = word_interpreter.validate_word_type_gender(word, language, "noun")
+            gender = validation.get("ai_gender") if validation.get("success") else None
+        if gender:
+            details["gender"] = gender
+            article = GENDER_ARTICLES.get(language, {}).get(gender)
+            if article:
+                details["article"] = article
+
+        if plural_form is None:
+            plural_info = word_interpreter.get_plural_info(word, language)
+            if plural_info.get("status") == "HAS_PLURAL":
+                plural_form = plural_info.get("plural_form")
+                plural_article = plural_article or plural_info.get("plural_article")
+            elif plural_info.get("status") == "NO_PLURAL":
+                details["has_plural"] = False
+        if plural_form:
+            details["plural_form"] = plural_form
+            details["plural_article"] = plural_article or GENDER_ARTICLES.get(language, {}).get("plural", "")
+
+        return details
+
+    def component(self, name):
+        """
+        Get a component by name (e.g. "word_interpreter"), creating the default implementation on first use.
+        """
+        with self._lock:
+            component = self._components[name]
+            if component is None:
+                component = self._components[name] = self._create_component(name)
+            return component
+
+    def _create_component(self, name):
+        """Import and create a default component (imports are deferred to keep startup fast)."""
+        if name == "word_interpreter":
+            from agents.word_interpreter import WordInterpreter
+            return WordInterpreter()
+        if name == "grammar_checker":
+            from agents.grammar_checker import GrammarChecker
+            return GrammarChecker()
+        if name == "prompt_refiner":
+            from agents.prompt_refiner import PromptRefiner
+            return PromptRefiner()
+        if name == "image_generator":
+            from integrations.image_generator import ImageGenerator
+            return ImageGenerator()
+        if name == "audio_fetcher":
+            from integrations.audio_fetcher import AudioFetcher
+            return AudioFetcher()
+        from utils.card_compiler import CardCompiler
+        return CardCompiler()
+
+
+_default_pipeline = None
+_default_pipeline_lock = threading.Lock()
+
+def create_card(word, sentence, **options):
+    """
+    Create a flashcard with a shared default CardPipeline.
+
+    Args:
+        word (str): The word (without article)
+        sentence (str): A sentence using the word
+        **options: Further arguments of CardPipeline.create_card
+
+    Returns:
+        dict: See CardPipeline.create_card
+    """
+    global _default_pipeline
+    with _default_pipeline_lock:
+        if _default_pipeline is None:
+            _default_pipeline = CardPipeline()
+    return _default_pipeline.create_card(word, sentence, **options)
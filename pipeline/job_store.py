@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import hashlib
+from config.config import BULK_JOBS_DB_PATH, BULK_JOBS_MEDIA_DIR
+from utils.sqlite_connection import SQLiteConnection
+
+class BulkJobStore:
+    """
+    Utility responsible for checkpointing bulk jobs: every card's state is saved
+    after each completed stage (outputs and media paths), and media is written to a
+    per-job directory, so an interrupted job resumes where it stopped instead of
+    paying again for definitions, speech or images.
+    """
+
+    def __init__(self, db_path=BULK_JOBS_DB_PATH, media_dir=BULK_JOBS_MEDIA_DIR):
+        """
+        Initialize the BulkJobStore.
+
+        Args:
+            db_path (str): Path of the SQLite job database
+            media_dir (str): Directory holding one media folder per job
+        """
+        self.db_path = db_path
+        self.media_dir = media_dir
+        os.makedirs(self.media_dir, exist_ok=True)
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._init_db()
+
+    @staticmethod
+    def job_id_for(path, options):
+        """
+        Derive a job ID from a word list's content and the run options, so running the
+        same command again resumes the same job.
+
+        Args:
+            path (str): Path of the word list
+            options (dict): Options that change the cards (language, image settings, ...)
+
+        Returns:
+            str: Job ID
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def open_job(self, job_id, source, options):
+        """
+        Create a job, or reopen it if it exists.
+
+        Args:
+            job_id (str): ID of the job
+            source (str): Where the rows come from (e.g. the word list path)
+            options (dict): Run options, stored for reference
+
+        Returns:
+            dict: A dictionary containing:
+                - job_id (str): ID of the job
+                - resumed (bool): Whether the job already existed
+                - media_dir (str): Durable directory for the job's audio and images
+                - checkpoints (int): Cards with saved progress
+        """
+        now = time.time()
+        with self._connect() as conn:
+            resumed = conn.execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone() is not None
+            if resumed:
+                conn.execute("UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?", (now, job_id))
+            else:
+                conn.execute(
+                    "INSERT INTO jobs (id, source, options_json, status, created_at, updated_at) VALUES (?, ?, ?, 'running', ?, ?)",
+                    (job_id, source, json.dumps(options), now, now)
+                )
+            checkpoints = conn.execute("SELECT COUNT(*) FROM job_items WHERE job_id = ?", (job_id,)).fetchone()[0]
+
+        media_dir = self.job_media_dir(job_id)
+        os.makedirs(media_dir, exist_ok=True)
+        return {
+            "job_id": job_id,
+            "resumed": resumed,
+            "media_dir": media_dir,
+            "checkpoints": checkpoints
+        }
+
+    def load_items(self, job_id):
+        """
+        Load the saved card states of a job.
+
+        Args:
+            job_id (str): ID of the job
+
+        Returns:
+            dict: Card state by row number
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT row, state_json FROM job_items WHERE job_id = ?", (job_id,)).fetchall()
+        return {row: json.loads(state_json) for row, state_json in rows}
+
+    def save_item(self, job_id, item):
+        """
+        Checkpoint a card's state.
+
+        Args:
+            job_id (str): ID of the job
+            item (dict): Card state (must be JSON serializable and contain "row" and "status")
+        """
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO job_items (job_id, row, status, state_json, updated_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (job_id, row) DO UPDATE SET
+                    status = excluded.status, state_json = excluded.state_json, updated_at = excluded.updated_at
+                """,
+                (job_id, item["row"], item["status"], json.dumps(item), time.time())
+            )
+
+    def finish_job(self, job_id, summary):
+        """
+        Mark a job as finished.
+
+        Args:
+            job_id (str): ID of the job
+            summary (dict): Counts of the run (total, succeeded, failed)
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'finished', summary_json = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(summary), time.time(), job_id)
+            )
+
+    def list_jobs(self):
+        """
+        List the stored jobs, most recent first.
+
+        Returns:
+            list: Dictionaries with id, source, status, summary, created_at and updated_at
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, source, status, summary_json, created_at, updated_at FROM jobs ORDER BY updated_at DESC"
+            ).fetchall()
+        return [
+            {
+                "id": job_id,
+                "source": source,
+                "status": status,
+                "summary": json.loads(summary_json) if summary_json else None,
+                "created_at": created_at,
+                "updated_at": updated_at
+            }
+            for job_id, source, status, summary_json, created_at, updated_at in rows
+        ]
+
+    def delete_job(self, job_id):
+        """
+        Forget a job's checkpoints and delete its media.
+
+        Args:
+            job_id (str): ID of the job
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM job_items WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+        media_dir = self.job_media_dir(job_id)
+        if os.path.isdir(media_dir):
+            for name in os.listdir(media_dir):
+                try:
+                    os.remove(os.path.join(media_dir, name))
+                except OSError:
+                    pass
+            try:
+                os.rmdir(media_dir)
+            except OSError:
+                pass
+
+    def job_media_dir(self, job_id):
+        """Durable media directory of a job."""
+        return os.path.join(self.media_dir, job_id)
+
+    def _connect(self):
+        """Open a connection that commits on success and is always closed (one per operation, safe across threads)."""
+        # With WAL, checkpoints survive a crash of the process without an fsync per commit
+        return SQLiteConnection(self.db_path, synchronous="NORMAL")
+
+    def _init_db(self):
+        """Create the job tables if needed."""
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    options_json TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    summary_json TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_items (
+                    job_id TEXT NOT NULL,
+                    row INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    state_json TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, row)
+                )
+                """
+            )
+
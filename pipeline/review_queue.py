@@ -0,0 +1,240 @@
+import uuid
+from config.config import DEFAULT_IMAGE_PROFILE, DEFAULT_DECK_NAME
+
+# States of a word in the queue:
+#   preparing  noun details, definition and pronunciation are being generated
+#   ready      waiting for the user's sentence
+#   finishing  sentence check, image, compilation and queueing for upload are running
+#   queued     the card is in the upload outbox
+#   failed     a background step failed (see the item's error)
+QUEUE_STATES = ("preparing", "ready", "finishing", "queued", "failed")
+
+def finish_and_queue(card_pipeline, upload_outbox, prepared, sentence, deck_name, generate_image, image_profile,
+                     output_dir, task=None):
+    """
+    Finish a prepared card and put it in the upload outbox.
+
+    Returns:
+        dict: Result of CardPipeline.finish_card plus the outbox_id of the queued card
+
+    Raises:
+        RuntimeError: If the card could not be queued
+        TaskCancelled: If the task was cancelled (e.g. the word was removed) before queueing
+    """
+    result = card_pipeline.finish_card(prepared, sentence, generate_image, image_profile, output_dir)
+    if task is not None:
+        # A removed word must not reach Anki
+        task.check_cancelled()
+    outcome = upload_outbox.enqueue(result["card_data"], deck_name=deck_name)
+    if not outcome["success"]:
+        raise RuntimeError(outcome["error"])
+    return {**result, "outbox_id": outcome["outbox_id"]}
+
+
+class ReviewQueue:
+    """
+    Utility responsible for the app's queue mode. The user enters several words up front;
+    each word is prepared in the background while the user writes sentences for earlier
+    words, and each submitted sentence is checked, illustrated and queued for upload in
+    the background too, so neither the user nor the machine waits on the other.
+
+    One queue belongs to one session; the work runs on the shared TaskRunner.
+    """
+
+    def __init__(self, task_runner, card_pipeline, upload_outbox, media_dir, deck_index=None):
+        """
+        Initialize the ReviewQueue.
+
+        Args:
+            task_runner (TaskRunner): Runner for the background work
+            card_pipeline (CardPipeline): Pipeline preparing and finishing the cards
+            upload_outbox (UploadOutbox): Outbox finished cards are queued in
+            media_dir (str): Directory for the generated audio and images
+            deck_index (DeckIndex, optional): Duplicate index told about every queued card
+        """
+        self.task_runner = task_runner
+        self.card_pipeline = card_pipeline
+        self.upload_outbox = upload_outbox
+        self.media_dir = media_dir
+        self.deck_index = deck_index
+        self._items = []
+
+    def add_words(self, words, language, word_type="noun"):
+        """
+        Add words and start preparing them.
+
+        Args:
+            words (iterable): Words to add (blank entries and words already waiting are skipped)
+            language (str): Language of the words
+            word_type (str): Type of the words
+
+        Returns:
+            int: Number of words added
+        """
+        waiting = {(item["word"], item["language"]) for item in self._items if item["status"] in ("preparing", "ready")}
+        added = 0
+        for word in words:
+            word = word.strip()
+            if not word or (word, language) in waiting:
+                continue
+            waiting.add((word, language))
+            item = {
+                "id": uuid.uuid4().hex,
+                "word": word,
+                "language": language,
+                "word_type": word_type,
+                "status": "preparing",
+                "job_id": None,
+                "prepared": None,
+                "sentence": "",
+                "deck_name": None,
+                "result": None,
+                "error": None,
+                "warnings": []
+            }
+            self._items.append(item)
+            self._prepare(item)
+            added += 1
+        return added
+
+    def refresh(self):
+        """
+        Collect the results of finished background work.
+
+        Returns:
+            bool: Whether any word changed state
+        """
+        changed = False
+        for item in self._items:
+            if item["status"] not in ("preparing", "finishing"):
+                continue
+            job = self.task_runner.get(item["job_id"])
+            if job is not None and job["status"] in ("queued", "running"):
+                continue
+
+            changed = True
+            item["job_id"] = None
+            if job is None or job["status"] != "succeeded":
+                item["error"] = (job or {}).get("error") or "The task did not finish"
+                item["status"] = "failed"
+            elif item["status"] == "preparing":
+                item["prepared"] = job["result"]
+                item["warnings"] = list(job["result"]["warnings"])
+                item["status"] = "ready"
+            else:
+                item["result"] = job["result"]
+                item["warnings"] = job["result"]["warnings"]
+                item["status"] = "queued"
+                if self.deck_index is not None:
+                    self.deck_index.remember(item["deck_name"], item["word"])
+        return changed
+
+    def items(self):
+        """
+        All words in the order they were added.
+
+        Returns:
+            list: Item dictionaries (id, word, language, word_type, status, prepared,
+                sentence, deck_name, result, error, warnings)
+        """
+        return list(self._items)
+
+    def next_ready(self):
+        """
+        The oldest word waiting for a sentence.
+
+        Returns:
+            dict | None: The item, or None if no word is ready
+        """
+        return next((item for item in self._items if item["status"] == "ready"), None)
+
+    def counts(self):
+        """
+        Number of words in each state.
+
+        Returns:
+            dict: Count by state (see QUEUE_STATES)
+        """
+        counts = dict.fromkeys(QUEUE_STATES, 0)
+        for item in self._items:
+            counts[item["status"]] += 1
+        return counts
+
+    def submit_sentence(self, item_id, sentence, deck_name=DEFAULT_DECK_NAME, generate_image=True,
+                        image_profile=DEFAULT_IMAGE_PROFILE):
+        """
+        Finish a ready word with the user's sentence in the background.
+
+        Args:
+            item_id (str): ID of a ready item
+            sentence (str): A sentence using the word
+            deck_name (str): Anki deck for the card
+            generate_image (bool): Whether to generate an image for the sentence
+            image_profile (str): Image generation profile ("fast" or "quality")
+
+        Returns:
+            bool: Whether the sentence was accepted (the item exists and is ready)
+        """
+        item = self._find(item_id)
+        if item is None or item["status"] != "ready" or not sentence.strip():
+            return False
+
+        item["sentence"] = sentence.strip()
+        item["deck_name"] = deck_name
+        item["status"] = "finishing"
+        item["error"] = None
+        item["job_id"] = self.task_runner.submit(
+            finish_and_queue, self.card_pipeline, self.upload_outbox, item["prepared"], item["sentence"],
+            deck_name, generate_image, image_profile, self.media_dir,
+            label=f"Finishing '{item['word']}'", with_task=True
+        )
+        return True
+
+    def retry(self, item_id):
+        """
+        Retry a failed word: preparation starts again, or a failed card goes back to
+        waiting for its (editable) sentence.
+
+        Args:
+            item_id (str): ID of a failed item
+        """
+        item = self._find(item_id)
+        if item is None or item["status"] != "failed":
+            return
+        item["error"] = None
+        if item["prepared"] is None:
+            self._prepare(item)
+        else:
+            item["status"] = "ready"
+
+    def remove(self, item_id):
+        """
+        Remove a word, cancelling its background work (a card being finished is not
+        queued for upload).
+
+        Args:
+            item_id (str): ID of the item
+        """
+        item = self._find(item_id)
+        if item is None:
+            return
+        if item["job_id"]:
+            self.task_runner.cancel(item["job_id"])
+        self._items.remove(item)
+
+    def clear_finished(self):
+        """Remove the words whose cards were queued for upload."""
+        self._items = [item for item in self._items if item["status"] != "queued"]
+
+    def _prepare(self, item):
+        """Start preparing a word in the background."""
+        item["status"] = "preparing"
+        item["job_id"] = self.task_runner.submit(
+            self.card_pipeline.prepare_word, item["word"], item["language"], item["word_type"],
+            output_dir=self.media_dir,
+            label=f"Preparing '{item['word']}'"
+        )
+
+    def _find(self, item_id):
+        """Find an item by ID."""
+        return next((item for item in self._items if item["id"] == item_id), None)
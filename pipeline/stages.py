@@ -0,0 +1,61 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from config.config import AUDIO_PREFERENCE
+
+# Audio sources that synthesize speech from the definition, so they must wait for it
+DEFINITION_AUDIO_SOURCES = ("ElevenLabs",)
+
+def enrich_word(word_interpreter, audio_fetcher, word_data, audio_dir):
+    """
+    Enrich a word with its definition and pronunciation.
+
+    The definition is generated while the pronunciation is looked up (Forvo), so the
+    stage takes as long as the slower of the two. Sources that need the definition
+    text (ElevenLabs) are only tried afterwards, if the lookup found nothing.
+
+    Args:
+        word_interpreter (WordInterpreter): Agent generating the definition
+        audio_fetcher (AudioFetcher): Integration fetching the pronunciation
+        word_data (dict): Word information (word, language, word_type and, for nouns,
+            optionally gender and plural_form)
+        audio_dir (str): Directory the audio file is saved to
+
+    Returns:
+        dict: A dictionary containing:
+            - definition (str): Native-language definition of the word
+            - audio_path (str | None): Path to the pronunciation, if one was found
+            - audio_source (str | None): Where the pronunciation came from
+            - audio_error (str | None): Error message if no pronunciation was found
+    """
+    word = word_data["word"]
+    language = word_data["language"]
+    audio_file = os.path.join(audio_dir, f"{word}.mp3")
+
+    lookup_sources = [source for source in AUDIO_PREFERENCE if source not in DEFINITION_AUDIO_SOURCES]
+    tts_sources = [source for source in AUDIO_PREFERENCE if source in DEFINITION_AUDIO_SOURCES]
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        definition_future = executor.submit(
+            word_interpreter.generate_definition,
+            word,
+            language,
+            word_data["word_type"],
+            gender=word_data.get("gender"),
+            plural_form=word_data.get("plural_form")
+        )
+        audio_result = {"success": False, "error": "No audio source available"}
+        if lookup_sources:
+            audio_result = audio_fetcher.get_audio(word, language, audio_file, sources=lookup_sources)
+        definition = definition_future.result()
+
+    if not audio_result["success"] and tts_sources:
+        audio_result = audio_fetcher.get_audio(
+            word, language, audio_file, fallback_text=definition, sources=tts_sources
+        )
+
+    return {
+        "definition": definition,
+        "audio_path": audio_result.get("audio_path") if audio_result["success"] else None,
+        "audio_source": audio_result.get("source"),
+        "audio_error": None if audio_result["success"] else audio_result.get("error")
+    }
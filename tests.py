@@ -1,12 +1,36 @@
 import unittest
 import os
 import sys
+import time
+import json
+import sqlite3
+import zipfile
+import base64
+import tempfile
+import threading
+from unittest import mock
 sys.path.append('/home/ubuntu')
 
 from AnkiForge.agents.word_interpreter import WordInterpreter
 from AnkiForge.agents.grammar_checker import GrammarChecker
 from AnkiForge.agents.prompt_refiner import PromptRefiner
 from AnkiForge.utils.card_compiler import CardCompiler
+from AnkiForge.utils.image_cache import ImageCache
+from AnkiForge.utils.media import media_filename
+from AnkiForge.utils.streaming_body import Base64JsonBody
+from AnkiForge.utils.task_runner import TaskRunner, TaskCancelled
+from AnkiForge.pipeline.bulk import read_word_list, BulkPipeline, BULK_STAGES
+from AnkiForge.pipeline.job_store import BulkJobStore
+from AnkiForge.utils.media_lifecycle import MediaLifecycleManager
+from AnkiForge.integrations.apkg_exporter import ApkgExporter
+from AnkiForge.integrations.note_type import NOTE_TYPE_FIELDS
+from AnkiForge.integrations import anki_uploader
+from AnkiForge.integrations.anki_uploader import AnkiUploader
+from AnkiForge.integrations.anki_health import AnkiHealthMonitor
+from AnkiForge.integrations.media_manifest import MediaManifest
+from AnkiForge.integrations.upload_outbox import UploadOutbox
+from AnkiForge.integrations.deck_index import DeckIndex
+from AnkiForge.config.config import OUTBOX_RETRY_BASE_DELAY, OUTBOX_MAX_ATTEMPTS
 
 class TestAnkiForgeComponents(unittest.TestCase):
     """Test cases for AnkiForge core components."""
@@ -15,6 +39,12 @@ class TestAnkiForgeComponents(unittest.TestCase):
         """Set up test environment."""
         # Skip tests that require API keys if they're not available
         self.skip_api_tests = not os.environ.get("OPENAI_API_KEY")
+    
+    def make_temp_dir(self):
+        """Create a temporary directory that is removed when the test ends."""
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        return temp_dir.name
         
     def test_word_interpreter_initialization(self):
         """Test that WordInterpreter can be initialized."""
@@ -58,22 +88,464 @@ class TestAnkiForgeComponents(unittest.TestCase):
         # Test without media files
         card_data = compiler.compile_card(word_data, definition, sentence, grammar_check)
         
-        self.assertIn("front_html", card_data)
-        self.assertIn("back_html", card_data)
+        self.assertIn("fields", card_data)
         self.assertIn("tags", card_data)
         self.assertIn("media_files", card_data)
         
-        # Check that word and article are in the front HTML
-        self.assertIn("der Hund", card_data["front_html"])
+        # Check that word, article and plural fill their note type fields
+        fields = card_data["fields"]
+        self.assertEqual(fields["Word"], "Hund")
+        self.assertEqual(fields["Article"], "der")
+        self.assertEqual(fields["Plural"], "die Hunde")
         
-        # Check that definition and sentence are in the back HTML
-        self.assertIn(definition, card_data["back_html"])
-        self.assertIn(sentence, card_data["back_html"])
+        # Check that definition and sentence fill their fields
+        self.assertEqual(fields["Definition"], definition)
+        self.assertEqual(fields["Sentence"], sentence)
         
         # Check that appropriate tags are included
         self.assertIn("noun", card_data["tags"])
         self.assertIn("german", card_data["tags"])
         self.assertIn("anki-forge", card_data["tags"])
 
+    def test_compile_cards_escapes_html(self):
+        """Test that compile_cards streams compiled cards with user content escaped."""
+        compiler = CardCompiler()
+        cards = [
+            {
+                "word_data": {"word": "gehen", "language": "German", "word_type": "verb",
+                              "conjugations": {"ich": "gehe", "du": "<b>gehst</b>"}},
+                "definition": "Sich zu Fuß fortbewegen & ankommen.",
+                "sentence": "Ich gehe nach Hause.",
+                "grammar_check": {"is_correct": True, "explanation": ""}
+            }
+        ] * 3
+
+        compiled = list(compiler.compile_cards(iter(cards)))
+
+        self.assertEqual(len(compiled), 3)
+        fields = compiled[0]["fields"]
+        self.assertIn("&lt;b&gt;gehst&lt;/b&gt;", fields["Conjugations"])
+        self.assertEqual(fields["Definition"], "Sich zu Fuß fortbewegen &amp; ankommen.")
+        self.assertNotIn("style=", fields["Conjugations"])
+
+    def test_image_cache(self):
+        """Test that ImageCache keys, stores and evicts images."""
+        cache = ImageCache(cache_dir=self.make_temp_dir(), max_bytes=10)
+        
+        params = {"model": "sdxl", "prompt": "Ein Hund im Park", "width": 768, "height": 768}
+        key = ImageCache.make_key(params)
+        
+        # Key is independent of parameter order and changes with any parameter
+        self.assertEqual(key, ImageCache.make_key(dict(reversed(list(params.items())))))
+        self.assertNotEqual(key, ImageCache.make_key({**params, "seed": 1}))
+        
+        self.assertIsNone(cache.get(key))
+        path = cache.put(key, b"12345678")
+        self.assertEqual(cache.get(key), path)
+        os.utime(path, (0, 0))  # Make this the least recently used entry
+        
+        # Adding a second entry exceeds max_bytes and evicts the older one
+        other_key = ImageCache.make_key({**params, "seed": 2})
+        cache.put(other_key, b"abcdefgh")
+        self.assertIsNone(cache.get(key))
+        self.assertIsNotNone(cache.get(other_key))
+        
+    def test_media_filename(self):
+        """Test that media filenames are derived from file content."""
+        temp_dir = self.make_temp_dir()
+        paths = [os.path.join(temp_dir, name) for name in ("Hund.mp3", "Hund_copy.MP3", "Katze.mp3")]
+        for path, content in zip(paths, (b"wuff", b"wuff", b"miau")):
+            with open(path, "wb") as f:
+                f.write(content)
+        
+        names = [media_filename(path) for path in paths]
+        self.assertTrue(names[0].startswith("ankiforge_"))
+        self.assertTrue(names[0].endswith(".mp3"))
+        self.assertEqual(names[0], names[1])
+        self.assertNotEqual(names[0], names[2])
+        
+    def test_base64_json_body(self):
+        """Test that the streamed body is the JSON json.dumps would produce and has the announced length."""
+        temp_dir = self.make_temp_dir()
+        path = os.path.join(temp_dir, "media.bin")
+        # Empty, shorter than one base64 group, exactly one group, and several chunks with a remainder
+        for size in (0, 1, 2, 3, 3 * 7 + 2):
+            with open(path, "wb") as f:
+                f.write(os.urandom(size))
+            body = Base64JsonBody(
+                prefix='{"action": "storeMediaFile", "params": {"filename": "media.bin", "data": "',
+                file_path=path,
+                suffix='"}}',
+                chunk_size=6
+            )
+            data = b"".join(body)
+            # Reading a fixed number of bytes at a time gives the same body
+            sized = Base64JsonBody(prefix=body._prefix.decode(), file_path=path, suffix='"}}', chunk_size=6)
+            self.assertEqual(b"".join(iter(lambda: sized.read(5), b"")), data)
+            with open(path, "rb") as f:
+                expected = json.dumps({"action": "storeMediaFile",
+                                       "params": {"filename": "media.bin", "data": base64.b64encode(f.read()).decode("ascii")}})
+            self.assertEqual(data.decode("utf-8"), expected)
+            self.assertEqual(len(body), len(data))
+        
+    def test_task_runner(self):
+        """Test that jobs report their result or error, stop when cancelled and are pruned after the retention period."""
+        runner = TaskRunner(thread_workers=2, retention=0.05)
+        self.addCleanup(runner._threads.shutdown)
+        
+        def wait(job_id):
+            runner._jobs[job_id]["future"].exception(timeout=5)
+            return runner.get(job_id)
+        
+        job = wait(runner.submit(lambda a, b: a + b, 2, 3, label="Adding"))
+        self.assertEqual((job["status"], job["result"], job["label"]), ("succeeded", 5, "Adding"))
+        self.assertIsNotNone(job["finished_at"])
+        
+        def fail():
+            raise ValueError("no sentence")
+        job = wait(runner.submit(fail))
+        self.assertEqual((job["status"], job["error"], job["result"]), ("failed", "no sentence", None))
+        
+        # A cancelled task stops at its next check and stays canceled
+        started, release = threading.Event(), threading.Event()
+        def step(task):
+            started.set()
+            release.wait(5)
+            task.check_cancelled()
+            return "queued"
+        job_id = runner.submit(step, with_task=True)
+        started.wait(5)
+        self.assertTrue(runner.cancel(job_id))
+        release.set()
+        with self.assertRaises(TaskCancelled):
+            runner._jobs[job_id]["future"].result(timeout=5)
+        self.assertEqual(runner.get(job_id)["status"], "canceled")
+        self.assertFalse(runner.cancel(job_id))
+        
+        # Finished jobs are forgotten once the retention period has passed
+        finished = list(runner._jobs)
+        time.sleep(0.06)
+        job_id = runner.submit(lambda: None)
+        for old_id in finished:
+            self.assertIsNone(runner.get(old_id))
+        self.assertIsNotNone(runner.get(job_id))
+        
+    def test_read_word_list(self):
+        """Test that word lists are read with either delimiter and blank rows are skipped."""
+        temp_dir = self.make_temp_dir()
+        for name, content in (("words.csv", "Word,Sentence,Gender\nHund,Der Hund spielt.,der\n,,\n"),
+                              ("words.tsv", "word\tsentence\tgender\nHund\tDer Hund spielt.\tder\n")):
+            path = os.path.join(temp_dir, name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            
+            rows = list(read_word_list(path))
+            self.assertEqual(len(rows), 1)
+            self.assertEqual(rows[0][0], 2)
+            self.assertEqual(rows[0][1]["word"], "Hund")
+            self.assertEqual(rows[0][1]["sentence"], "Der Hund spielt.")
+            self.assertEqual(rows[0][1]["gender"], "der")
+        
+    def test_bulk_reader_error(self):
+        """Test that a word list failing to decode partway through fails the run."""
+        temp_dir = self.make_temp_dir()
+        path = os.path.join(temp_dir, "words.csv")
+        with open(path, "wb") as f:
+            f.write(b"word,sentence\n" + b"Hund,Der Hund spielt.\n" * 2000 + b"Gr\xfcn,Das Gras ist gr\xfcn.\n")
+        
+        pipeline = BulkPipeline(card_pipeline=object())
+        for stage in BULK_STAGES:
+            setattr(pipeline, f"_stage_{stage}", lambda item, options: None)
+        result = pipeline.run(read_word_list(path), output_dir=temp_dir)
+        self.assertFalse(result["success"])
+        self.assertIn("Error reading the word list", result["error"])
+        
+    def test_bulk_job_resume(self):
+        """Test that a resumed bulk job only reruns failed stages and stages whose media disappeared."""
+        temp_dir = self.make_temp_dir()
+        store = BulkJobStore(db_path=os.path.join(temp_dir, "jobs.sqlite3"), media_dir=os.path.join(temp_dir, "media"))
+        rows = [(2, {"word": "Hund", "sentence": "Der Hund spielt."}), (3, {"word": "Katze", "sentence": "Die Katze schläft."})]
+        calls = []
+        failing = {"Katze"}
+        
+        def stub(stage):
+            def run_stage(item, options):
+                word = item["input"]["word"]
+                calls.append((word, stage))
+                if stage == "image" and word in failing:
+                    raise RuntimeError("Image service unavailable")
+                if stage in ("audio", "image"):
+                    path = os.path.join(options["output_dir"], f"{word}_{stage}")
+                    with open(path, "wb") as f:
+                        f.write(b"media")
+                    item[f"{stage}_path"] = path
+                if stage == "compile":
+                    item["status"] = "ok"
+            return run_stage
+        
+        pipeline = BulkPipeline(card_pipeline=object(), job_store=store)
+        for stage in BULK_STAGES:
+            setattr(pipeline, f"_stage_{stage}", stub(stage))
+        
+        first = pipeline.run(rows, job_id="job")
+        self.assertEqual((first["succeeded"], first["failed"]), (1, 1))
+        self.assertEqual(store.load_items("job")[3]["status"], "failed")
+        
+        # The image stage recovers and Hund's audio file is lost before resuming
+        failing.clear()
+        os.remove(os.path.join(store.job_media_dir("job"), "Hund_audio"))
+        calls.clear()
+        second = pipeline.run(rows, job_id="job")
+        self.assertEqual((second["resumed"], second["succeeded"], second["failed"]), (2, 2, 0))
+        self.assertEqual(sorted(calls), [("Hund", "audio"), ("Hund", "compile"), ("Katze", "compile"), ("Katze", "image")])
+        self.assertEqual(store.list_jobs()[0]["status"], "finished")
+        
+    def test_media_lifecycle(self):
+        """Test that referenced session media survives the quota and discarded media is deleted."""
+        media = MediaLifecycleManager(root=self.make_temp_dir(), session_quota=10, grace_period=0, start_sweeper=False)
+        session_dir = media.session_dir("session")
+        paths = [os.path.join(session_dir, name) for name in ("Hund.mp3", "old.png", "new.png")]
+        for age, path in zip((30, 20, 10), paths):
+            with open(path, "wb") as f:
+                f.write(b"1234")
+            os.utime(path, (time.time() - age, time.time() - age))
+        
+        # Over quota: the oldest unreferenced file goes, the referenced one stays
+        self.assertEqual(media.touch("session", [paths[0]]), 8)
+        self.assertTrue(os.path.exists(paths[0]))
+        self.assertFalse(os.path.exists(paths[1]))
+        
+        self.assertEqual(media.discard("session", [paths[2]]), 1)
+        self.assertEqual(os.listdir(session_dir), ["Hund.mp3"])
+
+    def test_apkg_export(self):
+        """Test that exported packages contain the notes, their fields and the media map."""
+        temp_dir = self.make_temp_dir()
+        audio_path = os.path.join(temp_dir, "Hund.mp3")
+        with open(audio_path, "wb") as f:
+            f.write(b"wuff")
+        cards = [
+            {"fields": {NOTE_TYPE_FIELDS[0]: word, NOTE_TYPE_FIELDS[1]: f"{word} field {index}"},
+             "tags": ["test"], "media_files": [audio_path]}
+            for index, word in enumerate(("Hund", "Katze", "Hund"))
+        ]
+        
+        output_path = os.path.join(temp_dir, "deck.apkg")
+        result = ApkgExporter(deck_name="Test Deck").export(cards, output_path)
+        self.assertTrue(result["success"])
+        self.assertEqual(result["note_count"], 3)
+        self.assertEqual(result["media_count"], 1)
+        
+        with zipfile.ZipFile(output_path) as package:
+            # Shared media is packaged once
+            self.assertEqual(json.loads(package.read("media")), {"0": media_filename(audio_path)})
+            self.assertEqual(package.read("0"), b"wuff")
+            package.extract("collection.anki2", temp_dir)
+        
+        conn = sqlite3.connect(os.path.join(temp_dir, "collection.anki2"))
+        try:
+            notes = conn.execute("SELECT flds, tags, guid FROM notes ORDER BY id").fetchall()
+            card_count = conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(card_count, 3)
+        self.assertEqual([flds.split("\x1f")[:2] for flds, _, _ in notes],
+                         [["Hund", "Hund field 0"], ["Katze", "Katze field 1"], ["Hund", "Hund field 2"]])
+        self.assertIn(" test ", notes[0][1])
+        # Two cards for the same word are separate notes for Anki
+        self.assertEqual(len({guid for _, _, guid in notes}), 3)
+
+    def test_upload_cards(self):
+        """Test that upload_cards batches media and notes and reports errors per card."""
+        temp_dir = self.make_temp_dir()
+        media = {}
+        for name, content in (("Hund.mp3", b"a" * 30), ("Hund_copy.mp3", b"a" * 30), ("Katze.png", b"b" * 30), ("Maus.png", b"c" * 30)):
+            media[name] = os.path.join(temp_dir, name)
+            with open(media[name], "wb") as f:
+                f.write(content)
+        failing_media = media_filename(media["Hund.mp3"])
+        
+        uploader = AnkiUploader(server_url="http://localhost:8765")
+        uploader.use_media_path = False
+        uploader.media_manifest = MediaManifest("test", path=os.path.join(temp_dir, "manifest.json"))
+        uploader._ensure_deck = lambda deck_name: {"success": True}
+        uploader._ensure_note_type = lambda model_name: {"success": True}
+        requests_sent = []
+        
+        def invoke(action, **params):
+            if action == "getMediaFilesNames":
+                return {"result": [], "error": None}
+            actions = params["actions"]
+            requests_sent.append((actions[0]["action"], len(actions)))
+            if actions[0]["action"] == "storeMediaFile":
+                return {"result": [{"result": None, "error": "disk full"} if a["params"]["filename"] == failing_media
+                                   else {"result": a["params"]["filename"], "error": None} for a in actions], "error": None}
+            return {"result": [{"result": None, "error": "cannot create note because it is a duplicate"}
+                               if a["params"]["note"]["fields"]["Word"] == "Duplikat" else {"result": 1, "error": None}
+                               for a in actions], "error": None}
+        uploader.invoke = invoke
+        
+        cards = [{"fields": {"Word": word}, "media_files": files} for word, files in (
+            ("Hund", [media["Hund.mp3"]]), ("Hündchen", [media["Hund_copy.mp3"]]), ("Katze", [media["Katze.png"]]),
+            ("Maus", [media["Maus.png"]]), ("Vogel", []), ("Duplikat", []))]
+        # Two inline files (40 base64 characters each) fit in one media request; two notes per addNote request
+        with mock.patch("AnkiForge.integrations.anki_uploader.ANKI_MULTI_MAX_BYTES", 100), \
+                mock.patch("AnkiForge.integrations.anki_uploader.ANKI_BATCH_SIZE", 2):
+            results = uploader.upload_cards(cards)
+        
+        self.assertEqual(requests_sent, [("storeMediaFile", 2), ("storeMediaFile", 1), ("addNote", 2), ("addNote", 2)])
+        # Both cards sharing the failed media file fail, not just the first one
+        self.assertEqual([result["success"] for result in results], [False, False, True, True, True, False])
+        self.assertIn("disk full", results[1]["error"])
+        self.assertIn("duplicate", results[5]["error"])
+
+    def test_upload_outbox(self):
+        """Test that the outbox backs off while Anki is offline and gives up on rejected cards."""
+        temp_dir = self.make_temp_dir()
+        audio_path = os.path.join(temp_dir, "Hund.mp3")
+        with open(audio_path, "wb") as f:
+            f.write(b"wuff")
+        
+        class StubUploader:
+            error = None
+            def is_available(self):
+                return True
+            def upload_cards(self, cards, **kwargs):
+                return [{"success": False, "error": self.error} if self.error else {"success": True, "card_id": 1}
+                        for _ in cards]
+        
+        uploader = StubUploader()
+        db_path = os.path.join(temp_dir, "outbox.sqlite3")
+        outbox = UploadOutbox(uploader, db_path=db_path, media_dir=os.path.join(temp_dir, "media"), start_worker=False)
+        
+        def entry(outbox_id):
+            conn = sqlite3.connect(db_path)
+            try:
+                row = conn.execute("SELECT status, attempts, retries, next_attempt_at FROM outbox WHERE id = ?",
+                                   (outbox_id,)).fetchone()
+                conn.execute("UPDATE outbox SET next_attempt_at = 0 WHERE id = ?", (outbox_id,))  # Due again
+                conn.commit()
+            finally:
+                conn.close()
+            return row
+        
+        # Enqueueing keeps a copy of the media
+        queued = outbox.enqueue({"fields": {"Word": "Hund"}, "media_files": [audio_path]})
+        self.assertTrue(queued["success"])
+        self.assertEqual(os.listdir(os.path.join(temp_dir, "media")), [media_filename(audio_path)])
+        
+        # Anki offline: the delay doubles on every retry, but no attempt is used up
+        uploader.error = "Could not connect to anki-mcp-server"
+        delays = []
+        for _ in range(OUTBOX_MAX_ATTEMPTS + 1):
+            before = time.time()
+            self.assertEqual(outbox.flush(), 0)
+            status, attempts, retries, next_attempt_at = entry(queued["outbox_id"])
+            self.assertEqual((status, attempts), ("pending", 0))
+            delays.append(next_attempt_at - before)
+        self.assertEqual(retries, OUTBOX_MAX_ATTEMPTS + 1)
+        self.assertAlmostEqual(delays[0], OUTBOX_RETRY_BASE_DELAY, delta=1)
+        self.assertAlmostEqual(delays[1], OUTBOX_RETRY_BASE_DELAY * 2, delta=1)
+        self.assertAlmostEqual(delays[2], OUTBOX_RETRY_BASE_DELAY * 4, delta=1)
+        
+        # Rejected (here: an HTTP client error) until the attempts run out
+        uploader.error = "HTTP error 413 uploading media"
+        for attempt in range(1, OUTBOX_MAX_ATTEMPTS + 1):
+            outbox.flush()
+            status, attempts, _, _ = entry(queued["outbox_id"])
+            self.assertEqual(attempts, attempt)
+        self.assertEqual(status, "failed")
+        
+        # Duplicates fail at once; retried cards upload
+        uploader.error = "cannot create note because it is a duplicate"
+        duplicate = outbox.enqueue({"fields": {"Word": "Katze"}, "media_files": []})
+        outbox.flush()
+        self.assertEqual(entry(duplicate["outbox_id"])[0], "failed")
+        self.assertEqual(outbox.status()["failed"], 2)
+        
+        uploader.error = None
+        outbox.retry_failed()
+        self.assertEqual(outbox.flush(), 2)
+        self.assertEqual(outbox.status()["uploaded"], 2)
+
+    def test_deck_index(self):
+        """Test that the deck index finds existing and just-queued words and only trusts canAddNotes with the note type."""
+        class StubUploader:
+            model_names = []
+            def invoke(self, action, **params):
+                if action == "findNotes":
+                    return {"result": [1], "error": None}
+                if action == "notesInfo":
+                    return {"result": [{"noteId": 1, "fields": {"Word": {"value": "<b>der Hund</b>", "order": 0}}}], "error": None}
+                if action == "canAddNotes":
+                    return {"result": [False], "error": None}
+            def get_model_names(self):
+                return self.model_names
+        
+        uploader = StubUploader()
+        index = DeckIndex(uploader)
+        self.assertTrue(index.find_duplicate("Deutsch", "Hund")["is_duplicate"])
+        self.assertFalse(index.find_duplicate("Deutsch", "Katze")["is_duplicate"])
+        
+        # A queued card counts before the (still fresh) index is synced again
+        index.remember("Deutsch", "die Katze")
+        self.assertTrue(index.find_duplicate("Deutsch", "Katze")["is_duplicate"])
+        
+        # Without an index, canAddNotes' false only means a duplicate if the note type exists
+        uploader.invoke = lambda action, **params: {"result": [False], "error": None} if action == "canAddNotes" \
+            else {"result": None, "error": "Anki is unreachable"}
+        self.assertFalse(index.find_duplicate("Englisch", "dog")["is_duplicate"])
+        uploader.model_names = ["AnkiForge"]
+        self.assertTrue(index.find_duplicate("Englisch", "dog")["is_duplicate"])
+        
+        # Without waiting, the answer comes from canAddNotes while the index syncs in the background
+        self.assertEqual(index.find_duplicate("Französisch", "chien", wait=False)["source"], "canAddNotes")
+
+    def test_anki_health_circuit(self):
+        """Test the circuit breaker transitions, driven by the uploader's requests."""
+        monitor = AnkiHealthMonitor(uploader=None, failure_threshold=2, reset_timeout=0.05, start_worker=False)
+        monitor.record_failure("refused")
+        self.assertEqual((monitor.state()["circuit"], monitor.allow_request()), ("closed", True))
+        monitor.record_failure("refused")
+        self.assertEqual((monitor.state()["circuit"], monitor.allow_request()), ("open", False))
+        
+        # After the reset timeout one trial is let through; its failure reopens the circuit at once
+        time.sleep(0.06)
+        self.assertEqual((monitor.allow_request(), monitor.state()["circuit"]), (True, "half_open"))
+        monitor.record_failure("refused")
+        self.assertEqual((monitor.state()["circuit"], monitor.allow_request()), ("open", False))
+        
+        # Requests through the uploader report to the monitor: a reply closes the circuit
+        class RequestException(Exception):
+            pass
+        class ConnectionError(RequestException):
+            pass
+        class Response:
+            status_code = 200
+            def json(self):
+                return {"result": 6, "error": None}
+        replies = []
+        def post(url, **kwargs):
+            reply = replies.pop(0)
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+        fake_requests = mock.Mock(post=post, exceptions=mock.Mock(RequestException=RequestException, ConnectionError=ConnectionError))
+        
+        uploader = AnkiUploader(server_url="http://localhost:8765")
+        uploader.health_monitor = monitor
+        with mock.patch.object(anki_uploader, "requests", fake_requests):
+            self.assertIsNotNone(uploader.invoke("version")["error"])  # Circuit open: not sent
+            time.sleep(0.06)
+            replies.append(Response())
+            self.assertEqual(uploader.invoke("version")["result"], 6)
+            self.assertEqual(monitor.state()["circuit"], "closed")
+            
+            replies.extend([ConnectionError("refused"), ConnectionError("refused")])
+            for _ in range(2):
+                with self.assertRaises(ConnectionError):
+                    uploader.invoke("version")
+            self.assertEqual(monitor.state()["circuit"], "open")
+
 if __name__ == '__main__':
     unittest.main()
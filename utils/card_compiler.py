@@ -1,4 +1,27 @@
 import os
+import re
+import html
+from utils.media import media_filename
+
+# Field value templates (str.format syntax). Values are HTML-escaped before substitution;
+# the card layout and styling live in the AnkiForge note type (see integrations/note_type.py).
+FIELD_TEMPLATES = {
+    "audio": "[sound:{filename}]",
+    "image": '<img src="{filename}" alt="{alt}">',
+    "grammar_note": '{sentence}<div class="grammar-note">{note}</div>',
+    "row": "<tr><td>{pronoun}</td><td>{form}</td></tr>",
+    "corrected_row": (
+        '<tr><td>{pronoun}</td><td><span class="wrong">{form}</span>'
+        '<span class="correct">→ {correct_form}</span></td></tr>'
+    ),
+}
+
+# Characters that need escaping in HTML text and attribute values
+_HTML_SPECIAL = re.compile(r"[&<>\"']").search
+
+def _escape(text):
+    """HTML-escape text, skipping the work for the common case of text without special characters."""
+    return html.escape(text) if _HTML_SPECIAL(text) else text
 
 class CardCompiler:
     """
@@ -6,8 +29,8 @@ class CardCompiler:
     """
     
     def __init__(self):
-        """Initialize the CardCompiler."""
-        pass
+        """Initialize the CardCompiler, binding the card templates' formatters once."""
+        self._templates = {name: text.format for name, text in FIELD_TEMPLATES.items()}
     
     def compile_card(self, word_data, definition, sentence, grammar_check, image_path=None, audio_path=None):
         """
@@ -32,8 +55,8 @@ class CardCompiler:
             
         Returns:
             dict: A dictionary containing the compiled card data ready for Anki:
-                - front_html (str): HTML content for the front of the card
-                - back_html (str): HTML content for the back of the card
+                - fields (dict): Values of the AnkiForge note type fields (Word, Article,
+                  Plural, Definition, Sentence, Audio, Image, Conjugations)
                 - tags (list): List of tags for the card
                 - media_files (list): List of media files to include
         """
@@ -41,20 +64,19 @@ class CardCompiler:
         word = word_data.get("word", "")
         language = word_data.get("language", "")
         word_type = word_data.get("word_type", "")
+        templates = self._templates
         
-        # Format the word display (with article for nouns)
-        if word_type == "noun" and "article" in word_data:
-            word_display = f"{word_data['article']} {word}"
-        else:
-            word_display = word
+        # The article is shown in front of nouns by the note type
+        article = word_data.get("article", "") if word_type == "noun" else ""
             
         # Determine which sentence to use (original or corrected)
         if grammar_check["is_correct"]:
-            final_sentence = sentence
-            grammar_note = ""
+            final_sentence = _escape(sentence or "")
         else:
-            final_sentence = grammar_check.get("corrected_sentence", sentence)
+            final_sentence = _escape(grammar_check.get("corrected_sentence", sentence) or "")
             grammar_note = grammar_check.get("explanation", "")
+            if grammar_note:
+                final_sentence = templates["grammar_note"](sentence=final_sentence, note=_escape(grammar_note))
             
         # Prepare media files list
         media_files = []
@@ -63,127 +85,78 @@ class CardCompiler:
         if audio_path:
             media_files.append(audio_path)
             
-        # Extract filenames from paths using os.path.basename for cross-platform compatibility
-        image_filename = os.path.basename(image_path) if image_path else ""
-        audio_filename = os.path.basename(audio_path) if audio_path else ""
-            
-        # Generate front HTML
-        front_html = f"""
-        <div class="card-front">
-            <div class="word">{word_display}</div>
-        """
-        
-        if audio_filename:
-            front_html += f"""
-            <div class="audio">[sound:{audio_filename}]</div>
-            """
-            
-        if image_filename:
-            front_html += f"""
-            <div class="image"><img src="{image_filename}" alt="{word}"></div>
-            """
-            
-        front_html += "</div>"
-        
-        # Generate back HTML
-        back_html = f"""
-        <div class="card-back">
-            <div class="word">{word_display}</div>
-            <div class="definition">{definition}</div>
-            <div class="sentence">{final_sentence}</div>
-        """
+        # Media is stored in Anki under content-addressed names (see AnkiUploader._upload_media)
+        image_filename = self._media_filename(image_path)
+        audio_filename = self._media_filename(audio_path)
         
-        if grammar_note:
-            back_html += f"""
-            <div class="grammar-note">{grammar_note}</div>
-            """
-            
-        # Add word metadata for nouns
+        # Plural form for nouns
+        plural = ""
         if word_type == "noun":
-            back_html += f"""
-            <div class="metadata">
-            """
-            
-            # Add gender if available
-            if "gender" in word_data:
-                back_html += f"""
-                <div class="gender">Gender: {word_data.get('gender', '')}</div>
-                """
-                
-            # Add plural form if available
             if "plural_form" in word_data:
                 plural_article = word_data.get('plural_article', 'die')
-                plural_display = f"{plural_article} {word_data['plural_form']}"
-                back_html += f"""
-                <div class="plural">Plural: {plural_display}</div>
-                """
+                plural = _escape(f"{plural_article} {word_data['plural_form']}")
             # Handle case where a noun explicitly has no plural
             elif "has_plural" in word_data and not word_data["has_plural"]:
-                back_html += f"""
-                <div class="plural">Plural: <em>No plural form</em></div>
-                """
-                
-            back_html += """
-            </div>
-            """
-            
-        # Add verb conjugation table if available
+                plural = "<em>No plural form</em>"
+        
+        # Verb conjugation table rows
+        conjugations = ""
         if word_type == "verb" and "conjugations" in word_data:
-            back_html += f"""
-            <div class="conjugations">
-                <h4>Present Tense Conjugations</h4>
-                <table class="conjugation-table" style="width:100%; border-collapse:collapse;">
-                    <thead>
-                        <tr>
-                            <th style="text-align:left; padding:5px; border-bottom:1px solid #ddd;">Person</th>
-                            <th style="text-align:left; padding:5px; border-bottom:1px solid #ddd;">Conjugation</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-            """
-            
-            # Add each conjugation as a row in the table
             corrections = word_data.get("corrections", {})
-            
+            rows = []
             for pronoun, conjugated_form in word_data["conjugations"].items():
-                # Check if this pronoun had a correction
-                has_correction = pronoun in corrections
-                
-                if has_correction:
-                    # Show both the original and corrected form, with the corrected one in green
-                    correct_form = corrections[pronoun]
-                    back_html += f"""
-                        <tr>
-                            <td style="text-align:left; padding:5px; border-bottom:1px solid #ddd;">{pronoun}</td>
-                            <td style="text-align:left; padding:5px; border-bottom:1px solid #ddd;">
-                                <span style="text-decoration:line-through; color:#dc3545;">{conjugated_form}</span>
-                                <span style="color:#28a745; margin-left:5px;">→ {correct_form}</span>
-                            </td>
-                        </tr>
-                    """
+                if pronoun in corrections:
+                    # Show both the original and corrected form, with the corrected one highlighted
+                    rows.append(templates["corrected_row"](
+                        pronoun=_escape(pronoun),
+                        form=_escape(conjugated_form),
+                        correct_form=_escape(corrections[pronoun])
+                    ))
                 else:
-                    # Just show the conjugation normally
-                    back_html += f"""
-                        <tr>
-                            <td style="text-align:left; padding:5px; border-bottom:1px solid #ddd;">{pronoun}</td>
-                            <td style="text-align:left; padding:5px; border-bottom:1px solid #ddd;">{conjugated_form}</td>
-                        </tr>
-                    """
-            
-            back_html += """
-                    </tbody>
-                </table>
-            </div>
-            """
-            
-        back_html += "</div>"
+                    rows.append(templates["row"](pronoun=_escape(pronoun), form=_escape(conjugated_form)))
+            conjugations = "".join(rows)
+        
+        fields = {
+            "Word": _escape(word),
+            "Article": _escape(article),
+            "Plural": plural,
+            "Definition": _escape(definition or ""),
+            "Sentence": final_sentence,
+            "Audio": templates["audio"](filename=audio_filename) if audio_filename else "",
+            "Image": templates["image"](filename=_escape(image_filename), alt=_escape(word)) if image_filename else "",
+            "Conjugations": conjugations
+        }
         
         # Generate tags
         tags = ["anki-forge", word_type, language.lower()]
         
         return {
-            "front_html": front_html.strip(),
-            "back_html": back_html.strip(),
+            "fields": fields,
             "tags": tags,
             "media_files": media_files
         }
+    
+    def compile_cards(self, cards):
+        """
+        Compile many cards lazily, for bulk jobs.
+        
+        Args:
+            cards (iterable): Dictionaries of compile_card arguments (word_data, definition,
+                sentence, grammar_check and optionally image_path and audio_path)
+            
+        Yields:
+            dict: Compiled card data for each input, in order (see compile_card)
+        """
+        compile_card = self.compile_card
+        for card in cards:
+            yield compile_card(**card)
+    
+    def _media_filename(self, path):
+        """Get the Anki media filename for a local file (empty if there is no file)."""
+        if not path:
+            return ""
+        try:
+            return media_filename(path)
+        except FileNotFoundError:
+            # Use filenames from paths using os.path.basename for cross-platform compatibility
+            return os.path.basename(path)
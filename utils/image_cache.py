@@ -0,0 +1,116 @@
+import os
+import glob
+import json
+import hashlib
+import threading
+from config.config import IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES
+
+class ImageCache:
+    """
+    Utility responsible for caching generated images on disk, keyed by the
+    parameters that were used to generate them.
+    """
+
+    def __init__(self, cache_dir=IMAGE_CACHE_DIR, max_bytes=IMAGE_CACHE_MAX_BYTES):
+        """
+        Initialize the ImageCache.
+
+        Args:
+            cache_dir (str): Directory where cached images are stored
+            max_bytes (int): Maximum total size of the cache before old entries are evicted
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(params):
+        """
+        Build a content-addressed cache key from generation parameters.
+
+        Args:
+            params (dict): Generation parameters (model version, prompt, negative prompt,
+                width, height, steps, scheduler, guidance, seed, ...)
+
+        Returns:
+            str: A hex digest identifying the parameters
+        """
+        serialized = json.dumps(params, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached image.
+
+        Args:
+            key (str): Cache key from make_key()
+
+        Returns:
+            str | None: Local path of the cached image, or None on a miss
+        """
+        matches = glob.glob(os.path.join(self.cache_dir, f"{key}.*"))
+        for path in matches:
+            if path.endswith(".tmp"):
+                continue
+            try:
+                # Refresh the modification time so eviction is least-recently-used
+                os.utime(path, None)
+                return path
+            except FileNotFoundError:
+                # Evicted by another session in the meantime
+                continue
+        return None
+
+    def put(self, key, image_data, extension="png"):
+        """
+        Store an image in the cache.
+
+        Args:
+            key (str): Cache key from make_key()
+            image_data (bytes): Raw image data
+            extension (str): File extension for the cached image
+
+        Returns:
+            str: Local path of the cached image
+        """
+        path = os.path.join(self.cache_dir, f"{key}.{extension.lstrip('.')}")
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+
+        # Write to a temporary file first so readers never see a partial image
+        with open(temp_path, "wb") as f:
+            f.write(image_data)
+        os.replace(temp_path, path)
+
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep=None):
+        """Delete least-recently-used entries (except `keep`) until the cache fits within max_bytes."""
+        with self._lock:
+            entries = []
+            total_size = 0
+            for entry in os.scandir(self.cache_dir):
+                if not entry.is_file() or entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+            if total_size <= self.max_bytes:
+                return
+
+            entries.sort()
+            for _, size, path in entries:
+                if total_size <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total_size -= size
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,171 @@
+import os
+import threading
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from config.config import IMAGE_OUTPUT_SETTINGS, IMAGE_PROCESSING_WORKERS
+from utils.lazy_import import lazy_import
+
+Image = lazy_import("PIL.Image")
+
+# File extensions for the supported output formats
+FORMAT_EXTENSIONS = {
+    "WEBP": ".webp",
+    "JPEG": ".jpg",
+    "PNG": ".png",
+}
+
+# Metadata keys Pillow exposes in Image.info that we consider "metadata" for stripping
+METADATA_KEYS = ("exif", "icc_profile", "xmp", "XML:com.adobe.xmp", "comment")
+
+
+def _convert_image(image_data, settings):
+    """
+    Resize and re-encode an image according to the output settings.
+
+    Runs inside a worker process, so it must stay a module-level function.
+
+    Args:
+        image_data (bytes): Source image data
+        settings (dict): Output settings (see IMAGE_OUTPUT_SETTINGS)
+
+    Returns:
+        bytes: The encoded output image
+    """
+    image_format = settings["format"].upper()
+
+    with Image.open(BytesIO(image_data)) as img:
+        img.thumbnail((settings["width"], settings["height"]), Image.LANCZOS)
+
+        # JPEG has no alpha channel; WEBP/PNG keep it
+        if image_format == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+
+        save_options = {}
+        if image_format in ("WEBP", "JPEG"):
+            save_options["quality"] = settings.get("quality", 80)
+        if image_format == "JPEG":
+            save_options["optimize"] = True
+            save_options["progressive"] = True
+        if image_format == "WEBP":
+            save_options["method"] = 4
+        if image_format == "PNG":
+            save_options["optimize"] = True
+
+        # Pillow only writes metadata that is passed explicitly
+        if not settings.get("strip_metadata", True):
+            for key in ("exif", "icc_profile"):
+                if img.info.get(key):
+                    save_options[key] = img.info[key]
+
+        output = BytesIO()
+        img.save(output, format=image_format, **save_options)
+        return output.getvalue()
+
+
+class ImageProcessor:
+    """
+    Utility responsible for resizing and recompressing generated images into a
+    compact output format before they are saved and uploaded to Anki.
+    """
+
+    def __init__(self, settings=None, max_workers=IMAGE_PROCESSING_WORKERS):
+        """
+        Initialize the ImageProcessor.
+
+        Args:
+            settings (dict, optional): Output settings (default: IMAGE_OUTPUT_SETTINGS)
+            max_workers (int): Number of worker processes used for encoding
+        """
+        self.settings = {**IMAGE_OUTPUT_SETTINGS, **(settings or {})}
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def extension(self):
+        """File extension matching the configured output format."""
+        return FORMAT_EXTENSIONS[self.settings["format"].upper()]
+
+    def needs_processing(self, image_data):
+        """
+        Check whether an image has to be decoded and re-encoded to meet the output settings.
+
+        Only the image header is read, so this is cheap to call in the current process.
+
+        Args:
+            image_data (bytes): Source image data
+
+        Returns:
+            bool: False if the image already has the target format, fits the target
+                  dimensions and carries no metadata that should be stripped
+        """
+        with Image.open(BytesIO(image_data)) as img:
+            if img.format != self.settings["format"].upper():
+                return True
+            if img.width > self.settings["width"] or img.height > self.settings["height"]:
+                return True
+            if self.settings.get("strip_metadata", True) and any(img.info.get(key) for key in METADATA_KEYS):
+                return True
+        return False
+
+    def process(self, image_data, save_path=None):
+        """
+        Convert an image to the configured output format.
+
+        Args:
+            image_data (bytes): Source image data
+            save_path (str, optional): Path to save the output image. The extension is
+                replaced to match the output format.
+
+        Returns:
+            dict: A dictionary containing:
+                - success (bool): Whether processing was successful
+                - image_path (str): Path to the saved image if save_path is provided
+                - image_data (bytes): The output image data
+                - error (str): Error message if processing failed
+        """
+        try:
+            if self.needs_processing(image_data):
+                output_data = self._run(image_data)
+            else:
+                output_data = image_data
+
+            result = {
+                "success": True,
+                "image_data": output_data
+            }
+
+            if save_path:
+                output_path = os.path.splitext(save_path)[0] + self.extension
+                with open(output_path, "wb") as f:
+                    f.write(output_data)
+                result["image_path"] = output_path
+
+            return result
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Error processing image: {str(e)}"
+            }
+
+    def _run(self, image_data):
+        """Encode an image in the worker pool, falling back to the current process."""
+        if self.max_workers <= 0:
+            return _convert_image(image_data, self.settings)
+
+        try:
+            return self._get_executor().submit(_convert_image, image_data, self.settings).result()
+        except BrokenProcessPool:
+            # A worker died (e.g. killed by the OS); start a fresh pool next time
+            with self._lock:
+                self._executor = None
+            return _convert_image(image_data, self.settings)
+
+    def _get_executor(self):
+        """Create the worker pool on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
@@ -0,0 +1,98 @@
+import importlib
+import threading
+
+class LazyModule:
+    """
+    Utility responsible for deferring a module import until the module is first used,
+    so heavy client libraries (openai, replicate, requests, Pillow) only cost startup
+    time in processes that actually call them.
+
+    Attribute reads and writes are forwarded to the imported module, so a module-level
+    ``openai = lazy_import("openai")`` behaves like ``import openai``.
+    """
+
+    def __init__(self, name):
+        """
+        Initialize the LazyModule.
+
+        Args:
+            name (str): Full name of the module (e.g. "PIL.Image")
+        """
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _load(self):
+        """Import the module on first use."""
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    object.__setattr__(self, "_module", importlib.import_module(self._name))
+                module = self._module
+        return module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._load(), attribute, value)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """
+    Get a module that is imported on first attribute access.
+
+    Args:
+        name (str): Full name of the module
+
+    Returns:
+        LazyModule: Proxy for the module
+    """
+    return LazyModule(name)
+
+
+class LazyRegistry:
+    """
+    Utility responsible for building shared resources (agents, integrations) on first
+    access instead of all at startup. Factories receive the registry, so a resource can
+    depend on others.
+    """
+
+    def __init__(self, factories):
+        """
+        Initialize the LazyRegistry.
+
+        Args:
+            factories (dict): Function building each resource from the registry, by name
+        """
+        self._factories = dict(factories)
+        self._instances = {}
+        self._lock = threading.RLock()  # Re-entrant: factories look up their dependencies
+
+    def __getitem__(self, name):
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._instances:
+                self._instances[name] = self._factories[name](self)
+            return self._instances[name]
+
+    def __contains__(self, name):
+        return name in self._factories
+
+    def built(self):
+        """
+        Names of the resources built so far.
+
+        Returns:
+            list: Resource names
+        """
+        with self._lock:
+            return list(self._instances)
@@ -0,0 +1,35 @@
+import os
+import hashlib
+from functools import lru_cache
+
+# Prefix of every media file AnkiForge stores in the Anki collection
+MEDIA_PREFIX = "ankiforge_"
+
+def media_filename(file_path):
+    """
+    Get the content-addressed Anki media filename for a local file.
+
+    Identical files always map to the same name, so media shared by several cards
+    (e.g. the same word audio) is stored in the collection only once.
+
+    Args:
+        file_path (str): Path to the local media file
+
+    Returns:
+        str: Filename of the form "ankiforge_<sha256 prefix><extension>"
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    stat = os.stat(file_path)
+    return _hashed_filename(os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+@lru_cache(maxsize=1024)
+def _hashed_filename(path, mtime_ns, size):
+    """Hash a file's content; cached per (path, mtime, size) so unchanged files are read once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    extension = os.path.splitext(path)[1].lower()
+    return f"{MEDIA_PREFIX}{digest.hexdigest()[:32]}{extension}"
@@ -0,0 +1,247 @@
+import os
+import time
+import shutil
+import threading
+from config.config import (
+    SESSION_MEDIA_DIR, SESSION_MEDIA_QUOTA_BYTES, SESSION_MEDIA_GLOBAL_QUOTA_BYTES,
+    SESSION_MEDIA_IDLE_TIMEOUT, SESSION_MEDIA_GRACE_PERIOD, SESSION_MEDIA_SWEEP_INTERVAL
+)
+
+class MediaLifecycleManager:
+    """
+    Utility responsible for the temporary media (audio, images) of app sessions. Every
+    session gets its own directory; files the session still references are kept,
+    everything else is deleted once it is no longer needed: after its card was queued
+    for upload, when a per-session or global byte quota is exceeded, and when the
+    session has been idle long enough to be considered ended (checked by a periodic
+    sweeper, since Streamlit reports no session end).
+
+    Files modified within the grace period are never deleted, because background work
+    may have just written them without the session referencing them yet.
+    """
+
+    def __init__(self, root=SESSION_MEDIA_DIR, session_quota=SESSION_MEDIA_QUOTA_BYTES,
+                 global_quota=SESSION_MEDIA_GLOBAL_QUOTA_BYTES, idle_timeout=SESSION_MEDIA_IDLE_TIMEOUT,
+                 grace_period=SESSION_MEDIA_GRACE_PERIOD, sweep_interval=SESSION_MEDIA_SWEEP_INTERVAL,
+                 start_sweeper=True):
+        """
+        Initialize the MediaLifecycleManager.
+
+        Args:
+            root (str): Directory holding one media directory per session
+            session_quota (int): Bytes a session may use before unreferenced files are deleted
+            global_quota (int): Bytes all sessions may use before unreferenced files are deleted
+            idle_timeout (float): Seconds without activity after which a session's media is deleted
+            grace_period (float): Seconds a new file is protected from deletion
+            sweep_interval (float): Seconds between sweeps of the background thread
+            start_sweeper (bool): Whether to start the background sweeping thread
+        """
+        self.root = root
+        self.session_quota = session_quota
+        self.global_quota = global_quota
+        self.idle_timeout = idle_timeout
+        self.grace_period = grace_period
+        self.sweep_interval = sweep_interval
+        self._sessions = {}  # Session ID -> {"last_seen": float, "references": set of paths}
+        self._lock = threading.Lock()
+        self._thread = None
+        os.makedirs(self.root, exist_ok=True)
+
+        if start_sweeper:
+            self._thread = threading.Thread(target=self._sweeper_loop, name="media-sweeper", daemon=True)
+            self._thread.start()
+
+    def session_dir(self, session_id):
+        """
+        Get (and create) a session's media directory.
+
+        Args:
+            session_id (str): ID of the session (used as the directory name)
+
+        Returns:
+            str: Path of the directory
+        """
+        path = os.path.join(self.root, session_id)
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            self._session(session_id)
+        return path
+
+    def touch(self, session_id, references=None):
+        """
+        Record session activity and the files the session still needs, and enforce
+        the session's quota.
+
+        Args:
+            session_id (str): ID of the session
+            references (iterable, optional): Paths the session references (replaces the
+                previous references; None keeps them)
+
+        Returns:
+            int: Bytes used by the session's media
+        """
+        with self._lock:
+            session = self._session(session_id)
+            if references is not None:
+                session["references"] = {os.path.abspath(path) for path in references if path}
+
+        files = self._files(os.path.join(self.root, session_id))
+        used = sum(size for _, size, _ in files)
+        if used > self.session_quota:
+            used -= self._delete_unreferenced(files, used - self.session_quota)
+        return used
+
+    def discard(self, session_id, paths):
+        """
+        Delete files that are no longer needed, e.g. because their card was queued for
+        upload (the outbox keeps its own copy). Files outside the session's directory
+        or still referenced by the session are left alone.
+
+        Args:
+            session_id (str): ID of the session
+            paths (iterable): Paths to delete
+
+        Returns:
+            int: Number of files deleted
+        """
+        session_root = os.path.join(os.path.abspath(self.root), session_id) + os.sep
+        with self._lock:
+            session = self._session(session_id)
+            paths = {os.path.abspath(path) for path in paths if path}
+            session["references"] -= paths
+
+        deleted = 0
+        for path in paths:
+            if path.startswith(session_root) and self._remove(path):
+                deleted += 1
+        return deleted
+
+    def release_unreferenced(self, session_id):
+        """
+        Delete the session's files it no longer references (outside the grace period).
+
+        Args:
+            session_id (str): ID of the session
+
+        Returns:
+            int: Bytes freed
+        """
+        files = self._files(os.path.join(self.root, session_id))
+        return self._delete_unreferenced(files, None)
+
+    def end_session(self, session_id):
+        """
+        Delete a session's media directory and forget the session.
+
+        Args:
+            session_id (str): ID of the session
+        """
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        shutil.rmtree(os.path.join(self.root, session_id), ignore_errors=True)
+
+    def sweep(self):
+        """
+        Delete the media of idle sessions (including sessions of earlier server
+        processes), then enforce the session and global quotas.
+
+        Returns:
+            dict: A dictionary containing:
+                - ended_sessions (int): Session directories deleted
+                - freed_bytes (int): Bytes freed by the quotas
+                - used_bytes (int): Bytes used by all sessions afterwards
+        """
+        now = time.time()
+        ended = 0
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+            with self._lock:
+                session = self._sessions.get(entry.name)
+                last_seen = session["last_seen"] if session else None
+            if last_seen is None:
+                # Unknown to this process: judge by the newest file
+                last_seen = max([mtime for _, _, mtime in self._files(entry.path)] + [entry.stat().st_mtime])
+            if now - last_seen > self.idle_timeout:
+                self.end_session(entry.name)
+                ended += 1
+
+        freed = 0
+        all_files = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+            files = self._files(entry.path)
+            used = sum(size for _, size, _ in files)
+            if used > self.session_quota:
+                freed += self._delete_unreferenced(files, used - self.session_quota)
+                files = self._files(entry.path)
+            all_files.extend(files)
+
+        used = sum(size for _, size, _ in all_files)
+        if used > self.global_quota:
+            released = self._delete_unreferenced(all_files, used - self.global_quota)
+            freed += released
+            used -= released
+
+        return {
+            "ended_sessions": ended,
+            "freed_bytes": freed,
+            "used_bytes": used
+        }
+
+    def _session(self, session_id):
+        """Get a session's record, marking it as active. Must be called with the lock held."""
+        session = self._sessions.setdefault(session_id, {"last_seen": 0, "references": set()})
+        session["last_seen"] = time.time()
+        return session
+
+    def _files(self, directory):
+        """List (path, size, mtime) of the files below a directory, oldest first."""
+        files = []
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((os.path.abspath(path), stat.st_size, stat.st_mtime))
+        files.sort(key=lambda file: file[2])
+        return files
+
+    def _delete_unreferenced(self, files, needed):
+        """
+        Delete unreferenced files outside the grace period, oldest first, until needed
+        bytes are freed (None: delete all of them). Returns the bytes freed.
+        """
+        with self._lock:
+            referenced = set().union(*(session["references"] for session in self._sessions.values()))
+
+        cutoff = time.time() - self.grace_period
+        freed = 0
+        for path, size, mtime in files:
+            if needed is not None and freed >= needed:
+                break
+            if path in referenced or mtime > cutoff:
+                continue
+            if self._remove(path):
+                freed += size
+        return freed
+
+    def _remove(self, path):
+        """Delete a file, returning whether it was deleted."""
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def _sweeper_loop(self):
+        """Background thread sweeping the session media periodically."""
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error sweeping session media: {e}")
+            time.sleep(self.sweep_interval)
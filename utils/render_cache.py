@@ -0,0 +1,99 @@
+import os
+import threading
+import mimetypes
+from io import BytesIO
+from collections import OrderedDict
+from config.config import RENDER_CACHE_MAX_BYTES, PREVIEW_THUMBNAIL_SIZE, PREVIEW_THUMBNAIL_QUALITY
+from utils.lazy_import import lazy_import
+
+Image = lazy_import("PIL.Image")
+
+class RenderCache:
+    """
+    Utility responsible for the media shown in the app's previews: image thumbnails
+    and audio bytes are produced once per file version (path, modification time and
+    size) and kept in a bounded in-memory LRU shared by all sessions, so reruns
+    neither re-decode images nor re-read audio files.
+    """
+
+    def __init__(self, max_bytes=RENDER_CACHE_MAX_BYTES, thumbnail_size=PREVIEW_THUMBNAIL_SIZE):
+        """
+        Initialize the RenderCache.
+
+        Args:
+            max_bytes (int): Total size of cached renders before the least recently used are dropped
+            thumbnail_size (int): Default maximum width and height of thumbnails
+        """
+        self.max_bytes = max_bytes
+        self.thumbnail_size = thumbnail_size
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def thumbnail(self, path, size=None):
+        """
+        Get a JPEG thumbnail of an image.
+
+        Args:
+            path (str): Path of the image
+            size (int, optional): Maximum width and height (default: thumbnail_size)
+
+        Returns:
+            bytes | None: Thumbnail data, or None if the file does not exist
+        """
+        size = size or self.thumbnail_size
+        return self._get(("thumbnail", size), path, lambda data: _make_thumbnail(data, size))
+
+    def audio(self, path):
+        """
+        Get an audio file's data and MIME type, e.g. for st.audio.
+
+        Args:
+            path (str): Path of the audio file
+
+        Returns:
+            tuple | None: (bytes, MIME type), or None if the file does not exist
+        """
+        data = self._get(("audio",), path, lambda data: data)
+        if data is None:
+            return None
+        return data, mimetypes.guess_type(path)[0] or "audio/mpeg"
+
+    def _get(self, kind, path, render):
+        """Return the cached render of the file's current version, producing it on a miss."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = kind + (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        try:
+            with open(path, "rb") as f:
+                rendered = render(f.read())
+        except OSError:
+            return None
+
+        with self._lock:
+            if key not in self._entries and len(rendered) <= self.max_bytes:
+                self._entries[key] = rendered
+                self._size += len(rendered)
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return rendered
+
+
+def _make_thumbnail(image_data, size):
+    """Downscale an image and encode it as JPEG."""
+    with Image.open(BytesIO(image_data)) as img:
+        img.thumbnail((size, size), Image.LANCZOS)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        output = BytesIO()
+        img.save(output, format="JPEG", quality=PREVIEW_THUMBNAIL_QUALITY, optimize=True)
+        return output.getvalue()
@@ -0,0 +1,34 @@
+import sqlite3
+from contextlib import closing
+
+class SQLiteConnection:
+    """
+    Utility responsible for short-lived SQLite connections used as context managers:
+    the transaction is committed on success, rolled back on error, and the connection
+    is always closed. One connection per operation keeps the stores safe across threads.
+    """
+
+    def __init__(self, db_path, autocommit=False, synchronous=None):
+        """
+        Open the connection.
+
+        Args:
+            db_path (str): Path of the SQLite database
+            autocommit (bool): Leave transactions to explicit BEGIN statements instead of
+                opening one implicitly before the first write
+            synchronous (str, optional): Value for PRAGMA synchronous (e.g. "NORMAL")
+        """
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None if autocommit else "")
+        if synchronous:
+            self.conn.execute(f"PRAGMA synchronous={synchronous}")
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        with closing(self.conn):
+            if exc_type:
+                self.conn.rollback()
+            else:
+                self.conn.commit()
+        return False
@@ -0,0 +1,88 @@
+import os
+import binascii
+
+class Base64JsonBody:
+    """
+    Utility responsible for streaming a JSON request body that embeds a file as a
+    base64 string, encoding the file chunk by chunk instead of loading it into memory.
+
+    The body has a known length, so requests sends it with a Content-Length header
+    rather than chunked transfer encoding (which AnkiConnect does not support).
+    """
+
+    def __init__(self, prefix, file_path, suffix, chunk_size=48 * 1024):
+        """
+        Initialize the Base64JsonBody.
+
+        Args:
+            prefix (str): JSON text before the base64 string, ending inside its opening quote
+            file_path (str): Path to the file to embed
+            suffix (str): JSON text after the base64 string, starting with its closing quote
+            chunk_size (int): Bytes of the file read at a time (rounded down to a multiple of 3)
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        self.file_path = file_path
+        # A multiple of 3 keeps every chunk's base64 free of padding, so chunks can be concatenated
+        self.chunk_size = max(3, chunk_size - chunk_size % 3)
+        self._prefix = prefix.encode("utf-8")
+        self._suffix = suffix.encode("utf-8")
+        self._file_size = os.path.getsize(file_path)
+        self._file = None
+        self._pending = b""
+        self._stage = "prefix"
+
+    def __len__(self):
+        encoded_size = 4 * ((self._file_size + 2) // 3)
+        return len(self._prefix) + encoded_size + len(self._suffix)
+
+    def __iter__(self):
+        while True:
+            chunk = self.read()
+            if not chunk:
+                return
+            yield chunk
+
+    def read(self, size=-1):
+        """
+        Read up to size bytes of the body (or the next chunk when size is negative).
+
+        Returns:
+            bytes: The next part of the body, or b"" once it has been fully read
+        """
+        while (size < 0 and not self._pending) or len(self._pending) < size:
+            piece = self._next_piece()
+            if not piece:
+                break
+            self._pending += piece
+
+        if size < 0:
+            data, self._pending = self._pending, b""
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    def close(self):
+        """Close the underlying file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._stage = "done"
+
+    def _next_piece(self):
+        """Produce the next piece of the body: the prefix, one encoded chunk, or the suffix."""
+        if self._stage == "prefix":
+            self._stage = "data"
+            self._file = open(self.file_path, "rb")
+            return self._prefix
+        if self._stage == "data":
+            chunk = self._file.read(self.chunk_size)
+            if chunk:
+                return binascii.b2a_base64(chunk, newline=False)
+            self.close()
+            self._stage = "suffix"
+        if self._stage == "suffix":
+            self._stage = "done"
+            return self._suffix
+        return b""
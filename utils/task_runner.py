@@ -0,0 +1,177 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from config.config import TASK_THREAD_WORKERS, TASK_RETENTION
+
+# Statuses of a job that will not change any more
+FINISHED_STATUSES = ("succeeded", "failed", "canceled")
+
+class TaskCancelled(Exception):
+    """Raised inside a task that noticed it was cancelled."""
+
+
+class Task:
+    """
+    Handle passed to tasks started with with_task=True, for noticing cancellation.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        """Whether the job was cancelled."""
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """
+        Stop the task at this point if its job was cancelled.
+
+        Raises:
+            TaskCancelled: If the job was cancelled
+        """
+        if self.cancelled:
+            raise TaskCancelled()
+
+
+class TaskRunner:
+    """
+    Utility responsible for running long work (agent and integration calls) off the
+    Streamlit script thread, on a thread pool shared by all sessions.
+    Jobs are identified by IDs that sessions keep and poll on later reruns.
+    """
+
+    def __init__(self, thread_workers=TASK_THREAD_WORKERS, retention=TASK_RETENTION):
+        """
+        Initialize the TaskRunner.
+
+        Args:
+            thread_workers (int): Threads for I/O-bound jobs (API calls)
+            retention (float): Seconds a finished job is kept for its session to collect
+        """
+        self.retention = retention
+        self._threads = ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix="ankiforge-task")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, label=None, with_task=False, **kwargs):
+        """
+        Start a job.
+
+        Args:
+            fn (callable): Function to run
+            *args: Positional arguments for fn
+            label (str, optional): Description shown while the job runs
+            with_task (bool): Pass a Task handle to fn as the task keyword argument
+                for cooperative cancellation
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            str: ID of the job
+        """
+        job_id = uuid.uuid4().hex
+        task = Task(job_id) if with_task else None
+        if task is not None:
+            kwargs["task"] = task
+
+        with self._lock:
+            self._prune()
+            self._jobs[job_id] = {
+                "id": job_id,
+                "label": label,
+                "status": "queued",
+                "result": None,
+                "error": None,
+                "created_at": time.time(),
+                "finished_at": None,
+                "future": None,
+                "task": task
+            }
+
+        future = self._threads.submit(self._run, job_id, fn, args, kwargs)
+
+        with self._lock:
+            self._jobs[job_id]["future"] = future
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+
+    def get(self, job_id):
+        """
+        Get a job's current state.
+
+        Args:
+            job_id (str): ID returned by submit
+
+        Returns:
+            dict | None: A dictionary containing:
+                - status (str): "queued", "running", "succeeded", "failed" or "canceled"
+                - label (str | None): Description given to submit
+                - result: Return value of the job once it has succeeded
+                - error (str | None): Error message if the job failed
+                - created_at (float): When the job was submitted
+                Or None if the job is unknown (e.g. expired).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {key: value for key, value in job.items() if key not in ("future", "task")}
+
+    def cancel(self, job_id):
+        """
+        Cancel a job. Queued jobs never start; running jobs that take a Task stop
+        at their next cancellation check; other running jobs finish but their result is discarded.
+
+        Args:
+            job_id (str): ID returned by submit
+
+        Returns:
+            bool: Whether the job was still unfinished
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] in FINISHED_STATUSES:
+                return False
+            job["status"] = "canceled"
+            job["finished_at"] = time.time()
+            future, task = job["future"], job["task"]
+
+        if task is not None:
+            task._cancel_event.set()
+        if future is not None:
+            future.cancel()
+        return True
+
+    def _run(self, job_id, fn, args, kwargs):
+        """Run a job, marking it as running first (unless it was cancelled while queued)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] == "canceled":
+                raise CancelledError()
+            job["status"] = "running"
+        return fn(*args, **kwargs)
+
+    def _finish(self, job_id, future):
+        """Record a job's outcome when its future completes."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] == "canceled":
+                return
+            job["finished_at"] = time.time()
+            try:
+                job["result"] = future.result()
+                job["status"] = "succeeded"
+            except (CancelledError, TaskCancelled):
+                job["status"] = "canceled"
+            except Exception as e:
+                job["status"] = "failed"
+                job["error"] = str(e) or type(e).__name__
+
+    def _prune(self):
+        """Forget finished jobs older than the retention period. Must be called with the lock held."""
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job["finished_at"] and job["finished_at"] < cutoff]:
+            del self._jobs[job_id]
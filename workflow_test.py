@@ -92,8 +92,7 @@ def test_german_noun_workflow():
         grammar_check
     )
     print("Card compiled successfully")
-    print(f"Front HTML: {card_data['front_html'][:100]}...")
-    print(f"Back HTML: {card_data['back_html'][:100]}...")
+    print(f"Fields: {card_data['fields']}")
     print(f"Tags: {card_data['tags']}")
     
     # 6. Check Anki connection (without actually uploading)